@@ -3,6 +3,8 @@ import pandas as pd
 import os
 import json # Import json for parsing potential JSON strings if needed
 
+from engine import master_data
+
 # --- CONFIG APLIKASI ---
 st.set_page_config(
     page_title="The Gems Grandmaster",
@@ -12,15 +14,12 @@ st.set_page_config(
 )
 
 # --- FUNGSI BANTU ---
-@st.cache_data
 def load_ahsp_master(file_path):
     """Memuat data master AHSP dan mengembalikan DataFrame."""
     try:
-        df = pd.read_excel(file_path)
-        # Pastikan kolom bidang ada dan ubah ke lowercase untuk konsistensi
-        if 'bidang' in df.columns:
-            df['bidang'] = df['bidang'].str.lower()
-        return df
+        # Dimuat sekali per proses lewat engine.master_data (bidang sudah lowercase),
+        # dipakai bersama halaman modul dan otomatis dimuat ulang jika file berubah
+        return master_data.muat_master_ahsp(file_path).df
     except FileNotFoundError:
         st.error(f"File master AHSP tidak ditemukan di: {file_path}")
         return pd.DataFrame() # Mengembalikan DataFrame kosong jika file tidak ditemukan
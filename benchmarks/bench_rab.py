@@ -0,0 +1,269 @@
+"""
+Benchmark engine RAB dengan data sintetis (deterministik, seed tetap).
+
+Mengukur waktu, throughput (baris/detik) dan puncak memori (tracemalloc) untuk:
+hitung_rab_lengkap (per item), hitung_rab_batch, hitung_rab_batch_sen, RAB halaman (item_rab), rekap sumber daya, pencocokan harga, pencarian AHSP, parse_content,
+clean_decimal, export_to_excel dan export_to_excel_stream.
+
+Contoh:
+    python benchmarks/bench_rab.py                         # 1k, 10k, 100k baris
+    python benchmarks/bench_rab.py --ukuran 1000 10000 --banding benchmarks/hasil/bench_abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import sda_engine  # noqa: E402
+from engine.ahsp_converter import clean_decimal, parse_content  # noqa: E402
+from engine.batch_engine import KATEGORI, NAMA_KOLOM_RAB, hitung_rab_batch, susun_matriks_koefisien  # noqa: E402
+from engine.item_rab import DaftarItem, RABBidang  # noqa: E402
+from engine.pencarian_ahsp import IndeksAHSP  # noqa: E402
+from engine.pencocok_harga import PencocokHarga  # noqa: E402
+from engine.rekap_sumber_daya import jadwal_pengadaan, rincian_kebutuhan  # noqa: E402
+from engine.uang_tetap import hitung_rab_batch_sen  # noqa: E402
+
+N_MASTER = 2000
+N_SUMBER_DAYA = 400
+N_HARGA = 3000
+SATUAN = ["OH", "Kg", "m3", "m2", "Jam", "bh", "ls"]
+
+
+# ==========================================
+# 1. DATA SINTETIS
+# ==========================================
+def buat_master(rng):
+    """Master AHSP sintetis: N_MASTER item, 0-6 koefisien per kategori."""
+    nama = [f"Sumber Daya {i} Tipe {rng.randint(1, 9)}" for i in range(N_SUMBER_DAYA)]
+    rows = []
+    for i in range(N_MASTER):
+        koef = {k: {rng.choice(nama): round(rng.uniform(0.001, 50), 4) for _ in range(rng.randint(0, 6))} for k in KATEGORI}
+        rows.append({"kode_ahsp": f"X.{i // 100}.{i % 100}", "uraian_pekerjaan": f"Pekerjaan sintetis {i}", "satuan": "m3", **koef})
+    return pd.DataFrame(rows), nama
+
+
+def buat_harga(rng, nama_sumber_daya):
+    """Daftar harga: nama sumber daya diberi akhiran satuan (memaksa aturan prefix) + entri pengisi."""
+    harga = {f"{n} ({rng.choice(SATUAN)})": rng.randint(500, 2_000_000) for n in nama_sumber_daya}
+    while len(harga) < N_HARGA:
+        harga[f"Item Regional {len(harga)}"] = rng.randint(500, 2_000_000)
+    return harga
+
+
+def buat_sheet_mentah(rng, n_baris):
+    """Sheet analisa mentah (format converter) dengan kira-kira n_baris baris."""
+    rows = []
+    i = 0
+    while len(rows) < n_baris:
+        rows.append(["", f"A.{i // 100}.{i % 100}", f"Pekerjaan sintetis nomor {i}", rng.choice(["m3", "m2", "bh"]), "", "", ""])
+        for judul in ("TENAGA KERJA", "BAHAN", "PERALATAN"):
+            rows.append(["", "", judul, "", "", "", ""])
+            for j in range(rng.randint(1, 4)):
+                koef = f"{rng.uniform(0.001, 5):.4f}".replace(".", ",")
+                rows.append(["", str(j + 1), f"Sumber Daya {rng.randint(0, N_SUMBER_DAYA)}", "OH", koef, f"{rng.randint(1000, 900000):,}".replace(",", "."), ""])
+            rows.append(["", "", f"JUMLAH HARGA {judul}", "", "", "", ""])
+        i += 1
+    return pd.DataFrame(rows[:n_baris])
+
+
+def buat_data(n, seed=2025):
+    rng = random.Random(seed)
+    df_master, nama_sumber_daya = buat_master(rng)
+    harga = buat_harga(rng, nama_sumber_daya)
+    pencocok = PencocokHarga(harga)
+    harga_sumber_daya = {k: pencocok.harga(k) for k in nama_sumber_daya}
+    kode = [rng.choice(df_master["kode_ahsp"]) for _ in range(n)]
+    volume = [round(rng.uniform(0.1, 500), 2) for _ in range(n)]
+
+    matriks = susun_matriks_koefisien(df_master)
+    df_hasil = hitung_rab_batch(kode, volume, matriks, harga_sumber_daya)
+    df_rab = pd.DataFrame({"Uraian Pekerjaan": kode, "Satuan": "m3", "Volume": volume})
+    for kolom, nama_kolom in NAMA_KOLOM_RAB.items():
+        df_rab[nama_kolom] = df_hasil[kolom]
+    df_rab["PPN (%)"] = 11.0
+
+    return {
+        "master": df_master.set_index("kode_ahsp"),
+        "matriks": matriks,
+        "harga": harga,
+        "harga_sumber_daya": harga_sumber_daya,
+        "kode": kode,
+        "volume": volume,
+        "nama_cari": [rng.choice(nama_sumber_daya) for _ in range(n)],
+        "angka": [f"{rng.randint(0, 10**6):,}".replace(",", ".") + f",{rng.randint(0, 99):02d}" for _ in range(n)],
+        "sheet": buat_sheet_mentah(rng, n),
+        "df_rab": df_rab,
+        "kueri": [f"pekerjaan sintetis {rng.randint(0, N_MASTER)}"[:rng.randint(8, 24)] for _ in range(n)],
+    }
+
+
+# ==========================================
+# 2. KASUS BENCHMARK
+# ==========================================
+def bench_hitung_rab_lengkap(d):
+    master, h = d["master"], d["harga_sumber_daya"]
+    for kode, vol in zip(d["kode"], d["volume"]):
+        item = master.loc[kode]
+        sda_engine.hitung_rab_lengkap(vol, item["tenaga"], item["bahan"], item["alat"], h, h, h)
+
+
+def bench_hitung_rab_batch(d):
+    hitung_rab_batch(d["kode"], d["volume"], d["matriks"], d["harga_sumber_daya"])
+
+
+def bench_hitung_rab_batch_sen(d):
+    hitung_rab_batch_sen(d["kode"], d["volume"], d["matriks"], d["harga_sumber_daya"])
+
+
+def bench_rab_bidang(d):
+    # Model item halaman SDA/CK/BM: keranjang + indeks inkremental terisi sekaligus
+    df = d["df_rab"]
+    daftar = DaftarItem(d["kode"], df["Uraian Pekerjaan"], df["Satuan"], d["volume"])
+    RABBidang().tambah(d["matriks"], daftar, d["harga_sumber_daya"].get)
+
+
+def bench_rekap_sumber_daya(d):
+    # Jadwal pengadaan seluruh proyek + rincian per baris BOQ
+    jadwal_pengadaan(d["kode"], d["volume"], d["matriks"], d["harga_sumber_daya"])
+    rincian_kebutuhan(d["kode"], d["volume"], d["matriks"], d["harga_sumber_daya"])
+
+
+def bench_pencocokan_harga(d):
+    # Termasuk membangun indeks (sekali per daftar harga) + satu pencarian per baris
+    pencocok = PencocokHarga(d["harga"])
+    for nama in d["nama_cari"]:
+        pencocok.cari(nama)
+
+
+def bench_pencarian_ahsp(d):
+    # Termasuk membangun indeks (sekali per versi master) + satu kueri per baris
+    master = d["master"]
+    indeks = IndeksAHSP(master.index.tolist(), master["uraian_pekerjaan"].tolist())
+    for kueri in d["kueri"]:
+        indeks.cari(kueri)
+
+
+def bench_parse_content(d):
+    parse_content(d["sheet"], "bench.csv")
+
+
+def bench_clean_decimal(d):
+    for s in d["angka"]:
+        clean_decimal(s)
+
+
+def bench_export_to_excel(d):
+    sda_engine.export_to_excel(d["df_rab"], nama_proyek="Benchmark")
+
+
+def bench_export_to_excel_stream(d):
+    os.remove(sda_engine.export_to_excel_stream(d["df_rab"], nama_proyek="Benchmark"))
+
+
+BENCHMARK = {
+    "hitung_rab_lengkap": bench_hitung_rab_lengkap,
+    "hitung_rab_batch": bench_hitung_rab_batch,
+    "hitung_rab_batch_sen": bench_hitung_rab_batch_sen,
+    "rab_bidang": bench_rab_bidang,
+    "rekap_sumber_daya": bench_rekap_sumber_daya,
+    "pencocokan_harga": bench_pencocokan_harga,
+    "pencarian_ahsp": bench_pencarian_ahsp,
+    "parse_content": bench_parse_content,
+    "clean_decimal": bench_clean_decimal,
+    "export_to_excel": bench_export_to_excel,
+    "export_to_excel_stream": bench_export_to_excel_stream,
+}
+
+
+# ==========================================
+# 3. RUNNER
+# ==========================================
+def ukur(fungsi, data, ulang):
+    """Waktu terbaik dari `ulang` kali jalan (tanpa tracemalloc), lalu satu jalan terpisah untuk puncak memori."""
+    waktu = []
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fungsi(data)
+        waktu.append(time.perf_counter() - mulai)
+
+    tracemalloc.start()
+    fungsi(data)
+    _, puncak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(waktu), puncak
+
+
+def commit_saat_ini():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def banding(hasil, path_lama):
+    """Mencetak rasio waktu terhadap hasil benchmark lama (>1 berarti lebih lambat)."""
+    with open(path_lama, encoding="utf-8") as f:
+        lama = {(r["benchmark"], r["n"]): r for r in json.load(f)["hasil"]}
+    print(f"\nPerbandingan terhadap {path_lama}:")
+    for r in hasil:
+        r_lama = lama.get((r["benchmark"], r["n"]))
+        if r_lama:
+            print(f"  {r['benchmark']:<24} n={r['n']:<7} waktu x{r['detik'] / r_lama['detik']:.2f}  memori x{r['puncak_mb'] / max(r_lama['puncak_mb'], 1e-9):.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark engine RAB dengan data sintetis.")
+    parser.add_argument("--ukuran", type=int, nargs="+", default=[1000, 10000, 100000], help="Jumlah baris BOQ")
+    parser.add_argument("--benchmark", nargs="+", choices=list(BENCHMARK), default=list(BENCHMARK))
+    parser.add_argument("--ulang", type=int, default=3, help="Jumlah pengulangan pengukuran waktu (diambil terbaik)")
+    parser.add_argument("--output", help="File JSON hasil (default: benchmarks/hasil/bench_<commit>.json)")
+    parser.add_argument("--banding", help="File JSON hasil lama untuk dibandingkan")
+    args = parser.parse_args(argv)
+
+    commit = commit_saat_ini()
+    hasil = []
+    for n in args.ukuran:
+        data = buat_data(n)
+        for nama in args.benchmark:
+            detik, puncak = ukur(BENCHMARK[nama], data, args.ulang)
+            hasil.append({
+                "benchmark": nama, "n": n, "detik": detik,
+                "baris_per_detik": n / detik if detik else None,
+                "puncak_mb": puncak / 2**20,
+            })
+            print(f"{nama:<24} n={n:<7} {detik:9.4f} s  {n / detik:>14,.0f} baris/s  puncak {puncak / 2**20:8.2f} MB")
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "hasil", f"bench_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "waktu": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "hasil": hasil,
+        }, f, indent=2)
+    print(f"\nHasil disimpan ke {output}")
+
+    if args.banding:
+        banding(hasil, args.banding)
+
+
+if __name__ == "__main__":
+    main()
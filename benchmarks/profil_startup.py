@@ -0,0 +1,225 @@
+"""
+Profil startup: waktu impor per modul dan waktu render pertama per halaman Streamlit.
+
+Setiap pengukuran dijalankan di interpreter baru (cold start) dengan `python -X importtime`:
+- modul engine: `import engine.<modul>` -> waktu impor kumulatif + dependensi terberat,
+  dan apakah dependensi berat (MODUL_BERAT) ikut termuat;
+- halaman: skrip dijalankan sekali lewat streamlit.testing.v1.AppTest -> waktu impor
+  Streamlit, waktu render pertama (satu eksekusi skrip penuh) dan modul terberat yang diimpor.
+
+Contoh:
+    python benchmarks/profil_startup.py                      # semua modul engine + semua halaman
+    python benchmarks/profil_startup.py --halaman Hello.py --top 5
+    python benchmarks/profil_startup.py --tanpa-halaman      # tanpa Streamlit
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_rab import commit_saat_ini  # noqa: E402
+
+# Dependensi yang tidak boleh ikut termuat oleh modul engine yang tidak memakainya
+MODUL_BERAT = ("google.generativeai", "streamlit", "xlsxwriter", "openpyxl")
+
+_POLA_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)\s*$")
+
+# Dijalankan di proses anak: argv[1] = path halaman, argv[2] = timeout (detik)
+_SKRIP_RENDER = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+error = []
+try:
+    at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+    at.run()
+    error = [str(e.value) for e in at.exception]
+except Exception as e:
+    error = [f"{type(e).__name__}: {e}"]
+t2 = time.perf_counter()
+print(json.dumps({"impor_streamlit_detik": t1 - t0, "render_pertama_detik": t2 - t1, "error": error}))
+"""
+
+
+# ==========================================
+# 1. PENGUKURAN
+# ==========================================
+def urai_importtime(stderr):
+    """
+    Mengurai keluaran `-X importtime`.
+
+    Returns:
+        list: Dict {modul, self_ms, kumulatif_ms, level} sesuai urutan keluaran
+              (level 0 = diimpor langsung oleh kode yang diukur).
+    """
+    baris_modul = []
+    for baris in stderr.splitlines():
+        m = _POLA_IMPORTTIME.match(baris)
+        if m:
+            baris_modul.append({
+                "modul": m[4], "self_ms": int(m[1]) / 1000, "kumulatif_ms": int(m[2]) / 1000, "level": len(m[3]) // 2,
+            })
+    return baris_modul
+
+
+def _jalankan(argumen, timeout):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", *argumen], cwd=ROOT, env=env,
+        capture_output=True, text=True, encoding="utf-8", timeout=timeout,
+    )
+
+
+def _ringkas_impor(baris_modul, top):
+    """Modul level teratas terberat + daftar MODUL_BERAT yang termuat."""
+    teratas = sorted((b for b in baris_modul if b["level"] == 0), key=lambda b: -b["kumulatif_ms"])[:top]
+    termuat = {b["modul"] for b in baris_modul}
+    return {
+        "modul_terberat": [{"modul": b["modul"], "kumulatif_ms": b["kumulatif_ms"]} for b in teratas],
+        "modul_berat_termuat": [m for m in MODUL_BERAT if m in termuat],
+    }
+
+
+def profil_modul(modul, top=5, timeout=120):
+    """
+    Waktu impor satu modul di interpreter baru.
+
+    Returns:
+        dict: modul, impor_ms (kumulatif modul itu sendiri), modul_terberat (dependensi
+              langsung terberat), modul_berat_termuat, error.
+    """
+    proses = _jalankan(["-c", f"import {modul}"], timeout)
+    baris_modul = urai_importtime(proses.stderr)
+    posisi = next((i for i in reversed(range(len(baris_modul))) if baris_modul[i]["modul"] == modul), None)
+    sendiri = baris_modul[posisi] if posisi is not None else None
+    # Dependensi langsung = baris level 1 tepat sebelum baris modul itu (importtime mencetak anak lebih dulu)
+    anak = []
+    if sendiri and sendiri["level"] == 0:
+        i = posisi - 1
+        while i >= 0 and baris_modul[i]["level"] > 0:
+            if baris_modul[i]["level"] == 1:
+                anak.append(baris_modul[i])
+            i -= 1
+    hasil = {
+        "modul": modul,
+        "impor_ms": sendiri["kumulatif_ms"] if sendiri else None,
+        **_ringkas_impor(baris_modul, top),
+        "error": proses.stderr.strip().splitlines()[-1] if proses.returncode else None,
+    }
+    if anak:
+        hasil["modul_terberat"] = [
+            {"modul": b["modul"], "kumulatif_ms": b["kumulatif_ms"]}
+            for b in sorted(anak, key=lambda b: -b["kumulatif_ms"])[:top]
+        ]
+    return hasil
+
+
+def profil_halaman(path_halaman, top=5, timeout=120):
+    """
+    Menjalankan satu halaman sekali (AppTest, tanpa browser) di interpreter baru.
+
+    Returns:
+        dict: halaman, impor_streamlit_detik, render_pertama_detik (eksekusi skrip pertama,
+              termasuk semua impor halaman), modul_terberat, modul_berat_termuat, error.
+    """
+    try:
+        proses = _jalankan(["-c", _SKRIP_RENDER, path_halaman, str(timeout)], timeout + 30)
+    except subprocess.TimeoutExpired:
+        return {"halaman": path_halaman, "error": f"timeout {timeout} s"}
+    try:
+        waktu = json.loads(proses.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        tail = proses.stderr.strip().splitlines()
+        return {"halaman": path_halaman, "error": tail[-1] if tail else f"exit {proses.returncode}"}
+
+    # Hanya impor yang terjadi saat skrip halaman berjalan, bukan impor AppTest
+    baris_modul = urai_importtime(proses.stderr)
+    awal_render = next((i for i, b in enumerate(baris_modul) if b["modul"] == "streamlit.testing.v1"), -1) + 1
+    return {
+        "halaman": path_halaman,
+        "impor_streamlit_detik": waktu["impor_streamlit_detik"],
+        "render_pertama_detik": waktu["render_pertama_detik"],
+        **_ringkas_impor(baris_modul[awal_render:], top),
+        "error": "; ".join(waktu["error"]) or None,
+    }
+
+
+def daftar_modul_engine():
+    return sorted(
+        f"engine.{os.path.splitext(os.path.basename(p))[0]}"
+        for p in glob.glob(os.path.join(ROOT, "engine", "*.py")) if not p.endswith("__init__.py")
+    )
+
+
+def daftar_halaman():
+    return ["Hello.py"] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+
+# ==========================================
+# 2. CLI
+# ==========================================
+def _format_terberat(hasil):
+    return ", ".join(f"{m['modul']} {m['kumulatif_ms']:.0f}" for m in hasil.get("modul_terberat", []))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profil waktu impor modul engine dan waktu render pertama halaman.")
+    parser.add_argument("--modul", nargs="+", help="Modul yang diprofil (default: semua engine.*)")
+    parser.add_argument("--halaman", nargs="+", help="Halaman yang diprofil (default: Hello.py + pages/*.py)")
+    parser.add_argument("--tanpa-halaman", action="store_true", help="Lewati profil halaman (tidak butuh Streamlit)")
+    parser.add_argument("--top", type=int, default=5, help="Jumlah modul terberat yang ditampilkan")
+    parser.add_argument("--timeout", type=float, default=120, help="Batas waktu render per halaman (detik)")
+    parser.add_argument("--output", help="File JSON hasil (default: benchmarks/hasil/startup_<commit>.json)")
+    args = parser.parse_args(argv)
+
+    print("Waktu impor modul (ms, cold start):")
+    hasil_modul = []
+    for modul in args.modul or daftar_modul_engine():
+        hasil = profil_modul(modul, args.top)
+        hasil_modul.append(hasil)
+        if hasil["error"]:
+            print(f"  {modul:<28} GAGAL: {hasil['error']}")
+            continue
+        berat = f"  [memuat: {', '.join(hasil['modul_berat_termuat'])}]" if hasil["modul_berat_termuat"] else ""
+        print(f"  {modul:<28} {hasil['impor_ms']:9.1f}  <- {_format_terberat(hasil)}{berat}")
+
+    hasil_halaman = []
+    if not args.tanpa_halaman:
+        print("\nRender pertama halaman (detik, cold start):")
+        for halaman in args.halaman or daftar_halaman():
+            hasil = profil_halaman(halaman, args.top, args.timeout)
+            hasil_halaman.append(hasil)
+            if "render_pertama_detik" not in hasil:
+                print(f"  {halaman:<34} GAGAL: {hasil['error']}")
+                continue
+            print(f"  {halaman:<34} impor streamlit {hasil['impor_streamlit_detik']:6.2f}  render {hasil['render_pertama_detik']:6.2f}"
+                  f"  <- {_format_terberat(hasil)}")
+            if hasil["error"]:
+                print(f"  {'':<34} exception: {hasil['error']}")
+
+    commit = commit_saat_ini()
+    output = args.output or os.path.join(ROOT, "benchmarks", "hasil", f"startup_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "waktu": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "modul": hasil_modul,
+            "halaman": hasil_halaman,
+        }, f, indent=2)
+    print(f"\nHasil disimpan ke {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import hashlib
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+from engine.batch_engine import KATEGORI, KOLOM_BIAYA, MatriksKoefisien, hsp_per_kategori, rincian_biaya
+
+# ==========================================
+# AHSP BERTINGKAT (AHSP DI DALAM AHSP)
+# ==========================================
+# Komponen AHSP boleh berupa kode AHSP lain, ditulis seperti sumber daya biasa di sel
+# tenaga/bahan/alat: "B.01.a 0.15;Besi beton 10.5" = 0.15 satuan analisa B.01.a + 10.5 kg besi.
+# Sub-analisa masuk dengan biaya langsungnya, dipecah ke tenaga/bahan/alat sesuai rincian
+# sub-analisa itu sendiri (kategori sel tempat referensi ditulis diabaikan), sehingga
+# overhead hanya dikenakan sekali di item teratas.
+MAKS_CACHE_HARGA = 8
+
+
+class SiklusAHSP(ValueError):
+    """Referensi sub-analisa melingkar (A memakai B, B memakai A)."""
+
+    def __init__(self, siklus):
+        self.siklus = siklus
+        super().__init__(f"Referensi AHSP melingkar: {' -> '.join(siklus)}")
+
+
+class AnalisaBertingkat:
+    """
+    Resolusi AHSP bertingkat di atas MatriksKoefisien.
+
+    Referensi antar-item membentuk DAG yang diurutkan topologis (Kahn) sekali saat dibuat;
+    siklus ditolak dengan SiklusAHSP. Setiap item diberi level = 1 + level sub-analisa
+    terdalamnya, lalu HSP dihitung per level: level 0 dengan hsp_per_kategori biasa,
+    level berikutnya menambahkan koef x HSP sub-analisa yang sudah final. Setiap sub-analisa
+    dihitung sekali, berapapun banyak item yang memakainya.
+
+    HSP seluruh master di-memo per versi daftar harga (sidik isi vektor harga, LRU
+    MAKS_CACHE_HARGA versi), jadi banyak BOQ dengan harga yang sama tidak menghitung ulang.
+
+    Args:
+        matriks (MatriksKoefisien): Matriks master satu bidang (kode unik, misal
+            StoreAHSP.matriks_bidang); sumber daya yang namanya sama dengan salah satu kode
+            AHSP dianggap referensi sub-analisa.
+
+    Raises:
+        SiklusAHSP: Jika ada referensi melingkar.
+        ValueError: Jika kode AHSP di matriks tidak unik.
+    """
+
+    def __init__(self, matriks: MatriksKoefisien):
+        ganda = matriks.kode_ganda()
+        if ganda:
+            # Referensi sub-analisa dicari lewat kode: kode ganda membuatnya ambigu
+            raise ValueError(f"Kode AHSP ganda, sub-analisa tidak bisa diurai (pilah master per bidang): {', '.join(ganda[:10])}")
+        self.matriks = matriks
+        n_item = matriks.n_item
+        posisi_kode = {k: i for i, k in enumerate(matriks.kode)}
+        anak_sumber_daya = np.array([posisi_kode.get(nama, -1) for nama in matriks.sumber_daya], dtype=np.int64)
+        self.id_referensi = np.flatnonzero(anak_sumber_daya >= 0)
+
+        baris_entri = np.repeat(np.arange(n_item, dtype=np.int64), np.diff(matriks.indptr))
+        anak_entri = anak_sumber_daya[matriks.indices] if len(anak_sumber_daya) else np.full(len(baris_entri), -1)
+        referensi = anak_entri >= 0
+        self._induk = baris_entri[referensi]
+        self._anak = anak_entri[referensi]
+        self._koef = matriks.data[referensi]
+
+        langsung = ~referensi
+        self._langsung = MatriksKoefisien(
+            kode=matriks.kode,
+            sumber_daya=matriks.sumber_daya,
+            indptr=np.concatenate(([0], np.cumsum(np.bincount(baris_entri[langsung], minlength=n_item)))).astype(np.int64),
+            indices=matriks.indices[langsung],
+            data=matriks.data[langsung],
+            kategori=matriks.kategori[langsung],
+        )
+
+        self.urutan, self.level = self._urutkan_topologis()
+        # Referensi dikelompokkan per level item induknya (level 0 tidak punya referensi)
+        level_induk = self.level[self._induk]
+        self._referensi_per_level = [np.flatnonzero(level_induk == lv) for lv in range(1, int(self.level.max(initial=0)) + 1)]
+        self._cache_hsp = OrderedDict()
+        self._datar = None
+
+    @property
+    def ada_referensi(self):
+        return len(self._induk) > 0
+
+    def posisi(self, kode_ahsp):
+        return self.matriks.posisi(kode_ahsp)
+
+    # ------------------------------------------
+    # DAG
+    # ------------------------------------------
+    def _urutkan_topologis(self):
+        """Urutan item (sub-analisa lebih dulu) dan level tiap item; SiklusAHSP jika ada siklus."""
+        n_item = self.matriks.n_item
+        sisa = np.bincount(self._induk, minlength=n_item).tolist()  # referensi yang belum selesai
+        induk_dari = [[] for _ in range(n_item)]
+        for induk, anak in zip(self._induk.tolist(), self._anak.tolist()):
+            induk_dari[anak].append(induk)
+
+        level = [0] * n_item
+        urutan = []
+        antrean = deque(i for i in range(n_item) if not sisa[i])
+        while antrean:
+            anak = antrean.popleft()
+            urutan.append(anak)
+            for induk in induk_dari[anak]:
+                level[induk] = max(level[induk], level[anak] + 1)
+                sisa[induk] -= 1
+                if not sisa[induk]:
+                    antrean.append(induk)
+
+        if len(urutan) < n_item:
+            raise SiklusAHSP(self._cari_siklus([s > 0 for s in sisa]))
+        return np.asarray(urutan, dtype=np.int64), np.asarray(level, dtype=np.int64)
+
+    def _cari_siklus(self, tersisa):
+        """Satu siklus (daftar kode) di antara item yang tidak bisa diurutkan."""
+        # Item tersisa selalu punya minimal satu sub-analisa yang juga tersisa, jadi
+        # menelusuri anak tersisa pasti kembali ke item yang sudah dikunjungi
+        anak_tersisa = {}
+        for induk, anak in zip(self._induk.tolist(), self._anak.tolist()):
+            if tersisa[induk] and tersisa[anak]:
+                anak_tersisa.setdefault(induk, anak)
+        item = next(iter(anak_tersisa))
+        jejak = {}
+        while item not in jejak:
+            jejak[item] = len(jejak)
+            item = anak_tersisa[item]
+        siklus = list(jejak)[jejak[item]:] + [item]
+        return [str(self.matriks.kode[i]) for i in siklus]
+
+    # ------------------------------------------
+    # HSP (memo per versi harga)
+    # ------------------------------------------
+    def hsp(self, vektor_harga):
+        """
+        HSP tenaga/bahan/alat seluruh item master, termasuk sub-analisa.
+
+        Args:
+            vektor_harga (np.ndarray): Harga per id sumber daya (lihat MatriksKoefisien.vektor_harga);
+                harga pada posisi referensi diabaikan.
+
+        Returns:
+            np.ndarray: Array read-only (n_item, 3), dipakai bersama antar pemanggil.
+        """
+        vektor_harga = np.ascontiguousarray(vektor_harga, dtype=np.float64)
+        versi = hashlib.blake2b(vektor_harga.tobytes(), digest_size=16).digest()
+        hsp = self._cache_hsp.get(versi)
+        if hsp is not None:
+            self._cache_hsp.move_to_end(versi)
+            return hsp
+
+        hsp = hsp_per_kategori(self._langsung, vektor_harga)
+        for referensi in self._referensi_per_level:
+            np.add.at(hsp, self._induk[referensi], self._koef[referensi, None] * hsp[self._anak[referensi]])
+        hsp.setflags(write=False)
+
+        self._cache_hsp[versi] = hsp
+        if len(self._cache_hsp) > MAKS_CACHE_HARGA:
+            self._cache_hsp.popitem(last=False)
+        return hsp
+
+    def hitung_rab_batch(self, kode_ahsp, volume, harga: dict, persen_overhead: float = 15.0, persen_ppn: float = 11.0):
+        """Sama seperti batch_engine.hitung_rab_batch, dengan HSP bertingkat yang di-memo."""
+        baris = self.posisi(kode_ahsp)
+        volume = np.asarray(volume, dtype=np.float64)
+        if len(volume) != len(baris):
+            raise ValueError("Panjang kode_ahsp dan volume harus sama.")
+
+        hsp = self.hsp(self.matriks.vektor_harga(harga))[baris]
+        rincian = rincian_biaya(hsp, volume, persen_overhead, persen_ppn)
+
+        hasil = {"kode_ahsp": list(kode_ahsp), "volume": volume}
+        hasil.update(zip(KOLOM_BIAYA, rincian.T))
+        return pd.DataFrame(hasil)
+
+    # ------------------------------------------
+    # KOEFISIEN DATAR (SUB-ANALISA DIURAIKAN)
+    # ------------------------------------------
+    def matriks_datar(self):
+        """
+        MatriksKoefisien dengan semua referensi diuraikan menjadi sumber daya dasar
+        (koefisien dikalikan sepanjang rantai, entri sama dijumlahkan).
+
+        Dipakai untuk hal yang butuh koefisien, bukan harga: rekap kebutuhan sumber daya,
+        skenario harga, keranjang halaman. Tanpa referensi, matriks asli dikembalikan apa adanya.
+        """
+        if self._datar is not None:
+            return self._datar
+        if not self.ada_referensi:
+            self._datar = self.matriks
+            return self._datar
+
+        langsung = self._langsung
+        n_sumber_daya = max(len(self.matriks.sumber_daya), 1)
+        urut_induk = np.argsort(self._induk, kind="stable")
+        batas_induk = np.searchsorted(self._induk[urut_induk], np.arange(self.matriks.n_item + 1))
+
+        baris = [None] * self.matriks.n_item  # (indices, kategori, data) per item, sub-analisa lebih dulu
+        for i in self.urutan.tolist():
+            a, b = langsung.indptr[i], langsung.indptr[i + 1]
+            indices, kategori, data = [langsung.indices[a:b]], [langsung.kategori[a:b]], [langsung.data[a:b]]
+            for r in urut_induk[batas_induk[i]:batas_induk[i + 1]].tolist():
+                sub_indices, sub_kategori, sub_data = baris[self._anak[r]]
+                indices.append(sub_indices)
+                kategori.append(sub_kategori)
+                data.append(sub_data * self._koef[r])
+            if len(indices) == 1:
+                baris[i] = (indices[0], kategori[0], data[0])
+                continue
+
+            indices, kategori, data = np.concatenate(indices), np.concatenate(kategori), np.concatenate(data)
+            _, pertama, kelompok = np.unique(kategori.astype(np.int64) * n_sumber_daya + indices, return_index=True, return_inverse=True)
+            total = np.bincount(kelompok, weights=data)
+            urut = np.lexsort((pertama, kategori[pertama]))  # tenaga -> bahan -> alat, lalu urutan kemunculan
+            baris[i] = (indices[pertama[urut]], kategori[pertama[urut]], total[urut])
+
+        self._datar = MatriksKoefisien(
+            kode=self.matriks.kode,
+            sumber_daya=self.matriks.sumber_daya,
+            indptr=np.concatenate(([0], np.cumsum([len(b[0]) for b in baris]))).astype(np.int64),
+            indices=np.concatenate([b[0] for b in baris]).astype(np.int32),
+            data=np.concatenate([b[2] for b in baris]).astype(np.float64),
+            kategori=np.concatenate([b[1] for b in baris]).astype(np.int8),
+        )
+        return self._datar
+
+    def koefisien_datar(self, kode_ahsp):
+        """Dict koefisien (tenaga, bahan, alat) satu item setelah sub-analisanya diuraikan."""
+        datar = self.matriks_datar()
+        i = int(self.posisi([kode_ahsp])[0])
+        a, b = datar.indptr[i], datar.indptr[i + 1]
+        hasil = tuple({} for _ in KATEGORI)
+        for id_sumber_daya, id_kat, koef in zip(datar.indices[a:b].tolist(), datar.kategori[a:b].tolist(), datar.data[a:b].tolist()):
+            hasil[id_kat][datar.sumber_daya[id_sumber_daya]] = koef
+        return hasil
+
+    def sumber_daya_dasar(self):
+        """Nama sumber daya yang bukan referensi sub-analisa (yang perlu dicarikan harganya)."""
+        referensi = set(self.id_referensi.tolist())
+        return [nama for i, nama in enumerate(self.matriks.sumber_daya) if i not in referensi]
+
+
+# ==========================================
+# CACHE PER MATRIKS
+# ==========================================
+_CACHE_ANALISA = {}
+
+
+def analisa_bertingkat(matriks: MatriksKoefisien):
+    """
+    AnalisaBertingkat untuk satu MatriksKoefisien, dibangun sekali per objek matriks
+    (misal StoreAHSP.matriks yang dibagi semua sesi).
+    """
+    entri = _CACHE_ANALISA.get(id(matriks))
+    if entri is None or entri[0] is not matriks:
+        if len(_CACHE_ANALISA) > 8:
+            _CACHE_ANALISA.clear()
+        entri = _CACHE_ANALISA[id(matriks)] = (matriks, AnalisaBertingkat(matriks))
+    return entri[1]
@@ -0,0 +1,290 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+import pandas as pd
+
+# ==========================================
+# 1. CORE LOGIC (SCANNER BARIS)
+# ==========================================
+
+def clean_decimal(s):
+    """Membersihkan format angka 1.000,00 menjadi 1000.0"""
+    s = str(s).strip()
+    # Hapus Rp dan spasi
+    s = s.replace('Rp', '').replace(' ', '')
+    
+    # Cek format desimal Indonesia (koma) vs US (titik)
+    if ',' in s and '.' in s: 
+        s = s.replace('.', '').replace(',', '.') # 1.000,00 -> 1000.00
+    elif ',' in s: 
+        s = s.replace(',', '.') # 0,05 -> 0.05
+        
+    try:
+        return float(s)
+    except:
+        return 0.0
+
+# --- Pola & tabel klasifikasi (dikompilasi sekali saat import) ---
+_POLA_KODE = re.compile(r'^[A-Z0-9]+\.[\d\.]+$') # Minimal 2 segmen angka (misal 2.2.1 atau 6.4.1)
+_POLA_ANGKA = re.compile(r'^[\d\.,]+$')
+_SATUAN_HEADER = frozenset(['m', "m'", 'm2', 'm3', 'bh', 'buah', 'unit', 'kg', 'set', 'ls', 'titik'])
+_SATUAN_DATA = frozenset(['oh', 'orang', 'ls', 'bh', 'set', 'unit', 'sewa', 'jam', 'm3', 'kg'])
+_KATA_STOP = ('JUMLAH', 'TOTAL', 'HARGA', 'BIAYA')
+
+# Bit kelas sel
+_KODE = 1          # calon kode analisa (dan panjang < 15)
+_ANGKA = 2         # hanya digit/titik/koma
+_URAIAN = 4        # teks > 5 karakter (calon uraian pekerjaan)
+_NAMA = 8          # teks > 2 karakter (calon nama sumber daya)
+_SAT_HEADER = 16   # satuan valid untuk judul pekerjaan
+_SAT_DATA = 32     # satuan di baris koefisien (dilewati)
+_STOP = 64         # mengandung JUMLAH/TOTAL/HARGA/BIAYA
+_BUKAN_JUDUL = 128 # mengandung ANALISA/JUMLAH (uraian tidak valid)
+
+
+def _klasifikasi_sel(cell):
+    """Mengklasifikasi satu sel (sudah di-strip) menjadi bitmask kelas."""
+    upper = cell.upper()
+    lower = cell.lower()
+    kelas = 0
+    if _POLA_KODE.match(cell) and len(cell) < 15: kelas |= _KODE
+    if _POLA_ANGKA.match(cell): kelas |= _ANGKA
+    else:
+        if len(cell) > 5: kelas |= _URAIAN
+        if len(cell) > 2: kelas |= _NAMA
+    if lower in _SATUAN_HEADER: kelas |= _SAT_HEADER
+    if lower in _SATUAN_DATA: kelas |= _SAT_DATA
+    if any(x in upper for x in _KATA_STOP): kelas |= _STOP
+    if "ANALISA" in upper or "JUMLAH" in upper: kelas |= _BUKAN_JUDUL
+    return kelas
+
+
+# Kelas baris & tabel transisi state machine: (ada_item, kelas_baris) -> aksi
+_BARIS_JUDUL, _BARIS_TENAGA, _BARIS_BAHAN, _BARIS_ALAT, _BARIS_DATA = range(5)
+_TRANSISI = {
+    (False, _BARIS_JUDUL): 'buka_item',
+    (True, _BARIS_JUDUL): 'buka_item',
+    (True, _BARIS_TENAGA): 'tenaga',
+    (True, _BARIS_BAHAN): 'bahan',
+    (True, _BARIS_ALAT): 'alat',
+    (True, _BARIS_DATA): 'ambil_koef',
+    # (False, selain judul): abaikan baris sebelum judul pekerjaan pertama
+}
+
+
+def parse_content(df_raw, source_filename):
+    """
+    Membaca DataFrame mentah dan mencari pola Analisa AHSP.
+    Mengabaikan header tebal di atas.
+
+    Scanner satu lintasan berbasis tabel: setiap nilai sel diklasifikasi sekali
+    (di-cache per nilai unik), lalu tiap baris menjalankan satu transisi state
+    machine. Output identik dengan scanner regex bersarang versi sebelumnya
+    (lihat data/regresi_converter dan cek_regresi()).
+    """
+    data_list = []
+
+    # Konversi ke List of Lists (String) biar mudah diproses
+    rows = df_raw.fillna("").astype(str).values.tolist()
+
+    cache_kelas = {}
+    cache_angka = {}
+    current_item = None
+    mode = None # tenaga / bahan / alat
+
+    for row in rows:
+        # Bersihkan spasi & klasifikasi setiap sel (sekali per nilai unik)
+        row = [cell.strip() for cell in row]
+        kelas = []
+        for cell in row:
+            k = cache_kelas.get(cell)
+            if k is None:
+                k = cache_kelas[cell] = _klasifikasi_sel(cell)
+            kelas.append(k)
+        n = len(row)
+
+        # --- 1. DETEKSI JUDUL PEKERJAAN (kode di kolom 0-4, uraian di 4 kolom kanannya) ---
+        judul = None
+        for i in range(min(5, n)):
+            if not kelas[i] & _KODE:
+                continue
+            for j in range(i + 1, min(i + 5, n)):
+                if kelas[j] & _URAIAN:
+                    if not kelas[j] & _BUKAN_JUDUL:
+                        satuan = row[j + 1].lower() if j + 1 < n and kelas[j + 1] & _SAT_HEADER else "ls"
+                        judul = (row[i], row[j], satuan)
+                    break
+            if judul:
+                break
+
+        # --- 2. KLASIFIKASI BARIS ---
+        if judul:
+            kelas_baris = _BARIS_JUDUL
+        elif current_item is None:
+            continue
+        else:
+            row_text = " ".join(row).upper()
+            if "JUMLAH" in row_text: kelas_baris = _BARIS_DATA
+            elif "TENAGA" in row_text: kelas_baris = _BARIS_TENAGA
+            elif "BAHAN" in row_text: kelas_baris = _BARIS_BAHAN
+            elif "ALAT" in row_text or "PERALATAN" in row_text: kelas_baris = _BARIS_ALAT
+            else: kelas_baris = _BARIS_DATA
+
+        aksi = _TRANSISI.get((current_item is not None, kelas_baris))
+
+        # --- 3. JALANKAN AKSI ---
+        if aksi == 'buka_item':
+            # Simpan data lama
+            if current_item: data_list.append(export_item(current_item))
+            kode, uraian, satuan = judul
+            current_item = {
+                'kode': kode, 'uraian': uraian, 'satuan': satuan,
+                'tenaga': [], 'bahan': [], 'alat': []
+            }
+            mode = None # Reset mode
+        elif aksi in ('tenaga', 'bahan', 'alat'):
+            mode = aksi
+        elif aksi == 'ambil_koef' and mode:
+            # Pola: [Nama Item] ... [Angka Koefisien pertama > 0 di kanannya]
+            for i in range(n):
+                k = kelas[i]
+                if not k & _NAMA or k & _SAT_DATA: continue
+                if k & _STOP: break # Stop baris ini
+                for j in range(i + 1, n):
+                    if kelas[j] & _ANGKA:
+                        val = cache_angka.get(row[j])
+                        if val is None:
+                            val = cache_angka[row[j]] = clean_decimal(row[j])
+                        if val > 0:
+                            current_item[mode].append(f"{row[i]} {val}")
+                            break
+                break
+
+    # Simpan item terakhir
+    if current_item:
+        data_list.append(export_item(current_item))
+
+    return data_list
+
+
+def export_item(d):
+    return {
+        'kode': d['kode'],
+        'uraian': d['uraian'],
+        'satuan': d['satuan'],
+        'tenaga': ";".join(d['tenaga']) if d['tenaga'] else "-",
+        'bahan': ";".join(d['bahan']) if d['bahan'] else "-",
+        'alat': ";".join(d['alat']) if d['alat'] else "-"
+    }
+
+
+# ==========================================
+# 2. PIPELINE KONVERSI MASSAL (PARALEL)
+# ==========================================
+
+def baca_file_mentah(nama_file, isi):
+    """Membaca isi file CSV/Excel (bytes) menjadi DataFrame mentah tanpa header."""
+    if nama_file.endswith('.csv'):
+        # Gunakan engine python biar fleksibel sama delimiter
+        return pd.read_csv(BytesIO(isi), header=None, sep=None, engine='python')
+    return pd.read_excel(BytesIO(isi), header=None)
+
+
+def proses_satu_file(nama_file, isi):
+    """
+    Membaca lalu mem-parsing satu file. Dipanggil di proses worker.
+
+    Returns:
+        tuple: (hasil parse_content, pesan error atau None)
+    """
+    try:
+        return parse_content(baca_file_mentah(nama_file, isi), nama_file), None
+    except Exception as e:
+        return [], str(e)
+
+
+def konversi_massal(files, max_workers=None, callback=None):
+    """
+    Membaca dan mem-parsing banyak file AHSP secara paralel dengan process pool.
+
+    Hasil digabung sesuai urutan `files` (bukan urutan selesai), sehingga output
+    deterministik dan sama dengan pemrosesan berurutan.
+
+    Args:
+        files (list): List (nama_file, isi_bytes).
+        max_workers (int, optional): Jumlah proses worker. Default: jumlah CPU.
+        callback (callable, optional): Dipanggil callback(jumlah_selesai, total, nama_file, error)
+                                       setiap kali satu file selesai.
+
+    Returns:
+        tuple: (list item gabungan, dict {nama_file: pesan error})
+    """
+    total = len(files)
+    hasil = [None] * total
+    errors = {}
+
+    def _selesai(i, hasil_file, error, jumlah_selesai):
+        hasil[i] = hasil_file
+        if error:
+            errors[files[i][0]] = error
+        if callback:
+            callback(jumlah_selesai, total, files[i][0], error)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if total <= 1 or max_workers == 1:
+        for i, (nama_file, isi) in enumerate(files):
+            _selesai(i, *proses_satu_file(nama_file, isi), i + 1)
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, total)) as pool:
+            futures = {pool.submit(proses_satu_file, nama_file, isi): i for i, (nama_file, isi) in enumerate(files)}
+            for jumlah_selesai, future in enumerate(as_completed(futures), start=1):
+                _selesai(futures[future], *future.result(), jumlah_selesai)
+
+    return [item for hasil_file in hasil for item in hasil_file], errors
+
+
+# ==========================================
+# 3. KORPUS REGRESI SCANNER
+# ==========================================
+FOLDER_REGRESI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'regresi_converter')
+
+
+def cek_regresi(folder=FOLDER_REGRESI):
+    """
+    Menjalankan parse_content pada setiap file korpus regresi dan membandingkannya
+    dengan output yang dibekukan (<nama>.expected.json, dihasilkan scanner lama).
+    Sel koefisien output juga harus lolos round-trip urai -> kodekan koefisien_parser.
+
+    Returns:
+        dict: {nama_file: True/False} hasil perbandingan per file.
+    """
+    import json
+
+    from engine.koefisien_parser import kodekan_master_koefisien, urai_master_koefisien
+
+    hasil = {}
+    for nama_file in sorted(os.listdir(folder)):
+        if not nama_file.endswith(('.csv', '.xlsx')):
+            continue
+        path = os.path.join(folder, nama_file)
+        with open(path, 'rb') as f:
+            output = parse_content(baca_file_mentah(nama_file, f.read()), nama_file)
+        with open(os.path.splitext(path)[0] + '.expected.json', encoding='utf-8') as f:
+            sama = output == json.load(f)
+        if output:
+            df_output = pd.DataFrame(output)
+            kolom_ulang = kodekan_master_koefisien(urai_master_koefisien(df_output))
+            sama = sama and all(kolom_ulang[k] == df_output[k].tolist() for k in kolom_ulang)
+        hasil[nama_file] = sama
+    return hasil
+
+
+if __name__ == "__main__":
+    import sys
+
+    hasil_regresi = cek_regresi()
+    for nama_file, sama in hasil_regresi.items():
+        print(f"{'OK   ' if sama else 'BEDA '} {nama_file}")
+    sys.exit(0 if all(hasil_regresi.values()) else 1)
@@ -0,0 +1,346 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from engine.batch_engine import KATEGORI, MatriksKoefisien
+from engine.integritas_master import ALIAS_KOLOM, deduplikasi_master, ringkasan_laporan
+from engine.koefisien_parser import susun_matriks_dari_triplet, urai_master_json, urai_master_koefisien
+
+# ==========================================
+# 1. FORMAT STORE BINER
+# ==========================================
+# Satu store = satu folder berisi file .npy per kolom + meta.json.
+# - Kolom numerik CSR (indptr/indices/data/kategori) disimpan apa adanya.
+# - Kolom teks disimpan sebagai byte UTF-8 bersambung + offset (gaya Arrow),
+#   sehingga bisa di-memory-map dan diakses per baris tanpa parsing ulang.
+VERSI_FORMAT = 3  # v3: master CSV & XLSX dideduplikasi per (bidang, kode) sebelum dikompilasi
+NAMA_LAPORAN_KONFLIK = "konflik.csv"
+KOLOM_TEKS = ("kode", "uraian", "satuan", "bidang", "sumber_daya")
+KOLOM_CSR = ("indptr", "indices", "data", "kategori")
+
+
+class KolomTeks:
+    """Kolom string read-only di atas buffer byte UTF-8 + array offset (akses O(1) per baris)."""
+
+    __slots__ = ("_buffer", "_offset")
+
+    def __init__(self, buffer: np.ndarray, offset: np.ndarray):
+        self._buffer = buffer
+        self._offset = offset
+
+    @classmethod
+    def dari_list(cls, nilai):
+        encoded = [str(v).encode("utf-8") for v in nilai]
+        offset = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offset[1:])
+        buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(buffer, offset)
+
+    def __len__(self):
+        return len(self._offset) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return bytes(self._buffer[self._offset[i]:self._offset[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        data = bytes(self._buffer)
+        offset = self._offset.tolist()
+        for awal, akhir in zip(offset[:-1], offset[1:]):
+            yield data[awal:akhir].decode("utf-8")
+
+    def tolist(self):
+        return list(self)
+
+
+# ==========================================
+# 2. PEMBACAAN MASTER MENTAH (CSV / XLSX)
+# ==========================================
+KOLOM_WAJIB = ("kode", "uraian", "satuan", *KATEGORI)
+
+
+def baca_master_mentah(path_sumber):
+    """
+    Membaca master AHSP mentah dan menormalkan nama kolomnya.
+
+    Mendukung dua format yang ada di repo:
+    - CSV hasil converter (kode, uraian, satuan, tenaga, bahan, alat) dengan sel "Nama koef;..."
+    - XLSX db_ahsp_master (bidang, kode_ahsp, uraian_pekerjaan, satuan, tenaga, bahan, alat) dengan sel JSON
+
+    Returns:
+        pd.DataFrame: Kolom 'kode', 'uraian', 'satuan', 'bidang' dan kolom koefisien mentah (teks
+                      converter untuk CSV, JSON untuk XLSX; diurai oleh susun_matriks_master).
+
+    Raises:
+        ValueError: Jika kolom wajib (kode, uraian, satuan, tenaga, bahan, alat) tidak ada.
+    """
+    if str(path_sumber).lower().endswith(".csv"):
+        df = pd.read_csv(path_sumber, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(path_sumber, dtype=str)
+
+    df = df.rename(columns=ALIAS_KOLOM)
+    hilang = [kolom for kolom in KOLOM_WAJIB if kolom not in df.columns]
+    if hilang:
+        # Sebut juga nama kolom versi XLSX agar pesan cocok dengan file mana pun yang diunggah
+        nama_xlsx = {v: k for k, v in ALIAS_KOLOM.items()}
+        nama = [f"{k}/{nama_xlsx[k]}" if k in nama_xlsx else k for k in hilang]
+        raise ValueError(f"Kolom wajib tidak ada di master AHSP: {', '.join(nama)}")
+
+    if "bidang" not in df.columns:
+        df["bidang"] = ""
+    df["bidang"] = df["bidang"].fillna("").str.lower()
+    for kolom in ("kode", "uraian", "satuan"):
+        df[kolom] = df[kolom].fillna("")
+    return df
+
+
+def urai_koefisien_master(df, path_sumber):
+    """Triplet koefisien hasil baca_master_mentah: sel teks converter (CSV) atau JSON (XLSX)."""
+    if str(path_sumber).lower().endswith(".csv"):
+        return urai_master_koefisien(df)
+    return urai_master_json(df)
+
+
+def susun_matriks_master(df, path_sumber):
+    """
+    Menyusun MatriksKoefisien dari hasil baca_master_mentah.
+
+    Kedua format diurai sekaligus per kolom ke triplet lalu langsung ke CSR
+    (hasilnya identik dengan susun_matriks_koefisien atas kolom dict yang setara).
+    """
+    return susun_matriks_dari_triplet(df["kode"], urai_koefisien_master(df, path_sumber))
+
+
+def _sidik_file(path):
+    """Sidik jari file sumber (mtime, ukuran, sha256) untuk mendeteksi store basi."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for blok in iter(lambda: f.read(1 << 20), b""):
+            h.update(blok)
+    stat = os.stat(path)
+    return {"mtime_ns": stat.st_mtime_ns, "ukuran": stat.st_size, "sha256": h.hexdigest()}
+
+
+# ==========================================
+# 3. KOMPILASI & PEMUATAN STORE
+# ==========================================
+def kompilasi_master(path_sumber, path_store):
+    """
+    Mengompilasi master AHSP (CSV/XLSX) menjadi store biner kolumnar.
+
+    Master CSV maupun XLSX dideduplikasi dulu (integritas_master.deduplikasi_master), sehingga
+    store hanya berisi satu item per (bidang, kode); jumlah duplikat/konflik dicatat di
+    meta.json dan semua varian yang bertentangan di konflik.csv dalam folder store.
+
+    Store ditulis ke folder sementara di sebelah path_store lalu ditukar dengan os.replace:
+    file store lama tidak pernah ditimpa di tempat, jadi StoreAHSP lama yang masih
+    di-memory-map (dipakai sesi lain) tetap terbaca sampai dilepas.
+
+    Args:
+        path_sumber (str): Path master mentah.
+        path_store (str): Folder tujuan store (dibuat jika belum ada).
+
+    Returns:
+        dict: Isi meta.json store yang baru ditulis.
+    """
+    df = baca_master_mentah(path_sumber)
+    df, df_laporan = deduplikasi_master(df, urai_koefisien_master(df, path_sumber))
+    matriks = susun_matriks_master(df, path_sumber)
+
+    path_store = os.path.abspath(path_store)
+    folder_induk, nama_store = os.path.split(path_store)
+    os.makedirs(folder_induk, exist_ok=True)
+    path_baru = tempfile.mkdtemp(dir=folder_induk, prefix=f".{nama_store}.baru-")
+    try:
+        for nama in KOLOM_CSR:
+            np.save(os.path.join(path_baru, f"{nama}.npy"), getattr(matriks, nama))
+
+        kolom_teks = {
+            "kode": df["kode"], "uraian": df["uraian"], "satuan": df["satuan"],
+            "bidang": df["bidang"], "sumber_daya": matriks.sumber_daya,
+        }
+        for nama, nilai in kolom_teks.items():
+            kolom = KolomTeks.dari_list(nilai)
+            np.save(os.path.join(path_baru, f"{nama}.buf.npy"), kolom._buffer)
+            np.save(os.path.join(path_baru, f"{nama}.off.npy"), kolom._offset)
+
+        meta = {
+            "versi_format": VERSI_FORMAT,
+            "sumber": os.path.abspath(path_sumber),
+            "n_item": matriks.n_item,
+            "n_sumber_daya": len(matriks.sumber_daya),
+            **ringkasan_laporan(df_laporan),
+            **_sidik_file(path_sumber),
+        }
+        df_laporan.to_csv(os.path.join(path_baru, NAMA_LAPORAN_KONFLIK), index=False)
+        # meta.json ditulis terakhir: store tanpa meta dianggap belum selesai dikompilasi
+        with open(os.path.join(path_baru, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        _tukar_store(path_baru, path_store)
+    except BaseException:
+        shutil.rmtree(path_baru, ignore_errors=True)
+        raise
+    return meta
+
+
+def _tukar_store(path_baru, path_store):
+    """
+    Memasang folder store baru di path_store tanpa menyentuh isi store lama.
+
+    Folder lama dipindah ke nama sampah dulu (os.replace tidak bisa menimpa folder berisi),
+    lalu dihapus. Di Linux/macOS file yang masih di-memory-map tetap hidup sampai di-unmap;
+    di Windows penghapusan gagal selama masih dipakai, jadi sisa sampah dibersihkan
+    pada kompilasi berikutnya.
+    """
+    folder_induk, nama_store = os.path.split(path_store)
+    path_lama = None
+    if os.path.exists(path_store):
+        path_lama = tempfile.mkdtemp(dir=folder_induk, prefix=f".{nama_store}.lama-")
+        os.replace(path_store, os.path.join(path_lama, nama_store))
+    os.replace(path_baru, path_store)
+    for nama in os.listdir(folder_induk):
+        if nama.startswith(f".{nama_store}.lama-"):
+            shutil.rmtree(os.path.join(folder_induk, nama), ignore_errors=True)
+
+
+class StoreAHSP:
+    """
+    Master AHSP hasil kompilasi yang di-memory-map dari disk.
+
+    Attributes:
+        meta (dict): Isi meta.json.
+        matriks (MatriksKoefisien): Matriks koefisien (array CSR berupa memmap).
+        kode, uraian, satuan, bidang (KolomTeks): Kolom metadata item.
+    """
+
+    def __init__(self, path_store):
+        with open(os.path.join(path_store, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("versi_format") != VERSI_FORMAT:
+            raise ValueError(f"Versi format store {path_store} tidak didukung: {self.meta.get('versi_format')}")
+
+        def _muat(nama):
+            return np.load(os.path.join(path_store, f"{nama}.npy"), mmap_mode="r")
+
+        teks = {nama: KolomTeks(_muat(f"{nama}.buf"), _muat(f"{nama}.off")) for nama in KOLOM_TEKS}
+        self.kode = teks["kode"]
+        self.uraian = teks["uraian"]
+        self.satuan = teks["satuan"]
+        self.bidang = teks["bidang"]
+        self.matriks = MatriksKoefisien(
+            kode=self.kode,
+            sumber_daya=teks["sumber_daya"].tolist(),
+            **{nama: _muat(nama) for nama in KOLOM_CSR},
+        )
+        self._matriks_bidang = {}
+
+    def __len__(self):
+        return self.matriks.n_item
+
+    def baris_bidang(self, bidang):
+        """Nomor baris store milik satu bidang, urutan asli (sama dengan urutan to_dataframe(bidang))."""
+        return np.flatnonzero(np.asarray(self.bidang.tolist(), dtype=object) == bidang.lower())
+
+    def matriks_bidang(self, bidang=None):
+        """
+        MatriksKoefisien satu bidang (baris ke-i = baris ke-i to_dataframe(bidang)), dibuat sekali per bidang.
+
+        Kode AHSP hanya unik di dalam satu bidang, jadi lookup kode dan referensi sub-analisa
+        harus memakai matriks ini, bukan matriks gabungan. None = seluruh store.
+        """
+        if bidang is None:
+            return self.matriks
+        bidang = bidang.lower()
+        matriks = self._matriks_bidang.get(bidang)
+        if matriks is None:
+            matriks = self._matriks_bidang[bidang] = self.matriks.ambil_baris(self.baris_bidang(bidang))
+        return matriks
+
+    def koefisien(self, i):
+        """Mengembalikan (koef_tenaga, koef_bahan, koef_alat) item ke-i sebagai dict."""
+        m = self.matriks
+        hasil = ({}, {}, {})
+        awal, akhir = m.indptr[i], m.indptr[i + 1]
+        for id_sd, koef, kat in zip(m.indices[awal:akhir], m.data[awal:akhir], m.kategori[awal:akhir]):
+            hasil[kat][m.sumber_daya[id_sd]] = float(koef)
+        return hasil
+
+    def to_dataframe(self, bidang=None):
+        """DataFrame gaya load_ahsp_master_sda (kolom koefisien berupa dict), opsional difilter per bidang."""
+        baris = range(len(self))
+        if bidang is not None:
+            baris = [i for i, b in enumerate(self.bidang) if b == bidang.lower()]
+        rows = []
+        for i in baris:
+            tenaga, bahan, alat = self.koefisien(i)
+            rows.append({
+                "bidang": self.bidang[i], "kode_ahsp": self.kode[i],
+                "uraian_pekerjaan": self.uraian[i], "satuan": self.satuan[i],
+                "tenaga": tenaga, "bahan": bahan, "alat": alat,
+            })
+        return pd.DataFrame(rows, columns=["bidang", "kode_ahsp", "uraian_pekerjaan", "satuan", *KATEGORI])
+
+
+def path_store_default(path_sumber):
+    """
+    Lokasi store default: data/compiled/<nama file>_<ekstensi>.
+
+    Ekstensi ikut di nama folder agar x.csv dan x.xlsx tidak berbagi (dan saling menimpa) store.
+    """
+    folder, nama = os.path.split(os.path.abspath(path_sumber))
+    dasar, ext = os.path.splitext(nama)
+    return os.path.join(folder, "compiled", f"{dasar}_{ext.lstrip('.').lower()}" if ext else dasar)
+
+
+def store_masih_valid(path_sumber, path_store):
+    """True jika store ada dan dikompilasi dari isi file sumber yang sama."""
+    try:
+        with open(os.path.join(path_store, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    if meta.get("versi_format") != VERSI_FORMAT:
+        return False
+    stat = os.stat(path_sumber)
+    if (meta.get("mtime_ns"), meta.get("ukuran")) == (stat.st_mtime_ns, stat.st_size):
+        return True
+    # mtime berubah (misal checkout ulang) tapi isi bisa saja sama
+    return meta.get("sha256") == _sidik_file(path_sumber)["sha256"]
+
+
+def muat_master(path_sumber, path_store=None):
+    """
+    Memuat master AHSP lewat store biner, mengompilasi ulang hanya jika sumber berubah.
+
+    Args:
+        path_sumber (str): Path master mentah (CSV/XLSX).
+        path_store (str, optional): Folder store. Default: path_store_default(path_sumber).
+
+    Returns:
+        StoreAHSP: Store yang sudah di-memory-map.
+    """
+    path_store = path_store or path_store_default(path_sumber)
+    if not store_masih_valid(path_sumber, path_store):
+        kompilasi_master(path_sumber, path_store)
+    return StoreAHSP(path_store)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kompilasi master AHSP (CSV/XLSX) ke store biner.")
+    parser.add_argument("sumber", nargs="+", help="File master AHSP mentah")
+    parser.add_argument("-o", "--output", help="Folder store (hanya untuk satu file sumber)")
+    args = parser.parse_args()
+
+    for sumber in args.sumber:
+        tujuan = args.output if args.output and len(args.sumber) == 1 else path_store_default(sumber)
+        meta = kompilasi_master(sumber, tujuan)
+        print(f"{sumber} -> {tujuan} ({meta['n_item']} item, {meta['n_sumber_daya']} sumber daya)")
@@ -1,5 +1,13 @@
-import google.generativeai as genai
-import streamlit as st
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+
+# google.generativeai (beserta grpc/protobuf) butuh ~1 detik untuk diimpor; diimpor
+# saat pertanyaan pertama saja agar halaman lain dan engine headless tidak ikut menanggungnya.
 
 # ==========================================
 # 1. DEFINISI PERSONA
@@ -18,22 +26,19 @@ PERSONAS = {
     """
 }
 
-# ==========================================
-# 2. FUNGSI PEMANGGIL AI
-# ==========================================
-def tanya_ahli(api_key, tipe_ahli, pertanyaan, model_name="gemini-2.0-flash"):
-    if not api_key:
-        return "⚠️ Mohon masukkan Google Gemini API Key terlebih dahulu."
+# Model yang bisa dipilih di halaman Konsultan AI (label -> kode teknis); urutannya
+# juga urutan fallback penjadwal saat model yang dipilih kena limit.
+PILIHAN_MODEL = {
+    "⚡ Gemini 2.0 Flash (Cepat)": "gemini-2.0-flash",
+    "🚀 Gemini 1.5 Flash (Stabil)": "gemini-1.5-flash",
+    "🧠 Gemini 1.5 Pro (Pintar)": "gemini-1.5-pro",
+    "🛡️ Gemini Pro (Legacy)": "gemini-pro"
+}
 
-    try:
-        genai.configure(api_key=api_key)
-        
-        # Gunakan model sesuai pilihan user
-        model = genai.GenerativeModel(model_name)
-        
-        peran = PERSONAS.get(tipe_ahli, "Anda adalah asisten konstruksi.")
-        
-        full_prompt = f"""
+
+def susun_prompt(tipe_ahli, pertanyaan):
+    peran = PERSONAS.get(tipe_ahli, "Anda adalah asisten konstruksi.")
+    return f"""
         PERAN SYSTEM:
         {peran}
 
@@ -43,16 +48,305 @@ def tanya_ahli(api_key, tipe_ahli, pertanyaan, model_name="gemini-2.0-flash"):
         INSTRUKSI:
         Jawablah dalam Bahasa Indonesia yang profesional. Gunakan Markdown.
         """
-        
-        response = model.generate_content(full_prompt)
-        return response.text
-        
+
+
+# ==========================================
+# 2. BACKEND MODEL
+# ==========================================
+# Backend = callable (model_name, prompt) -> teks jawaban, opsional dengan method
+# stream(model_name, prompt) -> generator potongan teks. Error dilempar apa adanya;
+# pemetaan 429/404 ke pesan user dilakukan di tanya_ahli / tanya_ahli_stream.
+class BackendGemini:
+    """
+    Backend Google Gemini untuk satu API key.
+
+    genai.configure hanya dipanggil bila key yang aktif di proses berbeda (konfigurasi
+    genai bersifat global per proses), dan GenerativeModel dibuat sekali per nama model.
+    """
+
+    _lock = threading.Lock()
+    _kunci_aktif = None
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self._model = {}
+
+    def _model_untuk(self, model_name):
+        import google.generativeai as genai
+
+        with BackendGemini._lock:
+            if BackendGemini._kunci_aktif != self.api_key:
+                genai.configure(api_key=self.api_key)
+                BackendGemini._kunci_aktif = self.api_key
+                self._model.clear()
+            model = self._model.get(model_name)
+            if model is None:
+                model = self._model[model_name] = genai.GenerativeModel(model_name)
+            return model
+
+    def __call__(self, model_name, prompt):
+        return self._model_untuk(model_name).generate_content(prompt).text
+
+    def stream(self, model_name, prompt):
+        for potongan in self._model_untuk(model_name).generate_content(prompt, stream=True):
+            try:
+                teks = potongan.text
+            except ValueError:
+                continue  # potongan tanpa teks (misal hanya finish_reason)
+            if teks:
+                yield teks
+
+
+class BackendLokal:
+    """
+    Backend palsu tanpa jaringan untuk uji coba/offline.
+
+    Args:
+        jawaban (str | callable, optional): Teks tetap, atau fungsi (model_name, prompt) -> teks.
+            Default: mengembalikan ringkasan prompt.
+        jeda (float): Detik tunggu per panggilan (simulasi latensi / waktu ke token pertama).
+        jeda_potongan (float): Detik tunggu antar potongan pada stream().
+        error (dict, optional): {model_name: list pesan error} yang dilempar berurutan pada
+            panggilan berikutnya ke model itu (misal ["429 Resource exhausted"] * 2), lalu sukses.
+            Pesan None = model selalu gagal dengan "404 model not found".
+    """
+
+    def __init__(self, jawaban=None, jeda=0.0, error=None, jeda_potongan=0.0):
+        self.jawaban = jawaban
+        self.jeda = jeda
+        self.jeda_potongan = jeda_potongan
+        self._error = {m: (None if e is None else deque(e)) for m, e in (error or {}).items()}
+        self._lock = threading.Lock()
+        self.jumlah_panggilan = 0
+        self.panggilan_per_model = Counter()
+
+    def __call__(self, model_name, prompt):
+        with self._lock:
+            self.jumlah_panggilan += 1
+            self.panggilan_per_model[model_name] += 1
+            if model_name in self._error:
+                antrean = self._error[model_name]
+                if antrean is None:
+                    raise RuntimeError(f"404 models/{model_name} is not found")
+                if antrean:
+                    raise RuntimeError(antrean.popleft())
+        if self.jeda:
+            time.sleep(self.jeda)
+        if callable(self.jawaban):
+            return self.jawaban(model_name, prompt)
+        if self.jawaban is not None:
+            return self.jawaban
+        return f"[{model_name}] {' '.join(prompt.split())[:200]}"
+
+    def stream(self, model_name, prompt):
+        """Jawaban yang sama dengan __call__, dipotong per kata."""
+        for i, potongan in enumerate(re.findall(r"\s*\S+", self(model_name, prompt))):
+            if i and self.jeda_potongan:
+                time.sleep(self.jeda_potongan)
+            yield potongan
+
+
+_BACKEND_GEMINI = {}
+
+
+def backend_gemini(api_key):
+    """BackendGemini bersama per API key (dipakai ulang antar pertanyaan dan rerun)."""
+    backend = _BACKEND_GEMINI.get(api_key)
+    if backend is None:
+        backend = _BACKEND_GEMINI.setdefault(api_key, BackendGemini(api_key))
+    return backend
+
+
+# ==========================================
+# 3. CACHE JAWABAN
+# ==========================================
+def normalisasi_pertanyaan(pertanyaan):
+    """Casefold + spasi dirapatkan, agar "Berapa  PPN?" dan "berapa ppn?" berbagi jawaban."""
+    return " ".join(str(pertanyaan).casefold().split())
+
+
+class CacheJawaban:
+    """
+    Cache jawaban AI ber-kunci (persona, model_name, pertanyaan ternormalisasi).
+
+    LRU dengan batas jumlah item, TTL per entri, dan opsional disimpan ke file JSON
+    (ditulis atomik setiap ada entri baru) agar bertahan antar restart. Aman dipakai
+    bersama oleh banyak sesi Streamlit (thread) dalam satu proses.
+
+    Args:
+        maks_item (int): Jumlah entri maksimum; entri paling lama tak dipakai dibuang lebih dulu.
+        ttl_detik (float): Umur maksimum entri.
+        path (str, optional): File JSON persistensi. None = hanya di memori.
+    """
+
+    def __init__(self, maks_item=256, ttl_detik=24 * 3600, path=None):
+        self.maks_item = maks_item
+        self.ttl_detik = ttl_detik
+        self.path = path
+        self._data = OrderedDict()   # kunci -> (waktu simpan epoch, jawaban)
+        self._lock = threading.Lock()
+        self.hit = self.miss = self.kedaluwarsa = self.dibuang = 0
+        if path and os.path.exists(path):
+            self._muat()
+
+    @staticmethod
+    def kunci(persona, model_name, pertanyaan):
+        return (str(persona), str(model_name), normalisasi_pertanyaan(pertanyaan))
+
+    def __len__(self):
+        return len(self._data)
+
+    def ambil(self, kunci):
+        """Jawaban tersimpan (dan tandai baru dipakai), atau None jika tidak ada/kedaluwarsa."""
+        with self._lock:
+            entri = self._data.get(kunci)
+            if entri is not None and time.time() - entri[0] > self.ttl_detik:
+                del self._data[kunci]
+                self.kedaluwarsa += 1
+                entri = None
+            if entri is None:
+                self.miss += 1
+                return None
+            self._data.move_to_end(kunci)
+            self.hit += 1
+            return entri[1]
+
+    def simpan(self, kunci, jawaban):
+        with self._lock:
+            self._data[kunci] = (time.time(), jawaban)
+            self._data.move_to_end(kunci)
+            while len(self._data) > self.maks_item:
+                self._data.popitem(last=False)
+                self.dibuang += 1
+            if self.path:
+                self._tulis()
+
+    def kosongkan(self):
+        with self._lock:
+            self._data.clear()
+            if self.path:
+                self._tulis()
+
+    def statistik(self):
+        total = self.hit + self.miss
+        return {
+            "hit": self.hit, "miss": self.miss, "rasio_hit": self.hit / total if total else 0.0,
+            "kedaluwarsa": self.kedaluwarsa, "dibuang": self.dibuang, "jumlah": len(self._data),
+        }
+
+    def _muat(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entri = json.load(f)
+        except (OSError, ValueError):
+            return  # file rusak/tak terbaca: mulai dengan cache kosong
+        batas = time.time() - self.ttl_detik
+        for persona, model_name, pertanyaan, waktu, jawaban in entri[-self.maks_item:]:
+            if waktu >= batas:
+                self._data[(persona, model_name, pertanyaan)] = (waktu, jawaban)
+
+    def _tulis(self):
+        # Tulis ke file sementara lalu os.replace: pembaca tidak pernah melihat file setengah jadi
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        fd, path_sementara = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump([[*k, waktu, jawaban] for k, (waktu, jawaban) in self._data.items()], f, ensure_ascii=False)
+        os.replace(path_sementara, self.path)
+
+
+# Cache bersama semua sesi di proses ini
+CACHE_JAWABAN = CacheJawaban()
+
+
+# ==========================================
+# 4. FUNGSI PEMANGGIL AI
+# ==========================================
+def pesan_error(error, model_name):
+    """Memetakan exception backend ke pesan Markdown untuk user."""
+    error_msg = str(error)
+    if "429" in error_msg:
+        return f"🚨 **KUOTA HABIS:** Model `{model_name}` sedang limit. Silakan ganti model lain di Sidebar."
+    elif "404" in error_msg:
+        return f"🚨 **MODEL TIDAK DITEMUKAN:** Model `{model_name}` tidak support. Pilih 'Gemini Pro' di Sidebar."
+    else:
+        return f"🚨 **Terjadi Kesalahan:** {error_msg}"
+
+
+def tanya_ahli(api_key, tipe_ahli, pertanyaan, model_name="gemini-2.0-flash", backend=None, cache=CACHE_JAWABAN):
+    """
+    Mengirim pertanyaan ke persona ahli, memakai cache jawaban bila ada.
+
+    Args:
+        api_key (str): Google Gemini API key (boleh kosong jika backend diberikan).
+        tipe_ahli (str): Kunci PERSONAS.
+        pertanyaan (str): Pertanyaan user.
+        model_name (str): Nama model Gemini.
+        backend (callable, optional): (model_name, prompt) -> teks. Default: BackendGemini(api_key).
+        cache (CacheJawaban, optional): None untuk mematikan cache. Hanya jawaban sukses yang disimpan.
+
+    Returns:
+        str: Jawaban Markdown, atau pesan error yang ramah user.
+    """
+    if backend is None and not api_key:
+        return "⚠️ Mohon masukkan Google Gemini API Key terlebih dahulu."
+
+    kunci = CacheJawaban.kunci(tipe_ahli, model_name, pertanyaan)
+    if cache is not None:
+        jawaban = cache.ambil(kunci)
+        if jawaban is not None:
+            return jawaban
+
+    try:
+        jawaban = (backend or backend_gemini(api_key))(model_name, susun_prompt(tipe_ahli, pertanyaan))
     except Exception as e:
-        error_msg = str(e)
         # Handle Error dengan Rapi
-        if "429" in error_msg:
-            return f"🚨 **KUOTA HABIS:** Model `{model_name}` sedang limit. Silakan ganti model lain di Sidebar."
-        elif "404" in error_msg:
-            return f"🚨 **MODEL TIDAK DITEMUKAN:** Model `{model_name}` tidak support. Pilih 'Gemini Pro' di Sidebar."
-        else:
-            return f"🚨 **Terjadi Kesalahan:** {error_msg}"
+        return pesan_error(e, model_name)
+
+    if cache is not None:
+        cache.simpan(kunci, jawaban)
+    return jawaban
+
+
+def stream_jawaban(backend, model_name, prompt):
+    """Potongan jawaban dari backend; backend tanpa stream() menghasilkan satu potongan utuh."""
+    stream = getattr(backend, "stream", None)
+    if stream is None:
+        yield backend(model_name, prompt)
+    else:
+        yield from stream(model_name, prompt)
+
+
+def tanya_ahli_stream(api_key, tipe_ahli, pertanyaan, model_name="gemini-2.0-flash", backend=None, cache=CACHE_JAWABAN):
+    """
+    Seperti tanya_ahli, tetapi menghasilkan potongan teks begitu tiba (untuk st.write_stream).
+
+    Error sebelum potongan pertama menghasilkan pesan error yang sama dengan tanya_ahli;
+    error di tengah jawaban ditambahkan sebagai paragraf terakhir. Jawaban hanya disimpan
+    ke cache bila stream selesai tanpa error.
+
+    Yields:
+        str: Potongan jawaban Markdown.
+    """
+    if backend is None and not api_key:
+        yield "⚠️ Mohon masukkan Google Gemini API Key terlebih dahulu."
+        return
+
+    kunci = CacheJawaban.kunci(tipe_ahli, model_name, pertanyaan)
+    if cache is not None:
+        jawaban = cache.ambil(kunci)
+        if jawaban is not None:
+            yield jawaban
+            return
+
+    potongan_jawaban = []
+    try:
+        for potongan in stream_jawaban(backend or backend_gemini(api_key), model_name, susun_prompt(tipe_ahli, pertanyaan)):
+            potongan_jawaban.append(potongan)
+            yield potongan
+    except Exception as e:
+        yield ("\n\n" if potongan_jawaban else "") + pesan_error(e, model_name)
+        return
+
+    if cache is not None:
+        cache.simpan(kunci, "".join(potongan_jawaban))
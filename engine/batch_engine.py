@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+
+# ==========================================
+# 1. STRUKTUR MATRIKS KOEFISIEN (CSR)
+# ==========================================
+KATEGORI = ("tenaga", "bahan", "alat")
+
+# Urutan kolom hasil sama persis dengan kunci "biaya" di hitung_rab_lengkap
+KOLOM_BIAYA = (
+    "hsp_tenaga", "hsp_bahan", "hsp_alat", "hsp_sub_langsung",
+    "hsp_overhead", "hsp_tanpa_ppn", "hsp_ppn", "hsp_dengan_ppn",
+    "total_tenaga_item", "total_bahan_item", "total_alat_item",
+    "total_sub_langsung_item", "total_overhead_item", "total_tanpa_ppn_item",
+    "total_ppn_item", "total_dengan_ppn_item",
+)
+
+# Nama kolom keranjang RAB di halaman (dan yang dibaca export_to_excel)
+NAMA_KOLOM_RAB = {
+    "hsp_tenaga": "HSP Tenaga",
+    "hsp_bahan": "HSP Bahan",
+    "hsp_alat": "HSP Alat",
+    "hsp_sub_langsung": "HSP Sub Total Langsung",
+    "hsp_overhead": "HSP OHP",
+    "hsp_tanpa_ppn": "HSP Tanpa PPN",
+    "total_tenaga_item": "Total Tenaga",
+    "total_bahan_item": "Total Bahan",
+    "total_alat_item": "Total Alat",
+    "total_sub_langsung_item": "Total Sub Total Langsung",
+    "total_overhead_item": "Total OHP",
+    "total_tanpa_ppn_item": "Total Tanpa PPN",
+    "total_ppn_item": "Total PPN",
+    "total_dengan_ppn_item": "Total Dengan PPN",
+}
+
+
+@dataclass(slots=True)
+class MatriksKoefisien:
+    """
+    Matriks koefisien AHSP dalam format CSR (Compressed Sparse Row).
+
+    Setiap baris adalah satu kode AHSP, setiap kolom adalah satu sumber daya
+    (nama tenaga/bahan/alat yang sudah di-intern menjadi id integer).
+    Entri baris i berada di rentang indptr[i]:indptr[i+1] dengan urutan
+    tenaga -> bahan -> alat, sama seperti urutan loop di hitung_rab_lengkap.
+
+    Attributes:
+        kode (list): Kode AHSP per baris.
+        sumber_daya (list): Nama sumber daya, posisi = id sumber daya.
+        indptr (np.ndarray): Penunjuk awal entri tiap baris (panjang n_item + 1).
+        indices (np.ndarray): Id sumber daya per entri.
+        data (np.ndarray): Koefisien per entri.
+        kategori (np.ndarray): Id kategori per entri (0=tenaga, 1=bahan, 2=alat).
+    """
+    kode: list
+    sumber_daya: list
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+    kategori: np.ndarray
+    _posisi_kode: dict = field(default=None, repr=False)
+
+    @property
+    def n_item(self):
+        return len(self.indptr) - 1
+
+    def posisi(self, kode_ahsp):
+        """
+        Mengembalikan array nomor baris untuk daftar kode AHSP.
+
+        Raises:
+            KeyError: Jika ada kode yang tidak ada di master.
+            ValueError: Jika kode di master tidak unik (misal master multi-bidang yang belum
+                        dipilah per bidang); kode ganda tidak pernah diam-diam dipetakan ke baris terakhir.
+        """
+        if self._posisi_kode is None:
+            posisi_kode = {k: i for i, k in enumerate(self.kode)}
+            if len(posisi_kode) != len(self.kode):
+                raise ValueError(f"Kode AHSP ganda di master: {', '.join(self.kode_ganda()[:10])}")
+            self._posisi_kode = posisi_kode
+        try:
+            return np.fromiter((self._posisi_kode[k] for k in kode_ahsp), dtype=np.int64)
+        except KeyError as e:
+            raise KeyError(f"Kode AHSP {e.args[0]!r} tidak ada di master.") from None
+
+    def kode_ganda(self):
+        """Kode AHSP yang muncul lebih dari sekali (urut abjad); kosong jika semua kode unik."""
+        kode, jumlah = np.unique(np.asarray([str(k) for k in self.kode], dtype=object), return_counts=True)
+        return kode[jumlah > 1].tolist()
+
+    def ambil_baris(self, baris):
+        """
+        MatriksKoefisien yang hanya berisi baris terpilih (misal satu bidang dari master gabungan).
+
+        Daftar sumber daya tidak dipangkas, jadi id sumber daya tetap sama dengan matriks asal.
+        """
+        baris = np.asarray(baris, dtype=np.int64)
+        _, entri = entri_per_baris(self, baris)
+        return MatriksKoefisien(
+            kode=[self.kode[i] for i in baris.tolist()],
+            sumber_daya=self.sumber_daya,
+            indptr=np.concatenate(([0], np.cumsum(np.diff(self.indptr)[baris]))).astype(np.int64),
+            indices=np.asarray(self.indices[entri]),
+            data=np.asarray(self.data[entri]),
+            kategori=np.asarray(self.kategori[entri]),
+        )
+
+    def vektor_harga(self, harga: dict):
+        """Menyusun vektor harga sesuai urutan id sumber daya (harga tidak ditemukan = 0)."""
+        return np.array([float(harga.get(nama, 0)) for nama in self.sumber_daya], dtype=np.float64)
+
+
+def susun_matriks_koefisien(df_master: pd.DataFrame, kolom_kode: str = "kode_ahsp"):
+    """
+    Menyusun MatriksKoefisien dari DataFrame master AHSP.
+
+    Args:
+        df_master (pd.DataFrame): Master AHSP dengan kolom kode, 'tenaga', 'bahan', 'alat'.
+                                  Kolom koefisien berisi dict {nama: koef} seperti hasil
+                                  load_ahsp_master_sda atau get_default_ck.
+        kolom_kode (str): Nama kolom kode AHSP ('kode_ahsp' untuk SDA, 'kode' untuk CK/BM).
+
+    Returns:
+        MatriksKoefisien: Matriks koefisien siap dipakai hitung_rab_batch.
+    """
+    id_sumber_daya = {}
+    indptr = [0]
+    indices = []
+    data = []
+    kategori = []
+
+    kolom = [df_master[k] if k in df_master.columns else [{}] * len(df_master) for k in KATEGORI]
+    for koef_tenaga, koef_bahan, koef_alat in zip(*kolom):
+        for id_kat, koef_dict in enumerate((koef_tenaga, koef_bahan, koef_alat)):
+            if not isinstance(koef_dict, dict):
+                continue
+            for nama, koef in koef_dict.items():
+                indices.append(id_sumber_daya.setdefault(nama, len(id_sumber_daya)))
+                data.append(float(koef))
+                kategori.append(id_kat)
+        indptr.append(len(data))
+
+    return MatriksKoefisien(
+        kode=list(df_master[kolom_kode]),
+        sumber_daya=list(id_sumber_daya),
+        indptr=np.asarray(indptr, dtype=np.int64),
+        indices=np.asarray(indices, dtype=np.int32),
+        data=np.asarray(data, dtype=np.float64),
+        kategori=np.asarray(kategori, dtype=np.int8),
+    )
+
+
+def entri_per_baris(matriks: MatriksKoefisien, baris):
+    """
+    Menjabarkan baris BOQ ke entri CSR item master-nya tanpa loop Python.
+
+    Args:
+        baris (np.ndarray): Posisi item master per baris BOQ (hasil matriks.posisi).
+
+    Returns:
+        tuple: (baris BOQ per entri, posisi entri master per entri), berurutan per baris BOQ
+               lalu urutan entri di master.
+    """
+    panjang = np.diff(matriks.indptr)[baris]
+    awal_keluaran = np.cumsum(panjang) - panjang
+    baris_entri = np.repeat(np.arange(len(baris), dtype=np.int64), panjang)
+    entri = np.arange(int(panjang.sum()), dtype=np.int64) + np.repeat(matriks.indptr[baris] - awal_keluaran, panjang)
+    return baris_entri, entri
+
+
+# ==========================================
+# 2. HITUNG RAB SEKALIGUS (VEKTORISASI)
+# ==========================================
+def hsp_per_kategori(matriks: MatriksKoefisien, vektor_harga: np.ndarray):
+    """
+    Menghitung HSP tenaga/bahan/alat untuk setiap baris master sekaligus.
+
+    Perkalian matriks-vektor dilakukan dengan np.bincount yang menjumlah entri
+    secara berurutan, sehingga hasilnya identik bit-per-bit dengan loop
+    di hitung_rab_lengkap.
+
+    Returns:
+        np.ndarray: Array (n_item, 3) berisi HSP tenaga, bahan, alat.
+    """
+    n_item = matriks.n_item
+    baris_entri = np.repeat(np.arange(n_item, dtype=np.int64), np.diff(matriks.indptr))
+    biaya_entri = matriks.data * vektor_harga[matriks.indices]
+    hsp = np.bincount(baris_entri * 3 + matriks.kategori, weights=biaya_entri, minlength=n_item * 3)
+    return hsp.reshape(n_item, 3)
+
+
+def rincian_biaya(hsp, volume, persen_overhead, persen_ppn):
+    """
+    Menurunkan seluruh kolom biaya dari HSP tenaga/bahan/alat per baris.
+
+    Rumusnya sama dengan hitung_rab_lengkap. persen_overhead/persen_ppn boleh
+    berupa skalar atau array per baris.
+
+    Args:
+        hsp (np.ndarray): Array (n, 3) HSP tenaga, bahan, alat.
+        volume (np.ndarray): Volume per baris.
+
+    Returns:
+        np.ndarray: Array (n, 16) dengan urutan kolom KOLOM_BIAYA.
+    """
+    hsp_tenaga, hsp_bahan, hsp_alat = hsp[:, 0], hsp[:, 1], hsp[:, 2]
+
+    jumlah_biaya_dasar = hsp_tenaga + hsp_bahan + hsp_alat
+    nilai_overhead = jumlah_biaya_dasar * (np.asarray(persen_overhead) / 100)
+    hsp_tanpa_ppn = jumlah_biaya_dasar + nilai_overhead
+    nilai_ppn = hsp_tanpa_ppn * (np.asarray(persen_ppn) / 100)
+    hsp_dengan_ppn = hsp_tanpa_ppn + nilai_ppn
+
+    kolom_hsp = (
+        hsp_tenaga, hsp_bahan, hsp_alat, jumlah_biaya_dasar,
+        nilai_overhead, hsp_tanpa_ppn, nilai_ppn, hsp_dengan_ppn,
+    )
+    return np.column_stack(kolom_hsp + tuple(h * volume for h in kolom_hsp))
+
+
+def hitung_rab_batch(
+    kode_ahsp,
+    volume,
+    matriks: MatriksKoefisien,
+    harga: dict,
+    persen_overhead: float = 15.0,
+    persen_ppn: float = 11.0
+):
+    """
+    Menghitung HSP dan total RAB untuk seluruh baris BOQ dalam satu kali jalan.
+
+    Hasilnya sama persis dengan memanggil hitung_rab_lengkap per baris
+    dengan harga_tenaga/bahan/alat yang diambil dari dict `harga` yang sama.
+
+    Args:
+        kode_ahsp (list-like): Kode AHSP tiap baris BOQ.
+        volume (list-like): Volume tiap baris BOQ.
+        matriks (MatriksKoefisien): Hasil susun_matriks_koefisien dari master AHSP.
+        harga (dict): Harga dasar {nama sumber daya: harga satuan}.
+        persen_overhead (float): Persentase overhead dan profit.
+        persen_ppn (float): Persentase PPN.
+
+    Returns:
+        pd.DataFrame: Satu baris per baris BOQ, kolom 'kode_ahsp', 'volume'
+                      lalu seluruh kolom KOLOM_BIAYA.
+    """
+    baris = matriks.posisi(kode_ahsp)
+    volume = np.asarray(volume, dtype=np.float64)
+    if len(volume) != len(baris):
+        raise ValueError("Panjang kode_ahsp dan volume harus sama.")
+
+    # HSP cukup dihitung sekali per kode master, lalu di-gather per baris BOQ
+    hsp = hsp_per_kategori(matriks, matriks.vektor_harga(harga))[baris]
+    rincian = rincian_biaya(hsp, volume, persen_overhead, persen_ppn)
+
+    hasil = {"kode_ahsp": list(kode_ahsp), "volume": volume}
+    hasil.update(zip(KOLOM_BIAYA, rincian.T))
+    return pd.DataFrame(hasil)
@@ -0,0 +1,198 @@
+"""
+Perhitungan RAB tanpa Streamlit (untuk batch/cron).
+
+Contoh:
+    python -m engine.headless boq_proyek_a.xlsx boq_proyek_b.csv \
+        --master data/ahsp_sda_master.csv --harga harga_jatim.xlsx \
+        --overhead 15 --ppn 11 --output-dir hasil/
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine import ahsp_store, sda_engine
+from engine.ahsp_bertingkat import analisa_bertingkat
+from engine.batch_engine import NAMA_KOLOM_RAB, hitung_rab_batch
+from engine.pencocok_harga import AMBIGU, TIDAK_DITEMUKAN, PencocokHarga
+from engine.uang_tetap import hitung_rab_batch_sen, ke_rupiah
+
+FORMAT_OUTPUT = ("xlsx", "csv", "parquet")
+PRESISI = ("float", "sen")
+
+
+# ==========================================
+# 1. BACA INPUT
+# ==========================================
+def baca_tabel(path):
+    """Membaca tabel CSV/XLSX/Parquet menjadi DataFrame."""
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext == ".csv":
+        return pd.read_csv(path)
+    if ext in (".xlsx", ".xls"):
+        return pd.read_excel(path)
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    raise ValueError(f"Format file tidak didukung: {path} (gunakan CSV/XLSX/Parquet)")
+
+
+def baca_boq(path, kolom_lain=()):
+    """
+    Membaca BOQ. Kolom wajib: 'kode_ahsp' (atau 'kode') dan 'volume'.
+
+    Args:
+        kolom_lain (list-like): Kolom tambahan yang ikut dibawa apa adanya (nama huruf kecil),
+                                misal kolom periode untuk rekap_sumber_daya.
+
+    Returns:
+        pd.DataFrame: Kolom 'kode_ahsp' (str), 'volume' (float) dan kolom_lain.
+    """
+    df = baca_tabel(path).rename(columns=str.lower).rename(columns={"kode": "kode_ahsp"})
+    kolom_kurang = {"kode_ahsp", "volume", *kolom_lain} - set(df.columns)
+    if kolom_kurang:
+        raise ValueError(f"BOQ {path} tidak memiliki kolom: {', '.join(sorted(kolom_kurang))}")
+    df = df.dropna(subset=["kode_ahsp"])
+    return pd.DataFrame({
+        "kode_ahsp": df["kode_ahsp"].astype(str).str.strip(),
+        "volume": pd.to_numeric(df["volume"], errors="coerce").fillna(0.0),
+        **{kolom: df[kolom] for kolom in kolom_lain},
+    })
+
+
+def baca_harga(path):
+    """Membaca daftar harga dasar dengan kolom 'nama_item' dan 'harga_satuan' (sama seperti upload di halaman SDA)."""
+    df = baca_tabel(path)
+    if "nama_item" not in df.columns or "harga_satuan" not in df.columns:
+        raise ValueError(f"File harga {path} harus memiliki kolom 'nama_item' dan 'harga_satuan'.")
+    return dict(zip(df["nama_item"], df["harga_satuan"]))
+
+
+# ==========================================
+# 2. HITUNG RAB
+# ==========================================
+def hitung_rab_proyek(df_boq, store, harga, persen_overhead=15.0, persen_ppn=11.0, presisi="float", bidang=None):
+    """
+    Menghitung RAB satu proyek dengan jalur batch (vektorisasi).
+
+    Args:
+        df_boq (pd.DataFrame): Hasil baca_boq.
+        store (ahsp_store.StoreAHSP): Master AHSP terkompilasi.
+        harga (dict): Harga dasar {nama item: harga satuan}.
+        persen_overhead (float): Persentase overhead dan profit.
+        persen_ppn (float): Persentase PPN.
+        presisi (str): "float" (sama dengan halaman) atau "sen" (int64 titik-tetap dengan
+                       aturan pembulatan engine.uang_tetap; total selalu = jumlah per baris).
+        bidang (str, optional): Bidang master yang dipakai (misal 'sda'); wajib untuk master
+                                multi-bidang yang kodenya dipakai di lebih dari satu bidang.
+
+    Returns:
+        tuple: (DataFrame RAB dengan kolom sama seperti keranjang halaman SDA,
+                dict {nama sumber daya: HasilCocok} untuk sumber daya yang dipakai)
+    """
+    matriks = store.matriks_bidang(bidang)
+    analisa = analisa_bertingkat(matriks)
+    pencocok = PencocokHarga(harga)
+    cocok = pencocok.cocokkan(analisa.sumber_daya_dasar())
+    harga_sumber_daya = {nama: hasil.harga for nama, hasil in cocok.items()}
+
+    if presisi == "sen":
+        df_hasil = hitung_rab_batch_sen(
+            df_boq["kode_ahsp"], df_boq["volume"], analisa.matriks_datar(), harga_sumber_daya,
+            persen_overhead=persen_overhead, persen_ppn=persen_ppn
+        )
+    elif analisa.ada_referensi:
+        # Master berisi sub-analisa: HSP bertingkat, di-memo per daftar harga (dipakai ulang antar BOQ)
+        df_hasil = analisa.hitung_rab_batch(
+            df_boq["kode_ahsp"], df_boq["volume"], harga_sumber_daya,
+            persen_overhead=persen_overhead, persen_ppn=persen_ppn
+        )
+    else:
+        df_hasil = hitung_rab_batch(
+            df_boq["kode_ahsp"], df_boq["volume"], matriks, harga_sumber_daya,
+            persen_overhead=persen_overhead, persen_ppn=persen_ppn
+        )
+
+    baris = matriks.posisi(df_boq["kode_ahsp"])
+    baris_store = baris if bidang is None else store.baris_bidang(bidang)[baris]
+    df_rab = pd.DataFrame({
+        "kode_ahsp": df_hasil["kode_ahsp"],
+        "Uraian Pekerjaan": np.asarray(store.uraian.tolist(), dtype=object)[baris_store],
+        "Satuan": np.asarray(store.satuan.tolist(), dtype=object)[baris_store],
+        "Volume": df_hasil["volume"],
+    })
+    for kolom, nama_kolom in NAMA_KOLOM_RAB.items():
+        df_rab[nama_kolom] = ke_rupiah(df_hasil[kolom]) if presisi == "sen" else df_hasil[kolom]
+    df_rab.insert(df_rab.columns.get_loc("Total PPN"), "PPN (%)", persen_ppn)
+
+    # Hanya laporkan sumber daya (dasar, termasuk milik sub-analisa) yang benar-benar dipakai BOQ ini
+    datar = analisa.matriks_datar()
+    item_dipakai = np.zeros(datar.n_item, dtype=bool)
+    item_dipakai[baris] = True
+    entri_dipakai = np.repeat(item_dipakai, np.diff(datar.indptr))
+    dipakai = [datar.sumber_daya[i] for i in np.unique(datar.indices[entri_dipakai])]
+    return df_rab, {nama: cocok[nama] for nama in dipakai}
+
+
+def tulis_rab(df_rab, path_output, nama_proyek="RAB Proyek"):
+    """Menulis RAB ke XLSX (laporan streaming), CSV, atau Parquet sesuai ekstensi path_output."""
+    ext = os.path.splitext(path_output)[1].lower().lstrip(".")
+    if ext == "xlsx":
+        sda_engine.export_to_excel_stream(df_rab, nama_proyek=nama_proyek, path_tujuan=path_output)
+    elif ext == "csv":
+        df_rab.to_csv(path_output, index=False)
+    elif ext == "parquet":
+        df_rab.to_parquet(path_output, index=False)
+    else:
+        raise ValueError(f"Format output tidak didukung: {path_output} (gunakan {', '.join(FORMAT_OUTPUT)})")
+
+
+# ==========================================
+# 3. CLI
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hitung RAB dari file BOQ tanpa Streamlit.")
+    parser.add_argument("boq", nargs="+", help="File BOQ (CSV/XLSX/Parquet) dengan kolom kode_ahsp & volume")
+    parser.add_argument("--master", required=True, help="Master AHSP (CSV/XLSX), dikompilasi otomatis ke store biner")
+    parser.add_argument("--harga", required=True, help="Daftar harga dasar (kolom nama_item & harga_satuan)")
+    parser.add_argument("--bidang", help="Bidang master (misal sda); wajib bila kode dipakai di lebih dari satu bidang")
+    parser.add_argument("--overhead", type=float, default=15.0, help="Persentase overhead & profit (default 15)")
+    parser.add_argument("--ppn", type=float, default=11.0, help="Persentase PPN (default 11)")
+    parser.add_argument("--output-dir", default=".", help="Folder hasil (default: folder saat ini)")
+    parser.add_argument("--format", choices=FORMAT_OUTPUT, default="xlsx", help="Format hasil (default xlsx)")
+    parser.add_argument("--presisi", choices=PRESISI, default="float",
+                        help="sen = hitung int64 titik-tetap dengan pembulatan per komponen (default float)")
+    args = parser.parse_args(argv)
+
+    store = ahsp_store.muat_master(args.master)
+    harga = baca_harga(args.harga)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    gagal = 0
+    for path_boq in args.boq:
+        nama_proyek = os.path.splitext(os.path.basename(path_boq))[0]
+        path_output = os.path.join(args.output_dir, f"RAB_{nama_proyek}.{args.format}")
+        try:
+            df_rab, cocok = hitung_rab_proyek(
+                baca_boq(path_boq), store, harga, args.overhead, args.ppn, args.presisi, args.bidang
+            )
+            tulis_rab(df_rab, path_output, nama_proyek=nama_proyek)
+        except (ValueError, KeyError, OSError) as e:
+            gagal += 1
+            print(f"GAGAL {path_boq}: {e}", file=sys.stderr)
+            continue
+
+        tanpa_harga = sorted(nama for nama, hasil in cocok.items() if hasil.aturan == TIDAK_DITEMUKAN)
+        if tanpa_harga:
+            print(f"PERINGATAN {path_boq}: harga tidak ditemukan untuk {', '.join(tanpa_harga)}", file=sys.stderr)
+        ambigu = sorted(f"{nama} ({' / '.join(hasil.kandidat)})" for nama, hasil in cocok.items() if hasil.aturan == AMBIGU)
+        if ambigu:
+            print(f"PERINGATAN {path_boq}: harga ambigu (dihitung 0) untuk {', '.join(ambigu)}", file=sys.stderr)
+        print(f"{path_boq} -> {path_output} ({len(df_rab)} baris, total Rp {df_rab['Total Dengan PPN'].sum():,.2f})")
+
+    return 1 if gagal else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Tahap build master AHSP: deduplikasi berbasis sidik isi + laporan konflik.
+
+Kode dianggap sama hanya di dalam satu bidang: master XLSX multi-bidang boleh memakai
+kode "1.1" di SDA dan di Cipta Karya sekaligus.
+
+Contoh:
+    python -m engine.integritas_master data/ahsp_ciptakarya_master.csv
+    # -> data/ahsp_ciptakarya_master.unik.csv + data/ahsp_ciptakarya_master.konflik.csv
+    python -m engine.integritas_master data/db_ahsp_master.xlsx
+    # -> data/db_ahsp_master.unik.xlsx + data/db_ahsp_master.konflik.csv
+    python -m engine.integritas_master data/ahsp_ciptakarya_master.csv --ketat   # exit 1 bila ada konflik
+"""
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine.batch_engine import KATEGORI
+from engine.koefisien_parser import kodekan_master_koefisien, urai_master_json, urai_master_koefisien
+
+KOLOM_IDENTITAS = ("kode", "uraian", "satuan")
+KUNCI_ITEM = ["bidang", "kode"]
+PERSIS = "duplikat_persis"
+KONFLIK = "konflik"
+# Nama kolom XLSX db_ahsp_master -> nama kolom converter (CSV)
+ALIAS_KOLOM = {"kode_ahsp": "kode", "uraian_pekerjaan": "uraian"}
+KOLOM_LAPORAN = ["bidang", "kode", "jenis", "sidik", "jumlah_baris", "baris_sumber", "dipakai", *KOLOM_IDENTITAS[1:], *KATEGORI]
+
+
+# ==========================================
+# 1. SIDIK ISI ITEM
+# ==========================================
+def sidik_item(df_master, triplet=None):
+    """
+    Sidik (blake2b 128-bit, hex) seluruh isi tiap item master format converter.
+
+    Teks identitas di-strip dan sel koefisien dikanonikkan lewat koefisien_parser, jadi
+    "Semen 276.0000" dan "Semen 276.0" dianggap isi yang sama.
+
+    Args:
+        df_master (pd.DataFrame): Kolom kode, uraian, satuan, tenaga, bahan, alat (teks).
+        triplet (pd.DataFrame, optional): Koefisien yang sudah diurai (misal urai_master_json
+                                          untuk master XLSX). Default: urai_master_koefisien.
+
+    Returns:
+        np.ndarray: Sidik per baris (dtype object).
+    """
+    if triplet is None:
+        triplet = urai_master_koefisien(df_master)
+    kanonik = kodekan_master_koefisien(triplet)
+    kolom = [df_master[k].fillna("").astype(str).str.strip().tolist() if k in df_master.columns else [""] * len(df_master)
+             for k in KOLOM_IDENTITAS]
+    kolom += [kanonik[k] for k in KATEGORI]
+    return np.array(
+        [hashlib.blake2b("\x1f".join(nilai).encode("utf-8"), digest_size=16).hexdigest() for nilai in zip(*kolom)],
+        dtype=object,
+    )
+
+
+# ==========================================
+# 2. DEDUPLIKASI
+# ==========================================
+def deduplikasi_master(df_master, triplet=None):
+    """
+    Membuang duplikat persis dan memilih satu varian untuk kode yang isinya bertentangan.
+
+    Item dikelompokkan per (bidang, kode); master tanpa kolom bidang dianggap satu bidang.
+
+    Aturan pilih varian per kode (deterministik, bukan sekadar baris pertama):
+    1. varian yang entri koefisiennya paling banyak (paling lengkap; baris sampah hasil
+       scan seperti "1.1, Lembar, ls, -, -, -" kalah dari analisa sebenarnya),
+    2. lalu yang paling sering muncul,
+    3. lalu yang muncul paling awal.
+
+    Args:
+        df_master (pd.DataFrame): Master format converter (boleh berisi duplikat).
+        triplet (pd.DataFrame, optional): Koefisien yang sudah diurai, lihat sidik_item.
+
+    Returns:
+        tuple: (df_unik dengan urutan baris asli dan satu baris per (bidang, kode),
+                df_laporan berkolom KOLOM_LAPORAN: satu baris per varian dari kode yang duplikat)
+    """
+    df_master = df_master.reset_index(drop=True)
+    if triplet is None:
+        triplet = urai_master_koefisien(df_master)
+    bidang = df_master["bidang"] if "bidang" in df_master.columns else pd.Series("", index=df_master.index)
+    varian = pd.DataFrame({
+        "bidang": bidang.fillna("").astype(str).str.strip().str.lower(),
+        "kode": df_master["kode"].fillna("").astype(str).str.strip(),
+        "sidik": sidik_item(df_master, triplet),
+        "n_entri": np.bincount(triplet["item"].to_numpy(), minlength=len(df_master)),
+        "baris": np.arange(len(df_master)),
+    })
+
+    # Satu baris per (bidang, kode, sidik): baris pertama, jumlah kemunculan, daftar baris sumber
+    kelompok = varian.groupby([*KUNCI_ITEM, "sidik"], sort=False)
+    ringkas = kelompok.agg(baris=("baris", "first"), jumlah_baris=("baris", "size"), n_entri=("n_entri", "first"))
+    ringkas["baris_sumber"] = kelompok["baris"].agg(lambda b: ";".join(map(str, b)))
+    ringkas = ringkas.reset_index()
+
+    peringkat = ringkas.sort_values(
+        [*KUNCI_ITEM, "n_entri", "jumlah_baris", "baris"], ascending=[True, True, False, False, True]
+    )
+    dipakai = peringkat.drop_duplicates(KUNCI_ITEM)["baris"]
+    ringkas["dipakai"] = ringkas["baris"].isin(dipakai)
+    df_unik = df_master.iloc[np.sort(dipakai.to_numpy())].reset_index(drop=True)
+
+    n_varian = ringkas.groupby(KUNCI_ITEM)["sidik"].transform("size")
+    n_baris = ringkas.groupby(KUNCI_ITEM)["jumlah_baris"].transform("sum")
+    laporan = ringkas[n_baris > 1].copy()
+    laporan["jenis"] = np.where(n_varian[n_baris > 1] > 1, KONFLIK, PERSIS)
+    isi = df_master.iloc[laporan["baris"].to_numpy()]
+    for kolom in KOLOM_LAPORAN:
+        if kolom not in laporan.columns:
+            laporan[kolom] = isi[kolom].to_numpy() if kolom in isi.columns else ""
+    laporan = laporan.sort_values([*KUNCI_ITEM, "baris"])[KOLOM_LAPORAN].reset_index(drop=True)
+    return df_unik, laporan
+
+
+def ringkasan_laporan(df_laporan):
+    """Jumlah kode dengan duplikat persis saja, jumlah kode berkonflik, dan jumlah baris yang dibuang."""
+    per_kode = df_laporan.groupby(KUNCI_ITEM)
+    return {
+        "kode_duplikat_persis": int((per_kode["jenis"].first() == PERSIS).sum()),
+        "kode_konflik": int((per_kode["jenis"].first() == KONFLIK).sum()),
+        "baris_dibuang": int(df_laporan["jumlah_baris"].sum() - per_kode.ngroups),
+    }
+
+
+# ==========================================
+# 3. BUILD FILE
+# ==========================================
+def bangun_master_unik(path_sumber, path_unik=None, path_laporan=None):
+    """
+    Membaca master (CSV converter atau XLSX db_ahsp_master), menulis master unik dan laporan konflik.
+
+    Master unik ditulis dengan format dan nama kolom yang sama dengan sumbernya.
+
+    Args:
+        path_sumber (str): Master CSV/XLSX mentah.
+        path_unik (str, optional): Default <sumber>.unik.csv / <sumber>.unik.xlsx.
+        path_laporan (str, optional): Default <sumber>.konflik.csv.
+
+    Returns:
+        dict: ringkasan_laporan + jumlah baris sebelum/sesudah dan path output.
+    """
+    dasar, ext = os.path.splitext(path_sumber)
+    csv = ext.lower() == ".csv"
+    path_unik = path_unik or f"{dasar}.unik{'.csv' if csv else '.xlsx'}"
+    path_laporan = path_laporan or f"{dasar}.konflik.csv"
+
+    if csv:
+        df = pd.read_csv(path_sumber, dtype=str, keep_default_na=False)
+        df_unik, df_laporan = deduplikasi_master(df)
+        df_unik.to_csv(path_unik, index=False)
+    else:
+        df = pd.read_excel(path_sumber, dtype=str)
+        df_normal = df.rename(columns=ALIAS_KOLOM)
+        df_unik, df_laporan = deduplikasi_master(df_normal, urai_master_json(df_normal))
+        df_unik.rename(columns={v: k for k, v in ALIAS_KOLOM.items() if k in df.columns}).to_excel(path_unik, index=False)
+    df_laporan.to_csv(path_laporan, index=False)
+    return {
+        "baris_sumber": len(df), "baris_unik": len(df_unik),
+        **ringkasan_laporan(df_laporan),
+        "path_unik": path_unik, "path_laporan": path_laporan,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deduplikasi master AHSP (CSV/XLSX) + laporan konflik.")
+    parser.add_argument("sumber", help="Master AHSP CSV hasil converter atau XLSX db_ahsp_master")
+    parser.add_argument("--unik", help="Path master unik (default <sumber>.unik.csv / .unik.xlsx)")
+    parser.add_argument("--laporan", help="Path laporan konflik (default <sumber>.konflik.csv)")
+    parser.add_argument("--ketat", action="store_true", help="Keluar dengan kode 1 bila ada kode konflik (misal untuk CI)")
+    args = parser.parse_args(argv)
+
+    hasil = bangun_master_unik(args.sumber, args.unik, args.laporan)
+    print(f"{args.sumber}: {hasil['baris_sumber']} -> {hasil['baris_unik']} baris "
+          f"({hasil['kode_duplikat_persis']} kode duplikat persis, {hasil['kode_konflik']} kode konflik)")
+    print(f"  master unik : {hasil['path_unik']}")
+    print(f"  laporan     : {hasil['path_laporan']}")
+    # Build tetap berhasil walau ada konflik (laporan ditulis); hanya mode ketat yang menganggapnya gagal
+    return 1 if args.ketat and hasil["kode_konflik"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
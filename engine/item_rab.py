@@ -0,0 +1,205 @@
+"""
+Model item & hasil RAB bersama untuk halaman SDA, Cipta Karya dan Bina Marga.
+
+- ItemPekerjaan: satu baris BOQ yang dipilih di halaman (identitas + volume).
+- DaftarItem: banyak baris dalam bentuk kolom; dibawa apa adanya melewati hitung batch
+  (tanpa dict 'meta'/'biaya' per item seperti hasil hitung_rab_lengkap).
+- HasilRAB: DaftarItem + array biaya (n, 16) urutan KOLOM_BIAYA + PPN per baris.
+- RABBidang: keranjang + indeks inkremental satu halaman di session_state. Semua
+  penambahan lewat matriks koefisien (jalur batch), jadi halaman mana pun cukup
+  menyediakan MatriksKoefisien master-nya.
+"""
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+
+from engine.batch_engine import KOLOM_BIAYA, MatriksKoefisien
+from engine.keranjang_rab import KeranjangRAB
+from engine.rab_inkremental import IndeksRABInkremental
+
+# Versi unik per proses (bukan per objek), jadi RABBidang baru tidak pernah mewarisi versi lama
+_VERSI = itertools.count(1)
+
+# ==========================================
+# 1. ITEM & HASIL
+# ==========================================
+@dataclass(slots=True, frozen=True)
+class ItemPekerjaan:
+    """
+    Satu baris BOQ.
+
+    Attributes:
+        kode_ahsp (str): Kode AHSP di master (kolom 'kode_ahsp' SDA atau 'kode' CK/BM).
+        uraian (str): Uraian pekerjaan.
+        satuan (str): Satuan volume.
+        volume (float): Volume pekerjaan.
+    """
+    kode_ahsp: str
+    uraian: str
+    satuan: str
+    volume: float
+
+
+@dataclass(slots=True)
+class DaftarItem:
+    """
+    Banyak baris BOQ dalam bentuk kolom (array sejajar).
+
+    Attributes:
+        kode_ahsp, uraian, satuan (np.ndarray): Array object.
+        volume (np.ndarray): Array float64.
+    """
+    kode_ahsp: np.ndarray
+    uraian: np.ndarray
+    satuan: np.ndarray
+    volume: np.ndarray
+
+    def __post_init__(self):
+        self.kode_ahsp = np.asarray(self.kode_ahsp, dtype=object)
+        self.uraian = np.asarray(self.uraian, dtype=object)
+        self.satuan = np.asarray(self.satuan, dtype=object)
+        self.volume = np.asarray(self.volume, dtype=np.float64)
+        if not len(self.kode_ahsp) == len(self.uraian) == len(self.satuan) == len(self.volume):
+            raise ValueError("Panjang kode_ahsp, uraian, satuan dan volume harus sama.")
+
+    def __len__(self):
+        return len(self.volume)
+
+    @classmethod
+    def dari_item(cls, item):
+        """Menyusun DaftarItem dari iterable ItemPekerjaan."""
+        kolom = list(zip(*((i.kode_ahsp, i.uraian, i.satuan, i.volume) for i in item)))
+        return cls(*kolom) if kolom else cls([], [], [], [])
+
+    @classmethod
+    def dari_dataframe(cls, df):
+        """Menyusun DaftarItem dari DataFrame berkolom keranjang ('kode_ahsp', 'Uraian Pekerjaan', 'Satuan', 'Volume')."""
+        return cls(
+            df["kode_ahsp"].to_numpy(dtype=object), df["Uraian Pekerjaan"].to_numpy(dtype=object),
+            df["Satuan"].to_numpy(dtype=object), df["Volume"].fillna(0.0).to_numpy(dtype=np.float64),
+        )
+
+
+@dataclass(slots=True)
+class HasilRAB:
+    """
+    Hasil hitung batch: item beserta seluruh kolom biayanya.
+
+    Attributes:
+        item (DaftarItem): Baris yang dihitung (objek yang sama dengan input, tidak disalin).
+        biaya (np.ndarray): Array (n, 16) urutan KOLOM_BIAYA.
+        persen_ppn (np.ndarray): PPN (%) per baris.
+    """
+    item: DaftarItem
+    biaya: np.ndarray
+    persen_ppn: np.ndarray
+
+    def __len__(self):
+        return len(self.item)
+
+    def kolom(self, nama):
+        """Satu kolom biaya (view), misal kolom('hsp_dengan_ppn') atau kolom('total_dengan_ppn_item')."""
+        return self.biaya[:, KOLOM_BIAYA.index(nama)]
+
+
+# ==========================================
+# 2. RAB SATU HALAMAN (SESSION STATE)
+# ==========================================
+class RABBidang:
+    """
+    Keranjang RAB + indeks inkremental satu halaman bidang, disimpan di session_state.
+
+    Id baris keranjang selalu sama dengan nomor baris indeks karena keduanya hanya
+    diisi lewat tambah().
+
+    Attributes:
+        versi (int): Berganti setiap isi RAB berubah (tambah, hapus, harga); kunci cache
+                     turunan seperti file export.
+    """
+
+    __slots__ = ("keranjang", "indeks", "versi")
+
+    def __init__(self):
+        self.keranjang = KeranjangRAB()
+        self.indeks = IndeksRABInkremental()
+        self.versi = next(_VERSI)
+
+    def __len__(self):
+        return len(self.keranjang)
+
+    def tambah(self, matriks: MatriksKoefisien, daftar: DaftarItem, harga, persen_overhead=15.0, persen_ppn=11.0,
+               baris_master=None):
+        """
+        Menghitung dan menambahkan banyak baris sekaligus.
+
+        Args:
+            matriks (MatriksKoefisien): Matriks datar master (tanpa referensi sub-analisa).
+            daftar (DaftarItem): Baris baru.
+            harga (callable): Fungsi nama sumber daya -> harga satuan (misal PencocokHarga.harga).
+            persen_overhead, persen_ppn (float | array-like): Skalar atau per baris.
+            baris_master (array-like, optional): Posisi baris matriks per item, yaitu baris master
+                yang ditampilkan di halaman. Default: dicari lewat kode (matriks.posisi).
+
+        Returns:
+            HasilRAB: Biaya baris yang baru ditambahkan.
+
+        Raises:
+            KeyError: Jika ada kode AHSP yang tidak ada di matriks (RAB tidak berubah).
+            ValueError: Jika kode di matriks tidak unik dan baris_master tidak diberikan, atau
+                        baris_master tidak cocok dengan kode item.
+        """
+        if baris_master is None:
+            baris_master = matriks.posisi(daftar.kode_ahsp)
+        else:
+            baris_master = np.asarray(baris_master, dtype=np.int64)
+            kode_baris = [str(matriks.kode[i]) for i in baris_master.tolist()]
+            if len(baris_master) != len(daftar) or kode_baris != [str(k) for k in daftar.kode_ahsp]:
+                raise ValueError("baris_master tidak cocok dengan kode AHSP item.")
+        persen_ppn = np.broadcast_to(np.asarray(persen_ppn, dtype=np.float64), (len(daftar),))
+        id_baru = self.indeks.tambah_banyak(matriks, baris_master, daftar.volume, harga, persen_overhead, persen_ppn)
+        hasil = HasilRAB(daftar, self.indeks.biaya_array(id_baru), persen_ppn)
+        self.keranjang.tambah_banyak(daftar.kode_ahsp, daftar.uraian, daftar.satuan, daftar.volume, hasil.biaya, persen_ppn)
+        self.versi = next(_VERSI)
+        return hasil
+
+    def muat_proyek(self, store, id_proyek, matriks: MatriksKoefisien, harga, persen_overhead=15.0, persen_ppn=11.0):
+        """
+        Menambahkan seluruh baris proyek tersimpan (ProyekStore), per halaman keyset.
+
+        Baris dihitung ulang dengan harga aktif; PPN per baris diambil dari yang tersimpan
+        (persen_ppn hanya untuk baris yang tidak punya PPN).
+
+        Returns:
+            int: Jumlah baris yang dimuat.
+        """
+        jumlah = 0
+        for df_halaman in store.iter_halaman(id_proyek):
+            ppn_baris = df_halaman["PPN (%)"].fillna(persen_ppn).to_numpy(dtype=np.float64)
+            jumlah += len(self.tambah(matriks, DaftarItem.dari_dataframe(df_halaman), harga, persen_overhead, ppn_baris))
+        return jumlah
+
+    def sinkron_harga(self, harga):
+        """Menerapkan perubahan harga dasar ke baris yang terdampak saja. Returns: id baris yang berubah."""
+        baris = self.indeks.sinkron_harga(harga)
+        if len(baris):
+            self.keranjang.perbarui_biaya(baris, self.indeks.biaya_array(baris))
+            self.versi = next(_VERSI)
+        return baris
+
+    def hapus(self, id_baris):
+        """Menghapus satu baris dari keranjang dan grand total."""
+        self.keranjang.hapus(id_baris)
+        self.indeks.hapus_baris(id_baris)
+        self.versi = next(_VERSI)
+
+    def id_baris(self):
+        return self.keranjang.id_baris()
+
+    def rekap(self):
+        """Grand total (kunci total_* KOLOM_BIAYA), dipelihara indeks secara delta."""
+        return self.indeks.rekap()
+
+    def ke_dataframe(self):
+        """Tabel RAB berkolom keranjang (siap st.dataframe / export_to_excel / ProyekStore)."""
+        return self.keranjang.ke_dataframe()
@@ -0,0 +1,191 @@
+import numpy as np
+import pandas as pd
+
+from engine.batch_engine import KOLOM_BIAYA, NAMA_KOLOM_RAB
+
+# Urutan kolom keranjang sama dengan dict yang dulu di-append halaman SDA
+KOLOM_TEKS = ("kode_ahsp", "Uraian Pekerjaan", "Satuan")
+_NAMA_KE_BIAYA = {nama: kunci for kunci, nama in NAMA_KOLOM_RAB.items()}
+_KOLOM_RAB = list(NAMA_KOLOM_RAB.values())
+KOLOM_ANGKA = ("Volume", *_KOLOM_RAB[:_KOLOM_RAB.index("Total PPN")], "PPN (%)", "Total PPN", "Total Dengan PPN")
+
+# Kolom angka yang berasal dari biaya engine, dan posisi sumbernya di KOLOM_BIAYA
+_KOLOM_DARI_BIAYA = np.array([i for i, kolom in enumerate(KOLOM_ANGKA) if kolom in _NAMA_KE_BIAYA])
+_SUMBER_BIAYA = np.array([KOLOM_BIAYA.index(_NAMA_KE_BIAYA[KOLOM_ANGKA[i]]) for i in _KOLOM_DARI_BIAYA])
+_KOLOM_VOLUME = KOLOM_ANGKA.index("Volume")
+_KOLOM_PPN = KOLOM_ANGKA.index("PPN (%)")
+
+
+class KeranjangRAB:
+    """
+    Keranjang RAB kolumnar untuk session_state (pengganti list of dict).
+
+    - Kolom angka disimpan dalam satu array float64 (kapasitas, k) urutan Fortran yang
+      dialokasikan di muka dan tumbuh 2x, sehingga tambah() O(1) teramortisasi dan
+      ke_dataframe() membungkus array tanpa menyalin.
+    - Kolom teks di-intern: array kode int32 + satu tabel string bersama (uraian yang
+      sama hanya disimpan sekali).
+    - Setiap baris punya id stabil (naik terus) yang sama dengan nomor baris
+      IndeksRABInkremental bila keduanya diisi bersamaan. hapus() hanya menandai baris
+      (O(1)); pemadatan dilakukan sekali saat tampilan berikutnya diminta.
+
+    Args:
+        kapasitas_awal (int): Kapasitas awal baris.
+    """
+
+    __slots__ = ("_angka", "_teks", "_id", "_aktif", "_n", "_n_hapus", "_id_berikut", "_intern", "_tabel")
+
+    def __init__(self, kapasitas_awal: int = 64):
+        self._angka = np.zeros((kapasitas_awal, len(KOLOM_ANGKA)), order="F")
+        self._teks = np.zeros((kapasitas_awal, len(KOLOM_TEKS)), dtype=np.int32)
+        self._id = np.zeros(kapasitas_awal, dtype=np.int64)
+        self._aktif = np.zeros(kapasitas_awal, dtype=bool)
+        self._n = 0          # baris fisik terpakai (termasuk yang ditandai hapus)
+        self._n_hapus = 0
+        self._id_berikut = 0
+        self._intern = {}
+        self._tabel = []
+
+    def __len__(self):
+        return self._n - self._n_hapus
+
+    def _kode_teks(self, teks):
+        teks = str(teks)
+        kode = self._intern.get(teks)
+        if kode is None:
+            kode = self._intern[teks] = len(self._tabel)
+            self._tabel.append(teks)
+        return kode
+
+    def _pastikan_kapasitas(self, tambahan=1):
+        if self._n + tambahan <= len(self._id):
+            return
+        kapasitas = max(2 * len(self._id), self._n + tambahan)
+        for nama in ("_angka", "_teks", "_id", "_aktif"):
+            lama = getattr(self, nama)
+            baru = np.zeros((kapasitas,) + lama.shape[1:], dtype=lama.dtype, order="F" if nama == "_angka" else "C")
+            baru[:len(lama)] = lama
+            setattr(self, nama, baru)
+
+    def tambah(self, kode_ahsp, uraian, satuan, volume, biaya, persen_ppn):
+        """
+        Menambahkan satu baris.
+
+        Args:
+            kode_ahsp, uraian, satuan (str): Identitas pekerjaan.
+            volume (float): Volume pekerjaan.
+            biaya (dict | np.ndarray): Dict 'biaya' hitung_rab_lengkap, atau array dengan urutan KOLOM_BIAYA.
+            persen_ppn (float): Persentase PPN baris (untuk summary export).
+
+        Returns:
+            int: Id baris (stabil walau ada baris lain yang dihapus).
+        """
+        self._pastikan_kapasitas()
+        i = self._n
+        if isinstance(biaya, dict):
+            biaya = [biaya[k] for k in KOLOM_BIAYA]
+        biaya = np.asarray(biaya, dtype=np.float64)
+
+        self._angka[i, _KOLOM_DARI_BIAYA] = biaya[_SUMBER_BIAYA]
+        self._angka[i, _KOLOM_VOLUME] = volume
+        self._angka[i, _KOLOM_PPN] = persen_ppn
+        self._teks[i] = [self._kode_teks(kode_ahsp), self._kode_teks(uraian), self._kode_teks(satuan)]
+        self._id[i] = self._id_berikut
+        self._aktif[i] = True
+        self._n += 1
+        self._id_berikut += 1
+        return int(self._id[i])
+
+    def tambah_banyak(self, kode_ahsp, uraian, satuan, volume, biaya, persen_ppn):
+        """
+        Menambahkan banyak baris sekaligus (misal halaman proyek tersimpan).
+
+        Args:
+            kode_ahsp, uraian, satuan (list-like): Identitas pekerjaan per baris.
+            volume (array-like): Volume per baris.
+            biaya (np.ndarray): Array (m, 16) berurutan KOLOM_BIAYA.
+            persen_ppn (float | array-like): Persentase PPN per baris.
+
+        Returns:
+            np.ndarray: Id baris baru.
+        """
+        volume = np.asarray(volume, dtype=np.float64)
+        m = len(volume)
+        self._pastikan_kapasitas(m)
+        i = self._n
+        self._angka[i:i + m, _KOLOM_DARI_BIAYA] = np.asarray(biaya, dtype=np.float64).reshape(m, -1)[:, _SUMBER_BIAYA]
+        self._angka[i:i + m, _KOLOM_VOLUME] = volume
+        self._angka[i:i + m, _KOLOM_PPN] = persen_ppn
+        for posisi_kolom, nilai in enumerate((kode_ahsp, uraian, satuan)):
+            # Intern per nilai unik, bukan per baris
+            kode, unik = pd.factorize(pd.Series(nilai, dtype=object).astype(str))
+            self._teks[i:i + m, posisi_kolom] = np.array([self._kode_teks(t) for t in unik], dtype=np.int32)[kode]
+        self._id[i:i + m] = np.arange(self._id_berikut, self._id_berikut + m)
+        self._aktif[i:i + m] = True
+        self._n += m
+        self._id_berikut += m
+        return self._id[i:i + m].copy()
+
+    def _posisi(self, id_baris):
+        """Posisi fisik baris aktif (id naik terus dan urutan fisik dipertahankan -> searchsorted)."""
+        id_baris = np.asarray(id_baris, dtype=np.int64)
+        posisi = np.searchsorted(self._id[:self._n], id_baris)
+        ada = posisi < self._n
+        ada[ada] = (self._id[posisi[ada]] == id_baris[ada]) & self._aktif[posisi[ada]]
+        return posisi, ada
+
+    def hapus(self, id_baris):
+        """Menandai satu baris terhapus (O(1)); datanya dibuang saat pemadatan berikutnya."""
+        posisi, ada = self._posisi([id_baris])
+        if not ada[0]:
+            raise KeyError(f"Baris keranjang {id_baris} tidak ada.")
+        self._aktif[posisi[0]] = False
+        self._n_hapus += 1
+
+    def perbarui_biaya(self, id_baris, biaya):
+        """
+        Menimpa kolom biaya beberapa baris sekaligus (misal setelah harga dasar berubah).
+
+        Args:
+            id_baris (array-like): Id baris; id yang sudah dihapus diabaikan.
+            biaya (np.ndarray): Array (len(id_baris), 16) berurutan KOLOM_BIAYA.
+        """
+        posisi, ada = self._posisi(id_baris)
+        blok = np.asarray(biaya, dtype=np.float64).reshape(len(ada), -1)[ada][:, _SUMBER_BIAYA]
+        self._angka[np.ix_(posisi[ada], _KOLOM_DARI_BIAYA)] = blok
+
+    def _padatkan(self):
+        if not self._n_hapus:
+            return
+        aktif = np.flatnonzero(self._aktif[:self._n])
+        m = len(aktif)
+        self._angka[:m] = self._angka[aktif]
+        self._teks[:m] = self._teks[aktif]
+        self._id[:m] = self._id[aktif]
+        self._aktif[:m] = True
+        self._aktif[m:self._n] = False
+        self._n, self._n_hapus = m, 0
+
+    def id_baris(self):
+        """Id baris aktif sesuai urutan tampilan."""
+        self._padatkan()
+        return self._id[:self._n].copy()
+
+    def ke_dataframe(self):
+        """
+        Tampilan DataFrame keranjang dengan kolom sama seperti list of dict lama.
+
+        Kolom angka membungkus array internal tanpa salinan dan kolom teks berupa
+        Categorical di atas tabel intern. Perlakukan sebagai read-only: hasilnya ikut
+        berubah bila keranjang diubah.
+        """
+        self._padatkan()
+        n = self._n
+        df = pd.DataFrame(self._angka[:n], columns=list(KOLOM_ANGKA), copy=False)
+        kategori = pd.Index(self._tabel, dtype=object)
+        for posisi_kolom, nama in enumerate(KOLOM_TEKS):
+            df.insert(posisi_kolom, nama, pd.Categorical.from_codes(self._teks[:n, posisi_kolom], categories=kategori))
+        return df
+
+    def kosongkan(self):
+        self.__init__(len(self._id))
@@ -0,0 +1,201 @@
+import json
+
+import numpy as np
+import pandas as pd
+from numpy.dtypes import StringDType
+
+from engine.batch_engine import KATEGORI, MatriksKoefisien
+
+# ==========================================
+# FORMAT SEL KOEFISIEN MASTER CSV
+# ==========================================
+# Sel tenaga/bahan/alat di master CSV ditulis oleh converter (export_item) sebagai
+#   "Pekerja 0.936;Mandor 0.032"   atau   "-" jika kosong
+# Setiap entri = "<nama> <koef>" dengan koef = repr float Python, jadi koefisien selalu
+# token terakhir dan nama boleh berisi spasi & angka ("Batu split 2/3 1009.0").
+# Round-trip urai -> kodekan lossless untuk sel keluaran export_item; angka non-kanonik
+# dari file lama ("1.2000", "1") ikut dinormalkan ke repr float ("1.2", "1.0").
+# Satu-satunya batasan: nama tidak boleh mengandung ';' (pemisah entri).
+# StringDType dan np.strings.rpartition butuh NumPy >= 2.1 (lihat requirements.txt).
+PEMISAH_ENTRI = ";"
+SEL_KOSONG = "-"
+
+_TEKS = StringDType()
+_SPASI = np.array(" ", dtype=_TEKS)
+
+
+def urai_kolom_koefisien(kolom):
+    """
+    Mengurai satu kolom sel koefisien sekaligus dengan operasi string NumPy (tanpa loop per entri).
+
+    Args:
+        kolom (list-like): Sel format "Nama koef;Nama koef", "-" atau kosong.
+
+    Returns:
+        tuple: (item, nama, koef) berupa array sejajar; item = posisi sel asal.
+               Entri yang koefisiennya bukan angka dibuang.
+    """
+    # Operasi per sel (jumlahnya = jumlah item) cukup dengan method str bawaan;
+    # operasi per entri (jauh lebih banyak) dikerjakan ufunc np.strings.
+    sel = [s.strip() if isinstance(s, str) else "" for s in kolom]
+    terisi = [s for s in sel if s and s != SEL_KOSONG]
+    jumlah_entri = np.fromiter(
+        (s.count(PEMISAH_ENTRI) + 1 if s and s != SEL_KOSONG else 0 for s in sel), dtype=np.int64, count=len(sel)
+    )
+
+    # Satu join + split di level C, lalu koefisien = token setelah spasi terakhir
+    entri = np.array(PEMISAH_ENTRI.join(terisi).split(PEMISAH_ENTRI) if terisi else [], dtype=_TEKS)
+    nama, _, teks_koef = np.strings.rpartition(np.strings.rstrip(entri), _SPASI)
+    try:
+        koef = teks_koef.astype(np.float64)
+    except ValueError:
+        koef = pd.to_numeric(pd.Series(teks_koef.astype(object)), errors="coerce").to_numpy(dtype=np.float64)
+
+    item = np.repeat(np.arange(len(sel), dtype=np.int64), jumlah_entri)
+    # Entri tanpa koefisien angka (misal potongan nama yang mengandung ';') dibuang,
+    # sama seperti pengurai per sel sebelumnya
+    valid = ~np.isnan(koef)
+    return item[valid], np.strings.strip(nama[valid]).astype(object), koef[valid]
+
+
+def urai_master_koefisien(df_master):
+    """
+    Mengurai kolom tenaga/bahan/alat master CSV menjadi triplet (item, sumber daya, koef).
+
+    Entri ganda dalam satu sel dipertahankan apa adanya (lossless), sehingga
+    kodekan_master_koefisien(triplet) menghasilkan kembali sel aslinya.
+
+    Returns:
+        pd.DataFrame: Kolom 'item' (posisi baris), 'kategori' (0/1/2), 'id_sumber_daya', 'koef',
+                      terurut per item lalu kategori (urutan entri dalam sel dipertahankan).
+                      attrs['sumber_daya'] = nama per id (urutan kemunculan pertama),
+                      attrs['n_item'] = jumlah baris master.
+    """
+    bagian = []
+    for id_kat, kategori in enumerate(KATEGORI):
+        if kategori not in df_master.columns:
+            continue
+        item, nama, koef = urai_kolom_koefisien(df_master[kategori].to_numpy(dtype=object))
+        bagian.append((item, np.full(len(item), id_kat, dtype=np.int8), nama, koef))
+    return _susun_triplet(bagian, len(df_master))
+
+
+def urai_sel_json(teks):
+    """Mengurai sel JSON '{"Pekerja": 0.75}' dari db_ahsp_master.xlsx menjadi dict (kosong/bukan teks = {})."""
+    if not isinstance(teks, str) or not teks.strip():
+        return {}
+    return json.loads(teks)
+
+
+def urai_master_json(df_master):
+    """
+    Seperti urai_master_koefisien, untuk master XLSX db_ahsp_master yang selnya berisi JSON.
+
+    Triplet yang dihasilkan berformat sama, jadi deduplikasi (integritas_master) dan
+    susun_matriks_dari_triplet berlaku untuk kedua format.
+
+    Raises:
+        ValueError: Jika sel bukan JSON valid atau koefisiennya bukan angka.
+    """
+    bagian = []
+    for id_kat, kategori in enumerate(KATEGORI):
+        if kategori not in df_master.columns:
+            continue
+        item, nama, koef = [], [], []
+        for i, sel in enumerate(df_master[kategori].to_numpy(dtype=object)):
+            for n, k in urai_sel_json(sel).items():
+                item.append(i)
+                nama.append(n)
+                koef.append(float(k))
+        bagian.append((
+            np.asarray(item, dtype=np.int64), np.full(len(item), id_kat, dtype=np.int8),
+            np.asarray(nama, dtype=object), np.asarray(koef, dtype=np.float64),
+        ))
+    return _susun_triplet(bagian, len(df_master))
+
+
+def _susun_triplet(bagian, n_item):
+    if bagian:
+        item, kategori, nama, koef = (np.concatenate(kolom) for kolom in zip(*bagian))
+    else:
+        item, kategori, nama, koef = (np.empty(0, dtype=t) for t in (np.int64, np.int8, object, np.float64))
+
+    urutan = np.lexsort((kategori, item))  # stabil: urutan entri dalam satu sel tetap
+    id_sumber_daya, sumber_daya = pd.factorize(nama[urutan])
+    triplet = pd.DataFrame({
+        "item": item[urutan],
+        "kategori": kategori[urutan],
+        "id_sumber_daya": id_sumber_daya.astype(np.int32),
+        "koef": koef[urutan],
+    })
+    triplet.attrs["sumber_daya"] = list(sumber_daya)
+    triplet.attrs["n_item"] = n_item
+    return triplet
+
+
+def kodekan_koefisien(nama, koef):
+    """
+    Kebalikan urai_kolom_koefisien untuk satu sel, formatnya sama persis dengan export_item.
+
+    Returns:
+        str: "Nama koef;Nama koef" atau "-" jika kosong.
+    """
+    entri = [f"{n} {float(k)}" for n, k in zip(nama, koef)]
+    return PEMISAH_ENTRI.join(entri) if entri else SEL_KOSONG
+
+
+def kodekan_master_koefisien(triplet):
+    """
+    Menyusun kembali kolom tenaga/bahan/alat (format export_item) dari hasil urai_master_koefisien.
+
+    Returns:
+        dict: {kategori: list sel teks} sepanjang attrs['n_item'].
+    """
+    n_item = triplet.attrs["n_item"]
+    sumber_daya = np.asarray(triplet.attrs["sumber_daya"], dtype=object)
+    hasil = {}
+    for id_kat, kategori in enumerate(KATEGORI):
+        bagian = triplet[triplet["kategori"].to_numpy() == id_kat]
+        item = bagian["item"].to_numpy()
+        nama = sumber_daya[bagian["id_sumber_daya"].to_numpy()]
+        koef = bagian["koef"].to_numpy()
+        batas = np.searchsorted(item, np.arange(n_item + 1))
+        hasil[kategori] = [kodekan_koefisien(nama[a:b], koef[a:b]) for a, b in zip(batas[:-1], batas[1:])]
+    return hasil
+
+
+def susun_matriks_dari_triplet(kode, triplet):
+    """
+    Menyusun MatriksKoefisien langsung dari triplet, tanpa dict per sel.
+
+    Entri ganda (item, kategori, sumber daya yang sama) digabung dengan aturan yang sama
+    seperti dict di jalur lama: posisi kemunculan pertama, nilai kemunculan terakhir.
+    Hasilnya identik dengan susun_matriks_koefisien pada kolom dict yang setara.
+
+    Args:
+        kode (list-like): Kode AHSP per baris master (panjang attrs['n_item']).
+        triplet (pd.DataFrame): Hasil urai_master_koefisien / urai_master_json.
+
+    Returns:
+        MatriksKoefisien: Matriks siap dipakai hitung_rab_batch.
+    """
+    n_item = triplet.attrs["n_item"]
+    item = triplet["item"].to_numpy(dtype=np.int64)
+    kategori = triplet["kategori"].to_numpy(dtype=np.int8)
+    id_sumber_daya = triplet["id_sumber_daya"].to_numpy(dtype=np.int64)
+    koef = triplet["koef"].to_numpy(dtype=np.float64)
+
+    kunci = (item * 3 + kategori) * max(len(triplet.attrs["sumber_daya"]), 1) + id_sumber_daya
+    _, pertama, kelompok = np.unique(kunci, return_index=True, return_inverse=True)
+    terakhir = np.zeros(len(pertama), dtype=np.int64)
+    np.maximum.at(terakhir, kelompok, np.arange(len(kunci)))
+    pilih = np.sort(pertama)
+
+    return MatriksKoefisien(
+        kode=list(kode),
+        sumber_daya=list(triplet.attrs["sumber_daya"]),
+        indptr=np.concatenate(([0], np.cumsum(np.bincount(item[pilih], minlength=n_item)))).astype(np.int64),
+        indices=id_sumber_daya[pilih].astype(np.int32),
+        data=koef[terakhir[kelompok[pilih]]],
+        kategori=kategori[pilih],
+    )
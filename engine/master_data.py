@@ -0,0 +1,126 @@
+import os
+import threading
+
+from engine import ahsp_store
+from engine.pencarian_ahsp import IndeksAHSP
+
+# ==========================================
+# CACHE MASTER AHSP PER PROSES
+# ==========================================
+# Satu proses Streamlit melayani banyak sesi/thread. Master dimuat sekali per proses
+# dan dibagi ke semua halaman & sesi; cache otomatis basi jika file sumber berubah.
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+class MasterAHSP:
+    """
+    Master AHSP yang sudah dimuat, dengan tampilan per bidang tanpa salinan.
+
+    DataFrame diurutkan (stabil) per bidang sekali saat dimuat, sehingga tampilan
+    per bidang cukup berupa irisan iloc (view), bukan filter boolean yang menyalin data.
+    DataFrame dibagi antar sesi: perlakukan sebagai read-only.
+
+    Attributes:
+        path (str): Path absolut file sumber.
+        sidik (tuple): (mtime_ns, ukuran) file saat dimuat.
+        store (ahsp_store.StoreAHSP): Store biner hasil kompilasi.
+        df (pd.DataFrame): Kolom bidang, kode_ahsp, uraian_pekerjaan, satuan, tenaga, bahan, alat.
+    """
+
+    def __init__(self, path, sidik, store):
+        self.path = path
+        self.sidik = sidik
+        self.store = store
+        df = store.to_dataframe()
+        self.df = df.iloc[df["bidang"].argsort(kind="stable")]
+
+        bidang = self.df["bidang"].to_numpy()
+        self._indeks = {}
+        self._rentang = {}
+        awal = 0
+        for i in range(1, len(bidang) + 1):
+            if i == len(bidang) or bidang[i] != bidang[awal]:
+                self._rentang[bidang[awal]] = (awal, i)
+                awal = i
+
+    @property
+    def versi(self):
+        """Penanda versi isi master (berubah setiap file sumber berubah), cocok untuk kunci cache turunan."""
+        return self.store.meta["sha256"]
+
+    def bidang(self):
+        """Daftar bidang yang ada di master."""
+        return list(self._rentang)
+
+    def jumlah_item(self, bidang):
+        awal, akhir = self._rentang.get(bidang.lower(), (0, 0))
+        return akhir - awal
+
+    def view_bidang(self, bidang):
+        """Irisan DataFrame untuk satu bidang (misal 'sda'); kosong jika bidang tidak ada."""
+        awal, akhir = self._rentang.get(bidang.lower(), (0, 0))
+        return self.df.iloc[awal:akhir]
+
+    def matriks_bidang(self, bidang):
+        """
+        MatriksKoefisien satu bidang; baris ke-i = baris ke-i view_bidang(bidang).
+
+        Dipakai untuk hitung & sub-analisa: kode AHSP hanya unik di dalam satu bidang.
+        """
+        return self.store.matriks_bidang(bidang)
+
+    def indeks_pencarian(self, bidang):
+        """
+        IndeksAHSP atas kode & uraian satu bidang, dibangun sekali per versi master.
+
+        Posisi hasil pencarian = posisi baris di view_bidang(bidang) (pakai iloc).
+        """
+        bidang = bidang.lower()
+        indeks = self._indeks.get(bidang)
+        if indeks is None:
+            view = self.view_bidang(bidang)
+            indeks = self._indeks[bidang] = IndeksAHSP(view["kode_ahsp"].tolist(), view["uraian_pekerjaan"].tolist())
+        return indeks
+
+
+def _sidik(path):
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def muat_master_ahsp(file_path='data/db_ahsp_master.xlsx'):
+    """
+    Memuat master AHSP sekali per proses, dimuat ulang otomatis jika file berubah.
+
+    Kunci cache adalah path absolut + (mtime, ukuran) file; isi file diverifikasi
+    lagi dengan sha256 oleh ahsp_store sebelum store dikompilasi ulang.
+
+    Args:
+        file_path (str): Path master AHSP (XLSX/CSV).
+
+    Returns:
+        MasterAHSP: Objek master bersama (jangan dimodifikasi).
+
+    Raises:
+        FileNotFoundError: Jika file master tidak ada.
+    """
+    path = os.path.abspath(file_path)
+    sidik = _sidik(path)
+    master = _CACHE.get(path)
+    if master is not None and master.sidik == sidik:
+        return master
+
+    with _LOCK:
+        # Cek ulang di dalam lock: thread lain mungkin sudah memuatnya
+        master = _CACHE.get(path)
+        if master is None or master.sidik != sidik:
+            master = MasterAHSP(path, sidik, ahsp_store.muat_master(path))
+            _CACHE[path] = master
+        return master
+
+
+def kosongkan_cache():
+    """Menghapus semua master dari cache proses (misal setelah upload master baru)."""
+    with _LOCK:
+        _CACHE.clear()
@@ -0,0 +1,237 @@
+"""
+Pemetaan massal uraian BOQ ke kode AHSP: retrieval leksikal lokal + AI hanya untuk memilih.
+
+Setiap baris BOQ dicarikan k kandidat teratas dari master (IndeksAHSP, tanpa jaringan).
+Hanya kandidat itu yang dikirim ke AI, dalam batch beberapa puluh baris per panggilan,
+sehingga prompt kecil dan ribuan baris bisa dipetakan sekali jalan. Tanpa AI (tanpa --api-key),
+kandidat leksikal teratas langsung dipakai.
+
+Contoh:
+    python -m engine.pemetaan_boq boq_uraian.xlsx --master data/ahsp_sda_master.csv \
+        --api-key $GEMINI_KEY --output boq_terpetakan.xlsx
+"""
+import argparse
+import json
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine.pencarian_ahsp import indeks_dataframe
+
+PERSONA_PEMETAAN = "💰 Ahli Estimator (QS)"
+K_KANDIDAT = 5
+UKURAN_BATCH = 25
+
+SUMBER_AI = "ai"
+SUMBER_LEKSIKAL = "leksikal"          # tanpa AI, kandidat tunggal, atau jawaban AI tidak valid
+SUMBER_TANPA_KANDIDAT = "tanpa_kandidat"
+KOSONG = "-"
+
+KOLOM_PEMETAAN = [
+    "uraian_boq", "satuan_boq", "kode_ahsp", "uraian_ahsp", "satuan_ahsp",
+    "skor_leksikal", "sumber", "kandidat",
+]
+
+_POLA_JSON = re.compile(r"\[.*\]", re.DOTALL)
+_SATUAN_KANONIK = str.maketrans({"³": "3", "²": "2", " ": "", "'": "", ".": ""})
+
+
+def _normal_satuan(satuan):
+    return str(satuan).casefold().translate(_SATUAN_KANONIK)
+
+
+# ==========================================
+# 1. RETRIEVAL LOKAL
+# ==========================================
+def cari_kandidat(indeks, katalog, uraian, satuan=None, k=K_KANDIDAT):
+    """
+    k kandidat AHSP teratas untuk satu uraian BOQ.
+
+    Kandidat diambil dari 3k hasil leksikal teratas, lalu yang satuannya sama dengan
+    satuan BOQ didahulukan (urutan skor dipertahankan di dalam tiap kelompok).
+
+    Returns:
+        list: [(posisi katalog, skor)].
+    """
+    hasil = indeks.cari_skor(uraian, batas=3 * k if satuan else k)
+    if satuan and hasil:
+        target = _normal_satuan(satuan)
+        satuan_katalog = katalog["satuan"].to_numpy()
+        hasil.sort(key=lambda h: _normal_satuan(satuan_katalog[h[0]]) != target)
+    return hasil[:k]
+
+
+# ==========================================
+# 2. PROMPT & JAWABAN BATCH
+# ==========================================
+def susun_pertanyaan_batch(baris, katalog):
+    """
+    Pertanyaan untuk satu batch.
+
+    Args:
+        baris (list): [(uraian, satuan, kandidat)] dengan kandidat = hasil cari_kandidat.
+        katalog (pd.DataFrame): Kolom kode_ahsp, uraian_pekerjaan, satuan.
+    """
+    kode, uraian, satuan = (katalog[k].to_numpy() for k in ("kode_ahsp", "uraian_pekerjaan", "satuan"))
+    bagian = [
+        "Petakan setiap baris BOQ berikut ke SATU kode AHSP, dipilih HANYA dari kandidat di bawahnya.",
+        f'Balas HANYA dengan JSON array tanpa penjelasan: [{{"no": 1, "kode": "<kode>"}}, ...]; '
+        f'isi kode "{KOSONG}" jika tidak ada kandidat yang cocok.',
+        "",
+    ]
+    for no, (uraian_boq, satuan_boq, kandidat) in enumerate(baris, start=1):
+        bagian.append(f"{no}. {uraian_boq}" + (f" [{satuan_boq}]" if satuan_boq else ""))
+        bagian.extend(f"   - {kode[p]} | {uraian[p]} [{satuan[p]}]" for p, _ in kandidat)
+    return "\n".join(bagian)
+
+
+def urai_jawaban_batch(jawaban, n_baris):
+    """
+    Mengurai jawaban JSON AI.
+
+    Returns:
+        list: Kode pilihan per baris (None jika baris itu tidak dijawab / jawaban tak terbaca).
+    """
+    pilihan = [None] * n_baris
+    cocok = _POLA_JSON.search(jawaban or "")
+    if not cocok:
+        return pilihan
+    try:
+        isi = json.loads(cocok.group(0))
+    except ValueError:
+        return pilihan
+    for entri in isi if isinstance(isi, list) else []:
+        try:
+            no = int(entri["no"])
+            kode = str(entri["kode"]).strip()
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 1 <= no <= n_baris:
+            pilihan[no - 1] = kode
+    return pilihan
+
+
+# ==========================================
+# 3. PEMETAAN SELURUH BOQ
+# ==========================================
+async def petakan_boq(uraian_boq, katalog, satuan_boq=None, penjadwal=None, k=K_KANDIDAT,
+                      ukuran_batch=UKURAN_BATCH, model_name=None, indeks=None):
+    """
+    Memetakan setiap uraian BOQ ke satu kode AHSP katalog.
+
+    Uraian yang sama (setelah normalisasi spasi/huruf) hanya dicari dan ditanyakan sekali.
+    Baris dengan satu kandidat tidak dikirim ke AI. Jawaban AI yang bukan salah satu
+    kandidat diganti kandidat leksikal teratas.
+
+    Args:
+        uraian_boq (list-like): Uraian pekerjaan per baris BOQ.
+        katalog (pd.DataFrame): Master (misal MasterAHSP.view_bidang), kolom kode_ahsp, uraian_pekerjaan, satuan.
+        satuan_boq (list-like, optional): Satuan per baris BOQ (untuk mendahulukan kandidat sesatuan).
+        penjadwal (PenjadwalAI, optional): None = tanpa AI, kandidat leksikal teratas dipakai.
+        k (int): Jumlah kandidat per baris di prompt.
+        ukuran_batch (int): Baris BOQ unik per panggilan AI.
+        model_name (str, optional): Model pilihan penjadwal.
+        indeks (IndeksAHSP, optional): Indeks atas katalog (posisi sama). Default: dibangun/di-cache dari katalog.
+
+    Returns:
+        pd.DataFrame: Satu baris per baris BOQ dengan kolom KOLOM_PEMETAAN.
+    """
+    uraian_boq = ["" if pd.isna(u) else str(u).strip() for u in uraian_boq]
+    satuan_boq = ["" if s is None or pd.isna(s) else str(s).strip() for s in satuan_boq] if satuan_boq is not None else [""] * len(uraian_boq)
+    if indeks is None:
+        indeks = indeks_dataframe(katalog, "kode_ahsp", "uraian_pekerjaan")
+
+    kunci = [(" ".join(u.casefold().split()), _normal_satuan(s)) for u, s in zip(uraian_boq, satuan_boq)]
+    id_unik, posisi_unik = {}, []  # posisi_unik = baris kemunculan pertama tiap uraian unik
+    for i, kn in enumerate(kunci):
+        if kn not in id_unik:
+            id_unik[kn] = len(posisi_unik)
+            posisi_unik.append(i)
+    kandidat = [cari_kandidat(indeks, katalog, uraian_boq[i], satuan_boq[i], k) for i in posisi_unik]
+
+    kode_katalog = katalog["kode_ahsp"].astype(str).to_numpy()
+    pilihan = [kand[0][0] if kand else None for kand in kandidat]
+    sumber = [SUMBER_LEKSIKAL if kand else SUMBER_TANPA_KANDIDAT for kand in kandidat]
+
+    if penjadwal is not None:
+        ditanya = [j for j, kand in enumerate(kandidat) if len(kand) > 1]
+        batch = [ditanya[a:a + ukuran_batch] for a in range(0, len(ditanya), ukuran_batch)]
+        pertanyaan = [
+            susun_pertanyaan_batch([(uraian_boq[posisi_unik[j]], satuan_boq[posisi_unik[j]], kandidat[j]) for j in isi], katalog)
+            for isi in batch
+        ]
+        hasil = await penjadwal.tanya_banyak(PERSONA_PEMETAAN, pertanyaan, model_name)
+        for isi, hasil_batch in zip(batch, hasil):
+            jawaban = urai_jawaban_batch(hasil_batch.jawaban, len(isi)) if hasil_batch.sukses else [None] * len(isi)
+            for j, kode in zip(isi, jawaban):
+                if kode == KOSONG:
+                    pilihan[j], sumber[j] = None, SUMBER_AI
+                    continue
+                posisi_kode = {kode_katalog[p]: p for p, _ in kandidat[j]}
+                if kode in posisi_kode:
+                    pilihan[j], sumber[j] = posisi_kode[kode], SUMBER_AI
+
+    skor = {j: dict(kand) for j, kand in enumerate(kandidat)}
+    baris_unik = [id_unik[kn] for kn in kunci]
+    posisi = np.array([-1 if pilihan[j] is None else pilihan[j] for j in baris_unik], dtype=np.int64)
+    ada = posisi >= 0
+
+    def ambil(kolom):
+        nilai = katalog[kolom].astype(str).to_numpy()[np.where(ada, posisi, 0)] if len(katalog) else np.full(len(posisi), "")
+        return np.where(ada, nilai, "")
+
+    return pd.DataFrame({
+        "uraian_boq": uraian_boq,
+        "satuan_boq": satuan_boq,
+        "kode_ahsp": ambil("kode_ahsp"),
+        "uraian_ahsp": ambil("uraian_pekerjaan"),
+        "satuan_ahsp": ambil("satuan"),
+        "skor_leksikal": [skor[j].get(pilihan[j], np.nan) if pilihan[j] is not None else np.nan for j in baris_unik],
+        "sumber": [sumber[j] for j in baris_unik],
+        "kandidat": [";".join(kode_katalog[p] for p, _ in kandidat[j]) for j in baris_unik],
+    }, columns=KOLOM_PEMETAAN)
+
+
+# ==========================================
+# 4. CLI
+# ==========================================
+def main(argv=None):
+    from engine import ahsp_store
+    from engine.headless import baca_tabel
+    from engine.penjadwal_ai import jalankan, penjadwal_untuk
+
+    parser = argparse.ArgumentParser(description="Petakan uraian BOQ ke kode AHSP (retrieval lokal + AI opsional).")
+    parser.add_argument("boq", help="File BOQ (CSV/XLSX/Parquet) dengan kolom uraian (dan opsional satuan)")
+    parser.add_argument("--master", required=True, help="Master AHSP (CSV/XLSX)")
+    parser.add_argument("--bidang", help="Batasi kandidat ke satu bidang (misal sda)")
+    parser.add_argument("--kolom-uraian", default="uraian", help="Nama kolom uraian di BOQ")
+    parser.add_argument("--kolom-satuan", default="satuan", help="Nama kolom satuan di BOQ (dilewati jika tidak ada)")
+    parser.add_argument("--k", type=int, default=K_KANDIDAT, help="Kandidat per baris di prompt")
+    parser.add_argument("--batch", type=int, default=UKURAN_BATCH, help="Baris per panggilan AI")
+    parser.add_argument("--api-key", help="Google Gemini API key; tanpa ini hanya retrieval leksikal")
+    parser.add_argument("--model", help="Model pilihan (default: model pertama halaman Konsultan AI)")
+    parser.add_argument("--output", help="Tulis hasil ke CSV/XLSX (default: cetak ke layar)")
+    args = parser.parse_args(argv)
+
+    katalog = ahsp_store.muat_master(args.master).to_dataframe(args.bidang)
+    df_boq = baca_tabel(args.boq)
+    if args.kolom_uraian not in df_boq.columns:
+        parser.error(f"BOQ tidak memiliki kolom '{args.kolom_uraian}'")
+    satuan = df_boq[args.kolom_satuan] if args.kolom_satuan in df_boq.columns else None
+    penjadwal = penjadwal_untuk(args.api_key) if args.api_key else None
+
+    df = jalankan(petakan_boq(df_boq[args.kolom_uraian], katalog, satuan, penjadwal, args.k, args.batch, args.model))
+    if args.output and args.output.lower().endswith(".xlsx"):
+        df.to_excel(args.output, index=False)
+    elif args.output:
+        df.to_csv(args.output, index=False)
+    else:
+        print(df[["uraian_boq", "kode_ahsp", "uraian_ahsp", "sumber"]].to_string(index=False))
+    print(f"{len(df)} baris: " + ", ".join(f"{n} {s}" for s, n in df["sumber"].value_counts().items()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
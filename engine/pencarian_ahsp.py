@@ -0,0 +1,239 @@
+import hashlib
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 1. TOKENISASI (BAHASA INDONESIA)
+# ==========================================
+# Token boleh memuat . - / di tengah agar kode ("T.01.a") dan ukuran ("2/3", "20x20")
+# tetap utuh; sisanya dipotong di karakter non-alfanumerik.
+_POLA_TOKEN = re.compile(r"[0-9a-z]+(?:[./\-][0-9a-z]+)*")
+KATA_HENTI = frozenset({
+    "dan", "dengan", "untuk", "yang", "di", "ke", "dari", "per", "atau", "pada",
+    "sampai", "sd", "setiap", "tiap", "secara", "oleh", "dalam", "atas", "tsb",
+})
+# Awalan nasal: (awalan, pengganti huruf awal kata dasar bila diikuti vokal)
+_AWALAN_NASAL = (("peng", "k"), ("meng", "k"), ("peny", "s"), ("meny", "s"), ("pem", "p"), ("mem", "p"), ("pen", "t"), ("men", "t"))
+_VOKAL = frozenset("aeiou")
+
+BOBOT_PERSIS = 1.0
+BOBOT_AWALAN = 0.7
+BOBOT_SALAH_KETIK = 0.5
+BOBOT_KODE = 5.0
+MAKS_PERLUASAN_AWALAN = 200
+
+
+def akar_kata(kata):
+    """
+    Stemmer ringan bahasa Indonesia untuk uraian pekerjaan.
+
+    Hanya memotong imbuhan yang umum di AHSP (pe-/me- nasal, penge-, di-, ber-, -an, -kan, -nya),
+    sehingga "pemasangan" -> "pasang", "galian" -> "gali", "pengecatan" -> "cat",
+    "penimbunan" -> "timbun". Kata pendek/angka dibiarkan.
+    """
+    if len(kata) < 5 or not kata.isalpha():
+        return kata
+    for akhiran in ("nya", "kan", "an"):
+        if kata.endswith(akhiran) and len(kata) - len(akhiran) >= 4:
+            kata = kata[:-len(akhiran)]
+            break
+    if kata.startswith(("penge", "menge")) and len(kata) - 5 >= 3:
+        return kata[5:]
+    for awalan, pengganti in _AWALAN_NASAL:
+        if kata.startswith(awalan) and len(kata) - len(awalan) >= 3:
+            sisa = kata[len(awalan):]
+            return pengganti + sisa if sisa[0] in _VOKAL else sisa
+    for awalan in ("ber", "di", "pe", "me"):
+        if kata.startswith(awalan) and len(kata) - len(awalan) >= 4:
+            return kata[len(awalan):]
+    return kata
+
+
+def tokenisasi(teks):
+    """Memecah teks menjadi token akar kata (casefold, tanpa kata henti)."""
+    return [akar_kata(t) for t in _POLA_TOKEN.findall(str(teks).casefold()) if t not in KATA_HENTI]
+
+
+def _variasi_hapus(term):
+    """Semua varian term dengan satu huruf dihapus (symmetric delete, jarak edit 1)."""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+# ==========================================
+# 2. INDEKS TERBALIK
+# ==========================================
+class IndeksAHSP:
+    """
+    Indeks terbalik (inverted index) di memori atas kode dan uraian AHSP.
+
+    Dibangun sekali per versi master. Kueri dicocokkan per token dengan tiga tingkat:
+    persis, awalan (untuk ketik-sambil-cari) dan salah ketik satu huruf (symmetric delete),
+    diberi bobot IDF, lalu diurutkan berdasarkan jumlah token kueri yang terpenuhi,
+    skor, dan urutan asli. Awalan kode AHSP ("T.01") mendapat bobot tambahan.
+
+    Args:
+        kode (list-like): Kode AHSP per item.
+        uraian (list-like): Uraian pekerjaan per item.
+
+    Attributes:
+        label (list): Label tampilan "kode - uraian" per item (untuk format_func tanpa df.loc).
+    """
+
+    __slots__ = ("kode", "uraian", "label", "_kode_urut", "_posisi_kode_urut", "_vocab", "_posting", "_idf", "_hapus")
+
+    def __init__(self, kode, uraian):
+        self.kode = [str(k) for k in kode]
+        self.uraian = [str(u) for u in uraian]
+        self.label = [f"{k} - {u}" for k, u in zip(self.kode, self.uraian)]
+        n = len(self.kode)
+
+        posting = defaultdict(set)
+        for i, (k, u) in enumerate(zip(self.kode, self.uraian)):
+            for token in tokenisasi(k) + tokenisasi(u):
+                posting[token].add(i)
+
+        self._vocab = sorted(posting)
+        self._posting = [np.fromiter(sorted(posting[t]), dtype=np.int32) for t in self._vocab]
+        self._idf = np.array([math.log(1 + n / len(p)) for p in self._posting])
+        self._hapus = defaultdict(list)
+        for id_term, term in enumerate(self._vocab):
+            if len(term) >= 4 and term.isalpha():
+                for varian in _variasi_hapus(term):
+                    self._hapus[varian].append(id_term)
+
+        kode_lower = [k.casefold() for k in self.kode]
+        urutan = sorted(range(n), key=kode_lower.__getitem__)
+        self._kode_urut = [kode_lower[i] for i in urutan]
+        self._posisi_kode_urut = np.asarray(urutan, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.kode)
+
+    @classmethod
+    def dari_dataframe(cls, df, kolom_kode="kode", kolom_uraian="uraian"):
+        return cls(df[kolom_kode].tolist(), df[kolom_uraian].tolist())
+
+    def _kandidat_term(self, token):
+        """Dict {id term: bobot} untuk satu token kueri: persis, awalan, lalu salah ketik jika kosong."""
+        i = bisect_left(self._vocab, token)
+        kandidat = {}
+        if i < len(self._vocab) and self._vocab[i] == token:
+            kandidat[i] = BOBOT_PERSIS
+        for j in range(i, min(i + MAKS_PERLUASAN_AWALAN, len(self._vocab))):
+            if not self._vocab[j].startswith(token):
+                break
+            kandidat.setdefault(j, BOBOT_AWALAN)
+        if not kandidat and len(token) >= 4 and token.isalpha():
+            # Substitusi/transposisi (varian hapus sama) dan kueri kurang satu huruf
+            for varian in _variasi_hapus(token) | {token}:
+                for j in self._hapus.get(varian, ()):
+                    kandidat.setdefault(j, BOBOT_SALAH_KETIK)
+            # Kueri kelebihan satu huruf: varian hapusnya sendiri ada di vocab
+            for varian in _variasi_hapus(token):
+                j = bisect_left(self._vocab, varian)
+                if j < len(self._vocab) and self._vocab[j] == varian:
+                    kandidat.setdefault(j, BOBOT_SALAH_KETIK)
+        return kandidat
+
+    def cari_skor(self, kueri, batas=20):
+        """
+        Mencari item yang paling cocok dengan kueri.
+
+        Args:
+            kueri (str): Teks bebas, kode ("T.01"), boleh tidak lengkap / salah ketik.
+            batas (int): Jumlah hasil maksimum.
+
+        Returns:
+            list: [(posisi item, skor)] terurut dari yang paling relevan.
+        """
+        token_kueri = tokenisasi(kueri)
+        n = len(self)
+        if not token_kueri or not n:
+            return []
+
+        skor = np.zeros(n)
+        terpenuhi = np.zeros(n, dtype=np.int32)
+        for token in token_kueri:
+            # Semua token boleh dicocokkan sebagai awalan (token terakhir biasanya sedang diketik)
+            skor_token = np.zeros(n)
+            for id_term, bobot in self._kandidat_term(token).items():
+                posting = self._posting[id_term]
+                skor_token[posting] = np.maximum(skor_token[posting], bobot * self._idf[id_term])
+            skor += skor_token
+            terpenuhi += skor_token > 0
+
+        # Bonus awalan kode AHSP (kueri utuh, tanpa tokenisasi)
+        kueri_kode = kueri.strip().casefold()
+        awal = bisect_left(self._kode_urut, kueri_kode)
+        akhir = bisect_left(self._kode_urut, kueri_kode + "\uffff", lo=awal)
+        if akhir > awal:
+            posisi_kode = self._posisi_kode_urut[awal:akhir]
+            skor[posisi_kode] += BOBOT_KODE
+            terpenuhi[posisi_kode] = len(token_kueri)
+
+        kandidat = np.flatnonzero(terpenuhi)
+        if not len(kandidat):
+            return []
+        urut = np.lexsort((kandidat, -skor[kandidat], -terpenuhi[kandidat]))[:batas]
+        return [(int(kandidat[i]), float(skor[kandidat[i]])) for i in urut]
+
+    def cari(self, kueri, batas=20):
+        """Seperti cari_skor, hanya mengembalikan posisi item."""
+        return [posisi for posisi, _ in self.cari_skor(kueri, batas)]
+
+
+# ==========================================
+# 3. CACHE INDEKS PER VERSI DATA
+# ==========================================
+_CACHE_INDEKS = {}
+
+
+def indeks_dataframe(df, kolom_kode="kode", kolom_uraian="uraian"):
+    """
+    IndeksAHSP untuk DataFrame sembarang (misal Excel upload di halaman CK/BM),
+    dibangun ulang hanya jika isi kolom kode/uraian berubah. Kolom kode boleh tidak ada.
+    """
+    kode = df[kolom_kode].astype(str) if kolom_kode in df.columns else pd.Series([""] * len(df), index=df.index)
+    uraian = df[kolom_uraian].astype(str)
+    # Hash berurutan (bukan jumlah hash baris): urutan baris ikut menentukan posisi hasil pencarian
+    hash_baris = pd.util.hash_pandas_object(kode + "\x1f" + uraian, index=False).to_numpy()
+    versi = (len(df), hashlib.blake2b(hash_baris.tobytes(), digest_size=16).digest())
+    indeks = _CACHE_INDEKS.get(versi)
+    if indeks is None:
+        if len(_CACHE_INDEKS) > 16:
+            _CACHE_INDEKS.clear()
+        indeks = _CACHE_INDEKS[versi] = IndeksAHSP(kode.tolist(), uraian.tolist())
+    return indeks
+
+
+# ==========================================
+# 4. PICKER STREAMLIT (CARI SAMBIL KETIK)
+# ==========================================
+def pilih_ahsp(indeks, label="Cari Pekerjaan (kode / uraian):", key="ahsp", batas=50):
+    """
+    Kotak cari + selectbox hasil teratas, pengganti selectbox berisi seluruh master.
+
+    Selectbox hanya memuat maksimal `batas` hasil dan label diambil dari indeks.label
+    (tanpa df.loc per opsi). Streamlit diimpor di sini saja agar modul tetap bisa
+    dipakai tanpa Streamlit (headless/CLI).
+
+    Returns:
+        int | None: Posisi item terpilih (pakai df.iloc), None jika tidak ada hasil.
+    """
+    import streamlit as st
+
+    kueri = st.text_input(label, key=f"{key}_kueri", placeholder="misal: galian tanah, pasang bata, T.01")
+    if kueri.strip():
+        posisi = indeks.cari(kueri, batas)
+        if not posisi:
+            st.info(f"Tidak ada pekerjaan yang cocok dengan '{kueri}'.")
+            return None
+    else:
+        posisi = list(range(min(batas, len(indeks))))
+    keterangan = f"Hasil pencarian ({len(posisi)} teratas)" if kueri.strip() else f"Pilih Pekerjaan ({len(indeks)} item, ketik di atas untuk mencari)"
+    return st.selectbox(keterangan, posisi, format_func=indeks.label.__getitem__, key=f"{key}_pilih")
@@ -0,0 +1,119 @@
+import re
+from bisect import bisect_left
+from typing import NamedTuple
+
+# ==========================================
+# 1. ATURAN PENCOCOKAN (URUT PRIORITAS)
+# ==========================================
+# exact      : nama persis sama dengan kunci harga
+# casefold   : sama jika huruf besar/kecil diabaikan
+# prefix     : nama adalah awalan kunci harga ("Semen PC" -> "Semen PC (Kg)")
+# token      : semua kata pada nama ada di kunci harga ("Batu Pecah" -> "Batu Pecah 2/3 (m3)")
+# bagian     : kunci harga adalah rangkaian kata di dalam nama ("Semen PC 50kg" -> "Semen PC")
+# Aturan fallback yang menemukan lebih dari satu kandidat tidak menebak ("Pasir" bisa
+# "Pasir Pasang" atau "Pasir Beton"): hasilnya AMBIGU, harga 0, kandidat dilaporkan.
+# Pada aturan bagian, kunci yang tercakup kunci lain yang lebih panjang ("Semen" di dalam
+# "Semen PC") bukan kandidat tersendiri.
+ATURAN = ("exact", "casefold", "prefix", "token", "bagian")
+TIDAK_DITEMUKAN = "tidak_ditemukan"
+AMBIGU = "ambigu"
+
+_POLA_TOKEN = re.compile(r"[0-9a-z]+")
+
+
+def _token(teks):
+    return _POLA_TOKEN.findall(str(teks).casefold())
+
+
+class HasilCocok(NamedTuple):
+    harga: float
+    aturan: str
+    kunci: str | None
+    kandidat: tuple = ()
+
+
+class PencocokHarga:
+    """
+    Indeks harga dasar untuk mencocokkan nama sumber daya AHSP ke daftar harga.
+
+    Indeks dibangun sekali per daftar harga (O(n log n)), setelah itu setiap
+    pencarian O(1) untuk exact/casefold dan O(log n) untuk prefix.
+
+    Args:
+        harga (dict): Daftar harga {nama item: harga satuan}.
+    """
+
+    def __init__(self, harga: dict):
+        self._harga = dict(harga)
+        self._casefold = {}
+        self._norm = {}
+        # token -> {kunci: None}: dict berurutan sekaligus uji keanggotaan O(1) saat irisan
+        self._posting = {}
+        for kunci in self._harga:
+            self._casefold.setdefault(str(kunci).casefold(), kunci)
+            token = _token(kunci)
+            self._norm.setdefault(" ".join(token), kunci)
+            for t in set(token):
+                self._posting.setdefault(t, {})[kunci] = None
+        self._urut = sorted(self._casefold)
+        self._panjang_maks = max((len(_token(k)) for k in self._harga), default=0)
+
+    def __len__(self):
+        return len(self._harga)
+
+    def cari(self, nama) -> HasilCocok:
+        """Mencari harga untuk satu nama sumber daya dan melaporkan aturan yang dipakai."""
+        if nama in self._harga:
+            return HasilCocok(self._harga[nama], "exact", nama)
+
+        nama_cf = str(nama).casefold()
+        kunci = self._casefold.get(nama_cf)
+        if kunci is not None:
+            return HasilCocok(self._harga[kunci], "casefold", kunci)
+
+        for aturan, cari in (("prefix", self._cari_prefix), ("token", self._cari_token), ("bagian", self._cari_bagian)):
+            kandidat = cari(nama_cf)
+            if len(kandidat) == 1:
+                return HasilCocok(self._harga[kandidat[0]], aturan, kandidat[0])
+            if kandidat:
+                return HasilCocok(0, AMBIGU, None, tuple(kandidat))
+
+        return HasilCocok(0, TIDAK_DITEMUKAN, None)
+
+    def harga(self, nama):
+        """Seperti cari(), tetapi hanya mengembalikan harganya (0 jika tidak ditemukan atau ambigu)."""
+        return self.cari(nama).harga
+
+    def cocokkan(self, daftar_nama):
+        """Mencocokkan banyak nama sekaligus. Returns: dict {nama: HasilCocok}."""
+        return {nama: self.cari(nama) for nama in daftar_nama}
+
+    # --- aturan fallback: masing-masing mengembalikan list kandidat kunci (kosong = tidak cocok) ---
+    def _cari_prefix(self, nama_cf):
+        if not nama_cf:
+            return []
+        kandidat = []
+        i = bisect_left(self._urut, nama_cf)
+        while i < len(self._urut) and self._urut[i].startswith(nama_cf):
+            kandidat.append(self._casefold[self._urut[i]])
+            i += 1
+        return kandidat
+
+    def _cari_token(self, nama_cf):
+        token = set(_token(nama_cf))
+        if not token:
+            return []
+        posting = sorted((self._posting.get(t, ()) for t in token), key=len)
+        # Hanya posting terpendek yang diiterasi; posting lain (misal token umum "semen") cukup diuji keanggotaannya
+        kandidat = [k for k in posting[0] if all(k in p for p in posting[1:])]
+        return sorted(kandidat, key=lambda k: (len(str(k)), str(k)))
+
+    def _cari_bagian(self, nama_cf):
+        token = _token(nama_cf)
+        cocok = []  # (awal, akhir, kunci), rangkaian terpanjang lebih dulu
+        for panjang in range(min(len(token), self._panjang_maks), 0, -1):
+            for awal in range(len(token) - panjang + 1):
+                kunci = self._norm.get(" ".join(token[awal:awal + panjang]))
+                if kunci is not None and not any(a <= awal and awal + panjang <= b for a, b, _ in cocok):
+                    cocok.append((awal, awal + panjang, kunci))
+        return list(dict.fromkeys(kunci for _, _, kunci in cocok))
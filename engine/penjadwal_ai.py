@@ -0,0 +1,273 @@
+"""
+Penjadwal asyncio untuk panggilan AI: rate limit token bucket per model, retry 429
+dengan backoff eksponensial, fallback antar model, dan batch pertanyaan konkuren.
+
+Contoh (offline, backend palsu):
+    from engine.ai_engine import BackendLokal
+    from engine.penjadwal_ai import PenjadwalAI, jalankan
+
+    penjadwal = PenjadwalAI(BackendLokal(error={"gemini-2.0-flash": ["429 quota"] * 5}))
+    hasil = jalankan(penjadwal.tanya_banyak("💰 Ahli Estimator (QS)", ["Galian tanah?", "Pasang bata?"]))
+"""
+import asyncio
+import inspect
+import random
+import threading
+import time
+from typing import NamedTuple
+
+from engine.ai_engine import (
+    CACHE_JAWABAN, PILIHAN_MODEL, CacheJawaban, backend_gemini, pesan_error, stream_jawaban, susun_prompt,
+)
+
+# Batas permintaan per menit per model (kuota free tier Gemini); sesuaikan dengan kuota key
+BATAS_RPM_DEFAULT = {
+    "gemini-2.0-flash": 15,
+    "gemini-1.5-flash": 15,
+    "gemini-1.5-pro": 2,
+    "gemini-pro": 60,
+}
+RPM_MODEL_LAIN = 10
+URUTAN_MODEL = list(PILIHAN_MODEL.values())
+
+
+class HasilAI(NamedTuple):
+    pertanyaan: str
+    jawaban: str              # jawaban, atau pesan error ramah user (lihat ai_engine.pesan_error)
+    model_name: str           # model yang menjawab (atau model terakhir yang dicoba)
+    sukses: bool
+    percobaan: int            # jumlah panggilan backend (0 = dari cache)
+    dari_cache: bool
+
+
+def kena_limit(error):
+    return "429" in str(error)
+
+
+def model_tidak_ada(error):
+    return "404" in str(error)
+
+
+# ==========================================
+# 1. TOKEN BUCKET
+# ==========================================
+class TokenBucket:
+    """
+    Token bucket berbasis reservasi: setiap panggilan memesan satu token dan menunggu
+    hingga token itu tersedia.
+
+    State dijaga threading.Lock (bukan asyncio.Lock), sehingga satu bucket bisa dipakai
+    bersama oleh banyak event loop — tiap sesi Streamlit menjalankan loop-nya sendiri di
+    thread-nya sendiri, tetapi kuota API key-nya sama.
+
+    Args:
+        laju_per_detik (float): Token yang diisi ulang per detik.
+        kapasitas (float): Ledakan (burst) maksimum.
+    """
+
+    def __init__(self, laju_per_detik, kapasitas=1.0, waktu=time.monotonic):
+        self.laju_per_detik = laju_per_detik
+        self.kapasitas = kapasitas
+        self._waktu = waktu
+        self._token = kapasitas
+        self._terakhir = waktu()
+        self._lock = threading.Lock()
+
+    def pesan(self):
+        """Memesan satu token; mengembalikan detik tunggu sampai token itu boleh dipakai."""
+        with self._lock:
+            sekarang = self._waktu()
+            self._token = min(self.kapasitas, self._token + (sekarang - self._terakhir) * self.laju_per_detik)
+            self._terakhir = sekarang
+            self._token -= 1
+            return 0.0 if self._token >= 0 else -self._token / self.laju_per_detik
+
+    async def ambil(self, tidur=asyncio.sleep):
+        tunggu = self.pesan()
+        if tunggu > 0:
+            await tidur(tunggu)
+
+
+# ==========================================
+# 2. PENJADWAL
+# ==========================================
+class PenjadwalAI:
+    """
+    Penjadwal panggilan AI untuk satu backend (satu API key).
+
+    Urutan per pertanyaan: cache -> model pilihan (retry 429 dengan backoff eksponensial
+    + jitter, maks `maks_retry` kali) -> model berikutnya di `urutan_model` bila masih 429
+    atau model tidak ada (404). Error lain langsung dikembalikan tanpa fallback.
+    Backend sinkron dijalankan di thread pool (asyncio.to_thread) agar tidak memblokir loop.
+
+    Args:
+        backend (callable): (model_name, prompt) -> teks (lihat ai_engine.BackendGemini/BackendLokal).
+        urutan_model (list, optional): Urutan fallback. Default: model halaman Konsultan AI.
+        batas_rpm (dict, optional): {model_name: permintaan per menit}. Default: BATAS_RPM_DEFAULT.
+        maks_retry (int): Retry 429 per model sebelum pindah model.
+        jeda_awal (float): Backoff pertama (detik); berlipat dua tiap retry.
+        maks_jeda (float): Batas atas backoff.
+        maks_konkuren (int): Panggilan backend bersamaan maksimum (per batch).
+        cache (CacheJawaban, optional): None untuk mematikan cache.
+    """
+
+    def __init__(self, backend, urutan_model=None, batas_rpm=None, maks_retry=3, jeda_awal=1.0, maks_jeda=30.0,
+                 maks_konkuren=4, cache=CACHE_JAWABAN, tidur=asyncio.sleep):
+        self.backend = backend
+        self.urutan_model = list(urutan_model or URUTAN_MODEL)
+        self.batas_rpm = {**BATAS_RPM_DEFAULT, **(batas_rpm or {})}
+        self.maks_retry = maks_retry
+        self.jeda_awal = jeda_awal
+        self.maks_jeda = maks_jeda
+        self.maks_konkuren = maks_konkuren
+        self.cache = cache
+        self._tidur = tidur
+        self._bucket = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, model_name):
+        with self._lock:
+            bucket = self._bucket.get(model_name)
+            if bucket is None:
+                rpm = self.batas_rpm.get(model_name, RPM_MODEL_LAIN)
+                bucket = self._bucket[model_name] = TokenBucket(rpm / 60, kapasitas=max(1.0, rpm / 10))
+            return bucket
+
+    def _jeda_backoff(self, ke):
+        jeda = min(self.maks_jeda, self.jeda_awal * 2 ** ke)
+        return jeda * random.uniform(0.5, 1.0)  # jitter: sesi lain tidak retry bersamaan
+
+    async def _panggil(self, model_name, prompt):
+        await self.bucket(model_name).ambil(self._tidur)
+        if inspect.iscoroutinefunction(self.backend):
+            return await self.backend(model_name, prompt)
+        return await asyncio.to_thread(self.backend, model_name, prompt)
+
+    async def tanya(self, tipe_ahli, pertanyaan, model_name=None):
+        """
+        Menjawab satu pertanyaan dengan retry dan fallback.
+
+        Args:
+            tipe_ahli (str): Kunci ai_engine.PERSONAS.
+            pertanyaan (str): Pertanyaan user.
+            model_name (str, optional): Model pilihan; dicoba paling awal. Default: model pertama.
+
+        Returns:
+            HasilAI
+        """
+        model_name = model_name or self.urutan_model[0]
+        kunci = CacheJawaban.kunci(tipe_ahli, model_name, pertanyaan)
+        if self.cache is not None:
+            jawaban = self.cache.ambil(kunci)
+            if jawaban is not None:
+                return HasilAI(pertanyaan, jawaban, model_name, True, 0, True)
+
+        prompt = susun_prompt(tipe_ahli, pertanyaan)
+        kandidat = [model_name] + [m for m in self.urutan_model if m != model_name]
+        percobaan = 0
+        error_terakhir, model_terakhir = None, model_name
+        for model in kandidat:
+            for ke in range(self.maks_retry + 1):
+                percobaan += 1
+                try:
+                    jawaban = await self._panggil(model, prompt)
+                except Exception as e:
+                    error_terakhir, model_terakhir = e, model
+                    if kena_limit(e) and ke < self.maks_retry:
+                        await self._tidur(self._jeda_backoff(ke))
+                        continue
+                    if kena_limit(e) or model_tidak_ada(e):
+                        break  # fallback ke model berikutnya
+                    return HasilAI(pertanyaan, pesan_error(e, model), model, False, percobaan, False)
+                if self.cache is not None:
+                    # Kunci model yang benar-benar menjawab: jawaban fallback tidak boleh
+                    # dikembalikan sebagai jawaban model pilihan pada pertanyaan berikutnya
+                    self.cache.simpan(CacheJawaban.kunci(tipe_ahli, model, pertanyaan), jawaban)
+                return HasilAI(pertanyaan, jawaban, model, True, percobaan, False)
+        return HasilAI(pertanyaan, pesan_error(error_terakhir, model_terakhir), model_terakhir, False, percobaan, False)
+
+    def tanya_stream(self, tipe_ahli, pertanyaan, model_name=None):
+        """
+        Versi streaming tanya() sebagai generator sinkron (untuk st.write_stream).
+
+        Rate limit, retry 429 dan fallback model sama dengan tanya(), tetapi hanya mungkin
+        sebelum potongan pertama terkirim; error sesudahnya ditambahkan sebagai paragraf
+        terakhir (lihat ai_engine.tanya_ahli_stream). Bila dijawab model fallback, potongan
+        pertama berupa catatan model yang menjawab (tidak ikut disimpan ke cache) dan jawaban
+        disimpan di bawah kunci model fallback tersebut.
+
+        Yields:
+            str: Potongan jawaban Markdown.
+        """
+        model_name = model_name or self.urutan_model[0]
+        kunci = CacheJawaban.kunci(tipe_ahli, model_name, pertanyaan)
+        if self.cache is not None:
+            jawaban = self.cache.ambil(kunci)
+            if jawaban is not None:
+                yield jawaban
+                return
+
+        prompt = susun_prompt(tipe_ahli, pertanyaan)
+        kandidat = [model_name] + [m for m in self.urutan_model if m != model_name]
+        error_terakhir, model_terakhir = None, model_name
+        for model in kandidat:
+            for ke in range(self.maks_retry + 1):
+                time.sleep(self.bucket(model).pesan())
+                potongan_jawaban = []
+                try:
+                    for potongan in stream_jawaban(self.backend, model, prompt):
+                        if not potongan_jawaban and model != model_name:
+                            yield f"_ℹ️ `{model_name}` sedang limit, dijawab oleh `{model}`._\n\n"
+                        potongan_jawaban.append(potongan)
+                        yield potongan
+                except Exception as e:
+                    if potongan_jawaban:
+                        yield "\n\n" + pesan_error(e, model)
+                        return
+                    error_terakhir, model_terakhir = e, model
+                    if kena_limit(e) and ke < self.maks_retry:
+                        time.sleep(self._jeda_backoff(ke))
+                        continue
+                    if kena_limit(e) or model_tidak_ada(e):
+                        break
+                    yield pesan_error(e, model)
+                    return
+                if self.cache is not None:
+                    self.cache.simpan(CacheJawaban.kunci(tipe_ahli, model, pertanyaan), "".join(potongan_jawaban))
+                return
+        yield pesan_error(error_terakhir, model_terakhir)
+
+    async def tanya_banyak(self, tipe_ahli, daftar_pertanyaan, model_name=None):
+        """
+        Menjawab banyak pertanyaan secara konkuren (maks `maks_konkuren` sekaligus).
+
+        Returns:
+            list: HasilAI sesuai urutan daftar_pertanyaan.
+        """
+        semafor = asyncio.Semaphore(self.maks_konkuren)
+
+        async def satu(pertanyaan):
+            async with semafor:
+                return await self.tanya(tipe_ahli, pertanyaan, model_name)
+
+        return list(await asyncio.gather(*(satu(p) for p in daftar_pertanyaan)))
+
+
+_PENJADWAL = {}
+
+
+def penjadwal_untuk(api_key):
+    """PenjadwalAI bersama per API key, agar semua sesi berbagi rate limit key yang sama."""
+    penjadwal = _PENJADWAL.get(api_key)
+    if penjadwal is None:
+        penjadwal = _PENJADWAL.setdefault(api_key, PenjadwalAI(backend_gemini(api_key)))
+    return penjadwal
+
+
+def jalankan(coroutine):
+    """
+    Menjalankan coroutine penjadwal dari kode sinkron (skrip Streamlit / CLI).
+
+    Skrip Streamlit berjalan di thread tanpa event loop, jadi cukup asyncio.run.
+    """
+    return asyncio.run(coroutine)
@@ -0,0 +1,444 @@
+"""
+Penyimpanan proyek RAB di SQLite lokal: proyek, baris BOQ dan snapshot harga dasar.
+
+- Baris BOQ disimpan di tabel WITHOUT ROWID dengan kunci (id_proyek, no), sehingga baris satu
+  proyek berdampingan di disk dan dibaca per halaman dengan keyset (no > terakhir), bukan
+  OFFSET yang makin lambat di halaman belakang.
+- Indeks kode AHSP untuk mencari proyek yang memakai suatu pekerjaan.
+- Simpan = satu transaksi executemany; halaman Streamlit cukup memegang satu halaman
+  baris sekaligus saat membuka proyek besar.
+- Snapshot harga hanya arsip: halaman selalu menghitung ulang proyek yang dibuka dengan
+  harga dasar aktif dan tidak memulihkan snapshot; bacalah lewat ProyekStore.snapshot_harga.
+  Harga kosong/bukan angka tidak ikut disimpan.
+- pengaturan_proyek / panel_proyek: widget sidebar yang sama untuk halaman SDA, CK dan BM.
+
+Contoh:
+    python -m engine.proyek_store daftar
+    python -m engine.proyek_store impor boq_rab.xlsx --nama "Bendung A" --bidang sda
+    python -m engine.proyek_store ekspor "Bendung A" --output rab_bendung_a.csv
+"""
+import argparse
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from engine.batch_engine import NAMA_KOLOM_RAB
+from engine.keranjang_rab import KOLOM_ANGKA, KOLOM_TEKS
+
+PATH_DEFAULT = os.path.join("data", "proyek.db")
+UKURAN_HALAMAN = 5000
+
+# Kolom DataFrame RAB (urutan keranjang / export_to_excel) -> kolom tabel baris_boq
+_NAMA_TABEL = {
+    "kode_ahsp": "kode_ahsp", "Uraian Pekerjaan": "uraian", "Satuan": "satuan",
+    "Volume": "volume", "PPN (%)": "persen_ppn",
+    **{nama: kunci for kunci, nama in NAMA_KOLOM_RAB.items()},
+}
+KOLOM_BOQ = {kolom: _NAMA_TABEL[kolom] for kolom in (*KOLOM_TEKS, *KOLOM_ANGKA)}
+_KOLOM_TEKS_BOQ = tuple(KOLOM_BOQ[kolom] for kolom in KOLOM_TEKS)
+
+SKEMA = f"""
+CREATE TABLE IF NOT EXISTS proyek (
+    id_proyek INTEGER PRIMARY KEY,
+    nama TEXT NOT NULL,
+    bidang TEXT NOT NULL DEFAULT '',
+    persen_overhead REAL NOT NULL DEFAULT 15.0,
+    persen_ppn REAL NOT NULL DEFAULT 11.0,
+    dibuat TEXT NOT NULL,
+    diubah TEXT NOT NULL,
+    UNIQUE (bidang, nama)
+);
+CREATE TABLE IF NOT EXISTS baris_boq (
+    id_proyek INTEGER NOT NULL REFERENCES proyek (id_proyek) ON DELETE CASCADE,
+    no INTEGER NOT NULL,
+    {", ".join(f"{k} TEXT NOT NULL DEFAULT ''" for k in _KOLOM_TEKS_BOQ)},
+    {", ".join(f"{k} REAL" for k in KOLOM_BOQ.values() if k not in _KOLOM_TEKS_BOQ)},
+    PRIMARY KEY (id_proyek, no)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_baris_boq_kode ON baris_boq (kode_ahsp, id_proyek);
+CREATE TABLE IF NOT EXISTS snapshot_harga (
+    id_snapshot INTEGER PRIMARY KEY,
+    id_proyek INTEGER NOT NULL REFERENCES proyek (id_proyek) ON DELETE CASCADE,
+    dibuat TEXT NOT NULL,
+    keterangan TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_snapshot_proyek ON snapshot_harga (id_proyek, id_snapshot);
+CREATE TABLE IF NOT EXISTS harga_snapshot (
+    id_snapshot INTEGER NOT NULL REFERENCES snapshot_harga (id_snapshot) ON DELETE CASCADE,
+    nama_item TEXT NOT NULL,
+    harga_satuan REAL NOT NULL,
+    PRIMARY KEY (id_snapshot, nama_item)
+) WITHOUT ROWID;
+"""
+
+
+def _sekarang():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class ProyekStore:
+    """
+    Basis data proyek di satu file SQLite.
+
+    Setiap operasi membuka koneksinya sendiri (murah untuk SQLite lokal), sehingga satu
+    objek aman dipakai bersama oleh banyak sesi/thread Streamlit. Mode WAL membuat
+    pembacaan tidak menunggu penulisan sesi lain.
+
+    Args:
+        path (str): Path file database (dibuat bila belum ada).
+    """
+
+    def __init__(self, path=PATH_DEFAULT):
+        self.path = path
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        with self._koneksi() as kon:
+            kon.execute("PRAGMA journal_mode=WAL")
+            kon.executescript(SKEMA)
+
+    @contextmanager
+    def _koneksi(self):
+        kon = sqlite3.connect(self.path, timeout=30)
+        try:
+            kon.execute("PRAGMA foreign_keys=ON")
+            kon.execute("PRAGMA synchronous=NORMAL")
+            with kon:  # commit / rollback otomatis
+                yield kon
+        finally:
+            kon.close()
+
+    # ------------------------------------------
+    # TULIS
+    # ------------------------------------------
+    def simpan_proyek(self, nama, df_rab, bidang="", persen_overhead=15.0, persen_ppn=11.0, harga=None,
+                      keterangan_harga=""):
+        """
+        Menyimpan (atau menimpa) satu proyek beserta seluruh baris BOQ-nya dalam satu transaksi.
+
+        Args:
+            nama (str): Nama proyek (unik per bidang).
+            df_rab (pd.DataFrame): Tabel RAB berkolom seperti keranjang (kunci KOLOM_BOQ);
+                                   kolom yang tidak ada disimpan NULL/kosong.
+            bidang (str): 'sda', 'ck', 'bm', ...
+            persen_overhead, persen_ppn (float): Pengaturan proyek.
+            harga (dict, optional): Daftar harga dasar aktif, disimpan sebagai snapshot baru
+                                    (arsip; item tanpa harga angka dilewati).
+            keterangan_harga (str): Keterangan snapshot (misal sumber harga).
+
+        Returns:
+            int: id_proyek.
+        """
+        sekarang = _sekarang()
+        with self._koneksi() as kon:
+            kon.execute(
+                "INSERT INTO proyek (nama, bidang, persen_overhead, persen_ppn, dibuat, diubah) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (bidang, nama) DO UPDATE SET persen_overhead = excluded.persen_overhead, "
+                "persen_ppn = excluded.persen_ppn, diubah = excluded.diubah",
+                (nama, bidang, float(persen_overhead), float(persen_ppn), sekarang, sekarang),
+            )
+            id_proyek = kon.execute("SELECT id_proyek FROM proyek WHERE bidang = ? AND nama = ?", (bidang, nama)).fetchone()[0]
+            kon.execute("DELETE FROM baris_boq WHERE id_proyek = ?", (id_proyek,))
+            self._tulis_baris(kon, id_proyek, df_rab)
+            if harga is not None:
+                self._tulis_snapshot(kon, id_proyek, harga, keterangan_harga, sekarang)
+        return id_proyek
+
+    def tambah_baris(self, id_proyek, df_rab):
+        """Menambahkan baris BOQ di belakang baris yang sudah ada (bulk insert, satu transaksi)."""
+        with self._koneksi() as kon:
+            self._tulis_baris(kon, id_proyek, df_rab)
+            kon.execute("UPDATE proyek SET diubah = ? WHERE id_proyek = ?", (_sekarang(), id_proyek))
+
+    def simpan_snapshot_harga(self, id_proyek, harga, keterangan=""):
+        """Menyimpan daftar harga dasar sebagai snapshot baru proyek. Returns: id_snapshot."""
+        with self._koneksi() as kon:
+            return self._tulis_snapshot(kon, id_proyek, harga, keterangan, _sekarang())
+
+    @staticmethod
+    def _tulis_baris(kon, id_proyek, df_rab):
+        n = len(df_rab)
+        awal = kon.execute("SELECT COALESCE(MAX(no), -1) + 1 FROM baris_boq WHERE id_proyek = ?", (id_proyek,)).fetchone()[0]
+        kolom_db = ["id_proyek", "no"]
+        kolom_nilai = [np.full(n, id_proyek).tolist(), list(range(awal, awal + n))]
+        for kolom_df, kolom_tabel in KOLOM_BOQ.items():
+            if kolom_df not in df_rab.columns:
+                continue
+            kolom_db.append(kolom_tabel)
+            if kolom_tabel in _KOLOM_TEKS_BOQ:
+                kolom_nilai.append(df_rab[kolom_df].astype(str).tolist())
+            else:
+                kolom_nilai.append(pd.to_numeric(df_rab[kolom_df], errors="coerce").astype(np.float64).tolist())
+        kon.executemany(
+            f"INSERT INTO baris_boq ({', '.join(kolom_db)}) VALUES ({', '.join('?' * len(kolom_db))})",
+            zip(*kolom_nilai),
+        )
+
+    @staticmethod
+    def _tulis_snapshot(kon, id_proyek, harga, keterangan, waktu):
+        id_snapshot = kon.execute(
+            "INSERT INTO snapshot_harga (id_proyek, dibuat, keterangan) VALUES (?, ?, ?)", (id_proyek, waktu, keterangan)
+        ).lastrowid
+        # Sel harga kosong / bukan angka (NaN, None, teks) tidak punya harga untuk diarsipkan
+        nilai = pd.to_numeric(pd.Series(list(harga.values()), dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+        valid = np.isfinite(nilai)
+        kon.executemany(
+            "INSERT INTO harga_snapshot (id_snapshot, nama_item, harga_satuan) VALUES (?, ?, ?)",
+            ((id_snapshot, str(nama), h) for nama, h, ok in zip(harga, nilai.tolist(), valid.tolist()) if ok),
+        )
+        return id_snapshot
+
+    def hapus_proyek(self, id_proyek):
+        """Menghapus proyek beserta baris BOQ dan snapshot harganya (ON DELETE CASCADE)."""
+        with self._koneksi() as kon:
+            kon.execute("DELETE FROM proyek WHERE id_proyek = ?", (id_proyek,))
+
+    # ------------------------------------------
+    # BACA
+    # ------------------------------------------
+    def daftar_proyek(self, bidang=None):
+        """
+        Daftar proyek beserta jumlah baris dan total (tanpa memuat barisnya).
+
+        Returns:
+            pd.DataFrame: Kolom id_proyek, nama, bidang, persen_overhead, persen_ppn, dibuat,
+                          diubah, jumlah_baris, total_dengan_ppn; terbaru lebih dulu.
+        """
+        sql = (
+            "SELECT p.id_proyek, p.nama, p.bidang, p.persen_overhead, p.persen_ppn, p.dibuat, p.diubah, "
+            "(SELECT COUNT(*) FROM baris_boq b WHERE b.id_proyek = p.id_proyek) AS jumlah_baris, "
+            "(SELECT COALESCE(SUM(b.total_dengan_ppn_item), 0) FROM baris_boq b WHERE b.id_proyek = p.id_proyek) AS total_dengan_ppn "
+            "FROM proyek p" + (" WHERE p.bidang = ?" if bidang is not None else "") + " ORDER BY p.diubah DESC, p.id_proyek DESC"
+        )
+        with self._koneksi() as kon:
+            return pd.read_sql_query(sql, kon, params=(bidang,) if bidang is not None else ())
+
+    def proyek(self, id_proyek):
+        """Metadata satu proyek sebagai dict (KeyError bila tidak ada)."""
+        with self._koneksi() as kon:
+            kon.row_factory = sqlite3.Row
+            baris = kon.execute("SELECT * FROM proyek WHERE id_proyek = ?", (id_proyek,)).fetchone()
+        if baris is None:
+            raise KeyError(f"Proyek {id_proyek} tidak ada.")
+        return dict(baris)
+
+    def baca_halaman(self, id_proyek, setelah_no=-1, batas=UKURAN_HALAMAN):
+        """
+        Satu halaman baris BOQ (keyset pagination).
+
+        Args:
+            id_proyek (int): Proyek.
+            setelah_no (int): Nomor baris terakhir halaman sebelumnya (-1 untuk halaman pertama).
+            batas (int): Jumlah baris maksimum.
+
+        Returns:
+            pd.DataFrame: Kolom 'no' lalu kolom DataFrame RAB (kunci KOLOM_BOQ); halaman
+                          berikutnya dimulai setelah df['no'].iloc[-1].
+        """
+        sql = (
+            f"SELECT no, {', '.join(KOLOM_BOQ.values())} FROM baris_boq "
+            "WHERE id_proyek = ? AND no > ? ORDER BY no LIMIT ?"
+        )
+        with self._koneksi() as kon:
+            df = pd.read_sql_query(sql, kon, params=(id_proyek, setelah_no, batas))
+        return df.rename(columns={kolom_tabel: kolom_df for kolom_df, kolom_tabel in KOLOM_BOQ.items()})
+
+    def iter_halaman(self, id_proyek, ukuran_halaman=UKURAN_HALAMAN):
+        """Generator halaman baris BOQ berurutan; memori dibatasi satu halaman."""
+        setelah_no = -1
+        while True:
+            df = self.baca_halaman(id_proyek, setelah_no, ukuran_halaman)
+            if df.empty:
+                return
+            yield df
+            if len(df) < ukuran_halaman:
+                return
+            setelah_no = int(df["no"].iloc[-1])
+
+    def baca_boq(self, id_proyek):
+        """Seluruh baris BOQ satu proyek (gabungan iter_halaman)."""
+        halaman = list(self.iter_halaman(id_proyek))
+        return pd.concat(halaman, ignore_index=True) if halaman else self.baca_halaman(id_proyek, batas=0)
+
+    def cari_kode(self, kode_ahsp):
+        """Proyek yang memakai satu kode AHSP beserta jumlah barisnya (memakai idx_baris_boq_kode)."""
+        sql = (
+            "SELECT p.id_proyek, p.nama, p.bidang, COUNT(*) AS jumlah_baris, SUM(b.volume) AS total_volume "
+            "FROM baris_boq b JOIN proyek p ON p.id_proyek = b.id_proyek "
+            "WHERE b.kode_ahsp = ? GROUP BY p.id_proyek ORDER BY p.nama"
+        )
+        with self._koneksi() as kon:
+            return pd.read_sql_query(sql, kon, params=(str(kode_ahsp),))
+
+    def snapshot_harga(self, id_proyek, id_snapshot=None):
+        """
+        Daftar harga yang disimpan bersama proyek.
+
+        Args:
+            id_snapshot (int, optional): Snapshot tertentu; default snapshot terbaru.
+
+        Returns:
+            dict: {nama item: harga satuan} (kosong bila proyek belum punya snapshot).
+        """
+        with self._koneksi() as kon:
+            if id_snapshot is None:
+                baris = kon.execute(
+                    "SELECT id_snapshot FROM snapshot_harga WHERE id_proyek = ? ORDER BY id_snapshot DESC LIMIT 1", (id_proyek,)
+                ).fetchone()
+                if baris is None:
+                    return {}
+                id_snapshot = baris[0]
+            return dict(kon.execute(
+                "SELECT nama_item, harga_satuan FROM harga_snapshot WHERE id_snapshot = ?", (id_snapshot,)
+            ).fetchall())
+
+
+# ==========================================
+# PANEL STREAMLIT (HALAMAN SDA / CK / BM)
+# ==========================================
+def pengaturan_proyek(store, bidang, nama_default):
+    """
+    Sidebar nama proyek, overhead dan PPN (key widget per bidang, misal 'ppn_sda').
+
+    Bila panel_proyek baru saja meminta proyek dibuka, pengaturan proyek itu diterapkan
+    sebelum widget dibuat. Impor streamlit ditunda agar modul tetap bisa dipakai headless.
+
+    Returns:
+        tuple: (nama proyek, persen overhead, persen PPN)
+    """
+    import streamlit as st
+
+    id_buka = st.session_state.get(f"buka_proyek_{bidang}")
+    if id_buka is not None:
+        info = store.proyek(id_buka)
+        st.session_state[f"nama_proyek_{bidang}"] = info["nama"]
+        st.session_state[f"oh_{bidang}"] = info["persen_overhead"]
+        st.session_state[f"ppn_{bidang}"] = info["persen_ppn"]
+    st.session_state.setdefault(f"nama_proyek_{bidang}", nama_default)
+    st.session_state.setdefault(f"oh_{bidang}", 15.0)
+    st.session_state.setdefault(f"ppn_{bidang}", 11.0)
+    nama = st.sidebar.text_input("Nama Proyek", key=f"nama_proyek_{bidang}")
+    persen_overhead = st.sidebar.number_input(
+        "Persentase Overhead & Profit (%)", min_value=0.0, max_value=100.0, step=0.5, key=f"oh_{bidang}"
+    )
+    persen_ppn = st.sidebar.number_input("Persentase PPN (%)", min_value=0.0, max_value=100.0, step=0.5, key=f"ppn_{bidang}")
+    return nama, persen_overhead, persen_ppn
+
+
+def proyek_dibuka(bidang):
+    """Id proyek yang diminta dibuka lewat panel_proyek (sekali ambil), atau None."""
+    import streamlit as st
+
+    return st.session_state.pop(f"buka_proyek_{bidang}", None)
+
+
+def panel_proyek(store, rab, bidang, nama_proyek, persen_overhead, persen_ppn, harga=None, keterangan_harga=""):
+    """
+    Sidebar simpan / buka / hapus proyek satu bidang.
+
+    Args:
+        store (ProyekStore): Basis data proyek.
+        rab (RABBidang): RAB halaman yang disimpan.
+        bidang (str): 'sda', 'ck', 'bm'.
+        harga (dict, optional): Harga dasar aktif, disimpan sebagai snapshot.
+    """
+    import streamlit as st
+
+    with st.sidebar:
+        st.markdown("---")
+        st.header("💾 Proyek Tersimpan")
+        if st.button("Simpan Proyek", disabled=not len(rab), key=f"simpan_proyek_{bidang}"):
+            store.simpan_proyek(
+                nama_proyek, rab.ke_dataframe(), bidang=bidang, persen_overhead=persen_overhead,
+                persen_ppn=persen_ppn, harga=harga, keterangan_harga=keterangan_harga
+            )
+            st.success(f"Proyek '{nama_proyek}' tersimpan ({len(rab)} baris).")
+        df_proyek = store.daftar_proyek(bidang)
+        if df_proyek.empty:
+            return
+        label_proyek = {
+            id_proyek: f"{nama} ({jumlah_baris} baris, {diubah})"
+            for id_proyek, nama, jumlah_baris, diubah in df_proyek[["id_proyek", "nama", "jumlah_baris", "diubah"]].itertuples(index=False)
+        }
+        id_pilih = st.selectbox("Proyek:", list(label_proyek), format_func=label_proyek.__getitem__, key=f"pilih_proyek_{bidang}")
+        col_buka, col_hapus = st.columns(2)
+        if col_buka.button("Buka", key=f"buka_proyek_tombol_{bidang}"):
+            st.session_state[f"buka_proyek_{bidang}"] = id_pilih
+            st.rerun()
+        if col_hapus.button("Hapus", key=f"hapus_proyek_{bidang}"):
+            store.hapus_proyek(id_pilih)
+            st.rerun()
+
+
+# ==========================================
+# CLI
+# ==========================================
+def _cari_id(store, nama, bidang):
+    df = store.daftar_proyek(bidang)
+    cocok = df[df["nama"] == nama]
+    if cocok.empty:
+        raise KeyError(f"Proyek '{nama}' tidak ada.")
+    return int(cocok["id_proyek"].iloc[0])
+
+
+def main(argv=None):
+    from engine.headless import baca_harga, baca_tabel
+
+    parser = argparse.ArgumentParser(description="Kelola basis data proyek RAB (SQLite).")
+    parser.add_argument("--db", default=PATH_DEFAULT, help=f"File database (default {PATH_DEFAULT})")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+
+    p_daftar = sub.add_parser("daftar", help="Daftar proyek tersimpan")
+    p_daftar.add_argument("--bidang")
+
+    p_impor = sub.add_parser("impor", help="Simpan tabel RAB (CSV/XLSX/Parquet, kolom seperti export halaman) sebagai proyek")
+    p_impor.add_argument("rab")
+    p_impor.add_argument("--nama", required=True)
+    p_impor.add_argument("--bidang", default="")
+    p_impor.add_argument("--overhead", type=float, default=15.0)
+    p_impor.add_argument("--ppn", type=float, default=11.0)
+    p_impor.add_argument("--harga", help="Daftar harga dasar (nama_item & harga_satuan) untuk snapshot")
+
+    p_ekspor = sub.add_parser("ekspor", help="Tulis baris BOQ satu proyek ke CSV/XLSX/Parquet")
+    p_ekspor.add_argument("nama")
+    p_ekspor.add_argument("--bidang")
+    p_ekspor.add_argument("--output", required=True)
+
+    p_hapus = sub.add_parser("hapus", help="Hapus proyek")
+    p_hapus.add_argument("nama")
+    p_hapus.add_argument("--bidang")
+    args = parser.parse_args(argv)
+
+    store = ProyekStore(args.db)
+    try:
+        if args.perintah == "daftar":
+            print(store.daftar_proyek(args.bidang).to_string(index=False))
+        elif args.perintah == "impor":
+            df = baca_tabel(args.rab)
+            harga = baca_harga(args.harga) if args.harga else None
+            id_proyek = store.simpan_proyek(args.nama, df, args.bidang, args.overhead, args.ppn, harga, args.harga or "")
+            print(f"{args.rab} -> proyek {id_proyek} '{args.nama}' ({len(df)} baris)")
+        elif args.perintah == "ekspor":
+            df = store.baca_boq(_cari_id(store, args.nama, args.bidang)).drop(columns="no")
+            ext = os.path.splitext(args.output)[1].lower()
+            if ext == ".xlsx":
+                df.to_excel(args.output, index=False)
+            elif ext == ".parquet":
+                df.to_parquet(args.output, index=False)
+            else:
+                df.to_csv(args.output, index=False)
+            print(f"{args.nama} -> {args.output} ({len(df)} baris)")
+        elif args.perintah == "hapus":
+            store.hapus_proyek(_cari_id(store, args.nama, args.bidang))
+    except (KeyError, ValueError, OSError) as e:
+        print(f"GAGAL: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import numpy as np
+
+from engine.batch_engine import KOLOM_BIAYA, MatriksKoefisien, entri_per_baris, rincian_biaya
+
+# Posisi kolom total (per item) di KOLOM_BIAYA, dipakai untuk rekap grand total
+_KOLOM_TOTAL = [i for i, k in enumerate(KOLOM_BIAYA) if k.startswith("total_")]
+
+
+class IndeksRABInkremental:
+    """
+    Indeks dependensi sumber daya -> baris BOQ untuk hitung ulang RAB secara inkremental.
+
+    Setiap baris menyimpan HSP tenaga/bahan/alat dan seluruh kolom biaya turunannya.
+    Ketika harga satu sumber daya berubah, hanya baris yang memakai sumber daya itu
+    yang dihitung ulang, dan grand total diperbarui dengan selisih (delta) saja.
+
+    Args:
+        kapasitas_awal (int): Kapasitas awal array baris (bertambah 2x otomatis).
+    """
+
+    def __init__(self, kapasitas_awal: int = 64):
+        self.n_baris = 0
+        self._hsp = np.zeros((kapasitas_awal, 3))
+        self._volume = np.zeros(kapasitas_awal)
+        self._persen = np.zeros((kapasitas_awal, 2))  # overhead, ppn per baris
+        self._biaya = np.zeros((kapasitas_awal, len(KOLOM_BIAYA)))
+        self._grand_total = np.zeros(len(_KOLOM_TOTAL))
+        # nama sumber daya -> (list baris, list kategori, list koefisien)
+        self._dependensi = {}
+        self._harga = {}
+
+    def _pastikan_kapasitas(self, tambahan=1):
+        if self.n_baris + tambahan <= len(self._volume):
+            return
+        kapasitas = max(2 * len(self._volume), self.n_baris + tambahan)
+        for nama in ("_hsp", "_volume", "_persen", "_biaya"):
+            lama = getattr(self, nama)
+            baru = np.zeros((kapasitas,) + lama.shape[1:])
+            baru[:len(lama)] = lama
+            setattr(self, nama, baru)
+
+    def tambah_baris(
+        self,
+        volume: float,
+        koef_tenaga: dict,
+        koef_bahan: dict,
+        koef_alat: dict,
+        harga,
+        persen_overhead: float = 15.0,
+        persen_ppn: float = 11.0
+    ):
+        """
+        Menambahkan satu baris BOQ ke indeks.
+
+        Args:
+            volume (float): Volume pekerjaan.
+            koef_tenaga, koef_bahan, koef_alat (dict): Koefisien AHSP {nama: koef}.
+            harga (callable): Fungsi nama sumber daya -> harga satuan
+                              (misal PencocokHarga.harga atau dict.get).
+            persen_overhead, persen_ppn (float): Persentase untuk baris ini.
+
+        Returns:
+            int: Nomor baris yang baru ditambahkan.
+        """
+        self._pastikan_kapasitas()
+        i = self.n_baris
+
+        for id_kat, koef_dict in enumerate((koef_tenaga, koef_bahan, koef_alat)):
+            total = 0.0
+            for nama, koef in koef_dict.items():
+                if nama not in self._harga:
+                    self._harga[nama] = harga(nama) or 0
+                total += float(koef) * self._harga[nama]
+                dep = self._dependensi.setdefault(nama, ([], [], []))
+                dep[0].append(i)
+                dep[1].append(id_kat)
+                dep[2].append(float(koef))
+            self._hsp[i, id_kat] = total
+
+        self._volume[i] = volume
+        self._persen[i] = (persen_overhead, persen_ppn)
+        self.n_baris += 1
+        self._hitung_turunan(np.array([i]))
+        return i
+
+    def tambah_banyak(
+        self,
+        matriks: MatriksKoefisien,
+        baris_master,
+        volume,
+        harga,
+        persen_overhead=15.0,
+        persen_ppn=11.0
+    ):
+        """
+        Menambahkan banyak baris sekaligus dari matriks koefisien (misal saat membuka proyek).
+
+        Hasilnya sama dengan memanggil tambah_baris per baris dengan dict koefisien baris
+        master yang sama, tetapi HSP dihitung dengan satu np.bincount dan indeks dependensi
+        diperpanjang per sumber daya, bukan per entri.
+
+        Args:
+            matriks (MatriksKoefisien): Matriks datar (tanpa referensi sub-analisa).
+            baris_master (np.ndarray): Posisi item master per baris baru (matriks.posisi).
+            volume (array-like): Volume per baris.
+            harga (callable): Fungsi nama sumber daya -> harga satuan.
+            persen_overhead, persen_ppn (float | array-like): Skalar atau per baris.
+
+        Returns:
+            np.ndarray: Nomor baris yang baru ditambahkan.
+        """
+        baris_master = np.asarray(baris_master, dtype=np.int64)
+        m = len(baris_master)
+        self._pastikan_kapasitas(m)
+        awal = self.n_baris
+        baris_entri, entri = entri_per_baris(matriks, baris_master)
+        id_sumber_daya = matriks.indices[entri]
+        kategori = matriks.kategori[entri].astype(np.int64)
+        koef = matriks.data[entri]
+
+        dipakai = np.unique(id_sumber_daya)
+        for nama in (matriks.sumber_daya[i] for i in dipakai.tolist()):
+            if nama not in self._harga:
+                self._harga[nama] = harga(nama) or 0
+        vektor_harga = np.zeros(len(matriks.sumber_daya))
+        vektor_harga[dipakai] = [self._harga[matriks.sumber_daya[i]] for i in dipakai.tolist()]
+
+        self._hsp[awal:awal + m] = np.bincount(
+            baris_entri * 3 + kategori, weights=koef * vektor_harga[id_sumber_daya], minlength=3 * m
+        ).reshape(m, 3)
+        self._volume[awal:awal + m] = volume
+        self._persen[awal:awal + m, 0] = persen_overhead
+        self._persen[awal:awal + m, 1] = persen_ppn
+
+        urut = np.argsort(id_sumber_daya, kind="stable")
+        batas = np.searchsorted(id_sumber_daya[urut], dipakai, side="right")
+        for id_sd, a, b in zip(dipakai.tolist(), np.r_[0, batas[:-1]].tolist(), batas.tolist()):
+            pilih = urut[a:b]
+            dep = self._dependensi.setdefault(matriks.sumber_daya[id_sd], ([], [], []))
+            dep[0].extend((baris_entri[pilih] + awal).tolist())
+            dep[1].extend(kategori[pilih].tolist())
+            dep[2].extend(koef[pilih].tolist())
+
+        self.n_baris += m
+        baris_baru = np.arange(awal, awal + m)
+        self._hitung_turunan(baris_baru)
+        return baris_baru
+
+    def _hitung_turunan(self, baris):
+        """Menghitung ulang kolom biaya baris terpilih dan memperbarui grand total dengan delta."""
+        lama = self._biaya[baris][:, _KOLOM_TOTAL].sum(axis=0)
+        self._biaya[baris] = rincian_biaya(
+            self._hsp[baris], self._volume[baris], self._persen[baris, 0], self._persen[baris, 1]
+        )
+        self._grand_total += self._biaya[baris][:, _KOLOM_TOTAL].sum(axis=0) - lama
+
+    def ubah_harga(self, perubahan: dict):
+        """
+        Mengubah harga beberapa sumber daya dan menghitung ulang baris yang terdampak saja.
+
+        Args:
+            perubahan (dict): {nama sumber daya: harga baru}.
+
+        Returns:
+            np.ndarray: Nomor baris yang nilainya berubah (terurut).
+        """
+        terdampak = []
+        for nama, harga_baru in perubahan.items():
+            dep = self._dependensi.get(nama)
+            harga_lama = self._harga.get(nama)
+            if dep is None or harga_lama == harga_baru:
+                continue
+            self._harga[nama] = harga_baru
+            baris = np.asarray(dep[0], dtype=np.int64)
+            kategori = np.asarray(dep[1], dtype=np.int64)
+            koef = np.asarray(dep[2])
+            np.add.at(self._hsp, (baris, kategori), koef * (harga_baru - harga_lama))
+            terdampak.append(baris)
+
+        if not terdampak:
+            return np.empty(0, dtype=np.int64)
+        baris = np.unique(np.concatenate(terdampak))
+        self._hitung_turunan(baris)
+        return baris
+
+    def sinkron_harga(self, harga):
+        """
+        Membandingkan harga semua sumber daya yang terindeks dengan sumber harga terbaru
+        dan menerapkan yang berubah lewat ubah_harga.
+
+        Args:
+            harga (callable): Fungsi nama sumber daya -> harga satuan.
+
+        Returns:
+            np.ndarray: Nomor baris yang nilainya berubah.
+        """
+        perubahan = {}
+        for nama, harga_lama in self._harga.items():
+            harga_baru = harga(nama) or 0
+            if harga_baru != harga_lama:
+                perubahan[nama] = harga_baru
+        return self.ubah_harga(perubahan)
+
+    def hitung_ulang_penuh(self):
+        """Menghitung ulang semua baris dari nol (membuang akumulasi galat pembulatan delta)."""
+        n = self.n_baris
+        self._hsp[:n] = 0.0
+        for nama, (baris, kategori, koef) in self._dependensi.items():
+            np.add.at(self._hsp, (np.asarray(baris), np.asarray(kategori)), np.asarray(koef) * self._harga[nama])
+        self._biaya[:n] = 0.0
+        self._grand_total[:] = 0.0
+        self._hitung_turunan(np.arange(n))
+
+    def hapus_baris(self, i):
+        """
+        Mengeluarkan baris ke-i dari grand total (volume dibuat 0, delta dikurangkan).
+
+        Nomor baris lain tidak bergeser; baris yang dihapus tetap ada di indeks dependensi
+        tetapi kontribusi totalnya selalu 0.
+        """
+        self._volume[i] = 0.0
+        self._hitung_turunan(np.array([i]))
+
+    def biaya_baris(self, i):
+        """Mengembalikan dict {kolom KOLOM_BIAYA: nilai} untuk baris ke-i."""
+        return dict(zip(KOLOM_BIAYA, self._biaya[i].tolist()))
+
+    def biaya_array(self, baris):
+        """Array (len(baris), 16) kolom KOLOM_BIAYA untuk beberapa baris sekaligus."""
+        return self._biaya[np.asarray(baris, dtype=np.int64)]
+
+    def rekap(self):
+        """Grand total seluruh baris, kunci sama dengan kolom total_* di KOLOM_BIAYA."""
+        return {KOLOM_BIAYA[k]: float(v) for k, v in zip(_KOLOM_TOTAL, self._grand_total)}
+
+    def sumber_daya(self):
+        """Daftar sumber daya terindeks beserta jumlah baris yang memakainya."""
+        return {nama: len(set(dep[0])) for nama, dep in self._dependensi.items()}
+
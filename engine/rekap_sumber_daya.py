@@ -0,0 +1,223 @@
+"""
+Rekap kebutuhan sumber daya proyek: kuantitas tenaga (OH), bahan dan alat (jam) seluruh BOQ.
+
+Volume tiap baris BOQ dikalikan koefisien master (sub-analisa sudah diuraikan lewat
+AnalisaBertingkat.matriks_datar), lalu dijumlah per sumber daya dengan satu np.bincount.
+Hasilnya jadwal pengadaan (satu baris per sumber daya, opsional per periode) dan rincian
+per baris BOQ.
+
+Contoh:
+    python -m engine.rekap_sumber_daya boq_proyek.xlsx --master data/ahsp_sda_master.csv \
+        --harga harga_dasar.xlsx --kolom-periode minggu --output kebutuhan.xlsx
+"""
+import argparse
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engine.batch_engine import KATEGORI, MatriksKoefisien, entri_per_baris
+
+# Satuan bawaan per kategori bila nama sumber daya tidak menyebut satuannya, misal "Semen PC (Kg)"
+SATUAN_KATEGORI = {"tenaga": "OH", "bahan": "", "alat": "Jam"}
+
+KOLOM_JADWAL = [
+    "periode", "kategori", "sumber_daya", "satuan", "kuantitas",
+    "jumlah_baris_boq", "harga_satuan", "total_biaya",
+]
+KOLOM_RINCIAN = [
+    "baris_boq", "kode_ahsp", "volume", "kategori", "sumber_daya", "satuan",
+    "koefisien", "kuantitas", "harga_satuan", "total_biaya",
+]
+
+_POLA_SATUAN = re.compile(r"\(([^()]+)\)\s*$")
+_POLA_ANGKA = re.compile(r"(\d+)")
+
+
+def satuan_sumber_daya(nama, kategori):
+    """Satuan dari akhiran '(...)' nama sumber daya, atau SATUAN_KATEGORI bila tidak ada."""
+    cocok = _POLA_SATUAN.search(str(nama))
+    return cocok.group(1).strip() if cocok else SATUAN_KATEGORI[kategori]
+
+
+def _kunci_periode(nilai):
+    """Kunci urut alami periode: angka dulu (numerik), lalu teks dengan bagian angka numerik, kosong terakhir."""
+    if nilai is None or (isinstance(nilai, float) and np.isnan(nilai)) or nilai is pd.NaT:
+        return (2,)
+    if isinstance(nilai, (int, float, np.integer, np.floating)) and not isinstance(nilai, bool):
+        return (0, float(nilai))
+    return (1, tuple((0, int(t)) if t.isdigit() else (1, t) for t in _POLA_ANGKA.split(str(nilai).lower()) if t))
+
+
+# ==========================================
+# 1. BOQ -> ENTRI (BARIS BOQ x SUMBER DAYA)
+# ==========================================
+def _entri_boq(matriks: MatriksKoefisien, kode_ahsp, volume):
+    """
+    Returns:
+        tuple: (volume per baris, baris BOQ per entri, posisi entri master per entri)
+    """
+    baris = matriks.posisi(kode_ahsp)
+    volume = np.asarray(volume, dtype=np.float64)
+    if len(volume) != len(baris):
+        raise ValueError("Panjang kode_ahsp dan volume harus sama.")
+    return (volume, *entri_per_baris(matriks, baris))
+
+
+def _harga_dan_satuan(matriks, harga):
+    """
+    Returns:
+        tuple: (vektor harga atau None, kode satuan (n_sumber_daya, 3) int, tabel satuan)
+    """
+    vektor_harga = matriks.vektor_harga(harga) if harga is not None else None
+    kode_satuan, tabel_satuan = pd.factorize(np.array(
+        [satuan_sumber_daya(nama, kat) for nama in matriks.sumber_daya for kat in KATEGORI], dtype=object
+    ))
+    return vektor_harga, kode_satuan.reshape(-1, len(KATEGORI)), tabel_satuan
+
+
+# ==========================================
+# 2. JADWAL PENGADAAN (AGREGAT PER SUMBER DAYA)
+# ==========================================
+def jadwal_pengadaan(kode_ahsp, volume, matriks: MatriksKoefisien, harga=None, periode=None):
+    """
+    Total kuantitas tiap sumber daya untuk seluruh BOQ (group-by ter-vektorisasi).
+
+    Kunci grup = (periode, kategori, sumber daya) dikodekan menjadi satu integer, dipadatkan
+    dengan np.unique, lalu kuantitas dan jumlah baris dijumlah dengan np.bincount atas indeks
+    padat. Memori sebanding jumlah entri/grup yang terpakai, bukan periode x kategori x sumber daya.
+
+    Args:
+        kode_ahsp, volume (list-like): BOQ.
+        matriks (MatriksKoefisien): Matriks datar (AnalisaBertingkat.matriks_datar) agar
+            sub-analisa ikut diuraikan ke sumber daya dasar.
+        harga (dict, optional): Harga dasar {nama sumber daya: harga satuan} untuk kolom
+            harga_satuan/total_biaya (biaya langsung, tanpa overhead/PPN).
+        periode (list-like, optional): Periode per baris BOQ (minggu, bulan, tahap...).
+            Tanpa periode, seluruh proyek satu periode.
+
+    Returns:
+        pd.DataFrame: Kolom KOLOM_JADWAL, urut periode -> kategori -> kuantitas terbesar.
+    """
+    volume, baris_boq, entri = _entri_boq(matriks, kode_ahsp, volume)
+    if periode is None:
+        label_periode, kode_periode = np.array(["Seluruh Proyek"], dtype=object), np.zeros(len(volume), dtype=np.int64)
+    else:
+        # Urut alami (minggu 2 sebelum minggu 10), bukan leksikografis; sel kosong menjadi periode terakhir
+        kode_periode, label_periode = pd.factorize(pd.Series(periode), use_na_sentinel=False)
+        label_periode = np.asarray(label_periode, dtype=object)
+        urutan = np.array(sorted(range(len(label_periode)), key=lambda i: _kunci_periode(label_periode[i])), dtype=np.int64)
+        peringkat = np.empty_like(urutan)
+        peringkat[urutan] = np.arange(len(urutan))
+        kode_periode, label_periode = peringkat[kode_periode], label_periode[urutan]
+        if len(kode_periode) != len(volume):
+            raise ValueError("Panjang periode dan volume harus sama.")
+
+    n_sumber_daya = len(matriks.sumber_daya)
+    kunci = ((kode_periode[baris_boq] * len(KATEGORI) + matriks.kategori[entri].astype(np.int64)) * n_sumber_daya
+             + matriks.indices[entri].astype(np.int64))
+    dipakai, kunci_padat = np.unique(kunci, return_inverse=True)
+    kuantitas = np.bincount(kunci_padat, weights=matriks.data[entri] * volume[baris_boq], minlength=len(dipakai))
+    jumlah_baris = np.bincount(kunci_padat, minlength=len(dipakai))
+
+    id_periode, sisa = np.divmod(dipakai, len(KATEGORI) * n_sumber_daya)
+    id_kategori, id_sumber_daya = np.divmod(sisa, n_sumber_daya)
+    vektor_harga, kode_satuan, tabel_satuan = _harga_dan_satuan(matriks, harga)
+    harga_satuan = vektor_harga[id_sumber_daya] if vektor_harga is not None else np.full(len(dipakai), np.nan)
+
+    df = pd.DataFrame({
+        "periode": label_periode[id_periode],
+        "kategori": np.asarray(KATEGORI, dtype=object)[id_kategori],
+        "sumber_daya": np.asarray(matriks.sumber_daya, dtype=object)[id_sumber_daya],
+        "satuan": np.asarray(tabel_satuan, dtype=object)[kode_satuan[id_sumber_daya, id_kategori]],
+        "kuantitas": kuantitas,
+        "jumlah_baris_boq": jumlah_baris,
+        "harga_satuan": harga_satuan,
+        "total_biaya": kuantitas * harga_satuan,
+    }, columns=KOLOM_JADWAL)
+    urut = np.lexsort((-df["kuantitas"].to_numpy(), id_kategori, id_periode))
+    return df.iloc[urut].reset_index(drop=True)
+
+
+# ==========================================
+# 3. RINCIAN PER BARIS BOQ
+# ==========================================
+def rincian_kebutuhan(kode_ahsp, volume, matriks: MatriksKoefisien, harga=None):
+    """
+    Kebutuhan sumber daya per baris BOQ (format panjang: satu baris per baris BOQ x sumber daya).
+
+    Jumlah kolom kuantitas per (kategori, sumber_daya) sama dengan jadwal_pengadaan tanpa periode.
+
+    Returns:
+        pd.DataFrame: Kolom KOLOM_RINCIAN; baris_boq = posisi baris di BOQ input (mulai 0).
+    """
+    volume, baris_boq, entri = _entri_boq(matriks, kode_ahsp, volume)
+    id_sumber_daya = matriks.indices[entri]
+    id_kategori = matriks.kategori[entri]
+    koefisien = matriks.data[entri]
+    kuantitas = koefisien * volume[baris_boq]
+    vektor_harga, kode_satuan, tabel_satuan = _harga_dan_satuan(matriks, harga)
+    harga_satuan = vektor_harga[id_sumber_daya] if vektor_harga is not None else np.full(len(entri), np.nan)
+    id_kode, tabel_kode = pd.factorize(np.asarray(kode_ahsp, dtype=object))
+
+    # Kolom teks sebagai Categorical di atas tabel nama (tanpa membuat jutaan string)
+    return pd.DataFrame({
+        "baris_boq": baris_boq,
+        "kode_ahsp": pd.Categorical.from_codes(id_kode[baris_boq], categories=tabel_kode),
+        "volume": volume[baris_boq],
+        "kategori": pd.Categorical.from_codes(id_kategori, categories=list(KATEGORI)),
+        "sumber_daya": pd.Categorical.from_codes(id_sumber_daya, categories=pd.Index(matriks.sumber_daya, dtype=object)),
+        "satuan": pd.Categorical.from_codes(kode_satuan[id_sumber_daya, id_kategori], categories=tabel_satuan),
+        "koefisien": koefisien,
+        "kuantitas": kuantitas,
+        "harga_satuan": harga_satuan,
+        "total_biaya": kuantitas * harga_satuan,
+    }, columns=KOLOM_RINCIAN)
+
+
+# ==========================================
+# 4. CLI
+# ==========================================
+def main(argv=None):
+    from engine import ahsp_store
+    from engine.ahsp_bertingkat import analisa_bertingkat
+    from engine.headless import baca_boq, baca_harga
+    from engine.pencocok_harga import PencocokHarga
+
+    parser = argparse.ArgumentParser(description="Rekap kebutuhan tenaga/bahan/alat seluruh BOQ (jadwal pengadaan).")
+    parser.add_argument("boq", help="File BOQ (CSV/XLSX/Parquet) dengan kolom kode_ahsp & volume")
+    parser.add_argument("--master", required=True, help="Master AHSP (CSV/XLSX)")
+    parser.add_argument("--bidang", help="Bidang master (misal sda); wajib bila kode dipakai di lebih dari satu bidang")
+    parser.add_argument("--harga", help="Daftar harga dasar (kolom nama_item & harga_satuan) untuk kolom biaya")
+    parser.add_argument("--kolom-periode", help="Kolom BOQ berisi periode pelaksanaan (misal minggu/bulan)")
+    parser.add_argument("--output", help="Tulis ke XLSX (sheet Jadwal + Rincian) atau CSV (jadwal saja); default cetak ke layar")
+    args = parser.parse_args(argv)
+
+    store = ahsp_store.muat_master(args.master)
+    kolom_periode = args.kolom_periode.lower() if args.kolom_periode else None
+    df_boq = baca_boq(args.boq, kolom_lain=[kolom_periode] if kolom_periode else ())
+    matriks = analisa_bertingkat(store.matriks_bidang(args.bidang)).matriks_datar()
+    harga = None
+    if args.harga:
+        pencocok = PencocokHarga(baca_harga(args.harga))
+        harga = {nama: pencocok.harga(nama) for nama in matriks.sumber_daya}
+
+    periode = df_boq[kolom_periode] if kolom_periode else None
+    df_jadwal = jadwal_pengadaan(df_boq["kode_ahsp"], df_boq["volume"], matriks, harga, periode)
+    if args.output and args.output.lower().endswith(".xlsx"):
+        with pd.ExcelWriter(args.output) as writer:
+            df_jadwal.to_excel(writer, sheet_name="Jadwal Pengadaan", index=False)
+            rincian_kebutuhan(df_boq["kode_ahsp"], df_boq["volume"], matriks, harga).to_excel(
+                writer, sheet_name="Rincian per Baris", index=False
+            )
+    elif args.output:
+        df_jadwal.to_csv(args.output, index=False)
+    else:
+        kolom = [k for k in KOLOM_JADWAL if k != "periode" or kolom_periode]
+        print(df_jadwal[kolom].to_string(index=False, float_format="{:,.3f}".format))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,12 @@
 import pandas as pd
+import numpy as np
 import io
+import os
+import tempfile
 import json # Import json for parsing potential JSON strings
 
+from engine.uang_tetap import jumlah_sen
+
 def hitung_rab_lengkap(
     volume: float,
     koef_tenaga: dict,
@@ -102,6 +107,116 @@ def hitung_rab_lengkap(
         }
     }
 
+# ==========================================
+# EXPORT EXCEL
+# ==========================================
+# (header, lebar kolom, nama format, kolom DataFrame RAB)
+KOLOM_EXPORT = [
+    ('Uraian Pekerjaan', 40, 'text', 'Uraian Pekerjaan'),
+    ('Satuan', 10, 'center', 'Satuan'),
+    ('Volume', 12, 'currency', 'Volume'),
+    ('HSP (Rp) Tenaga', 15, 'currency', 'HSP Tenaga'),
+    ('HSP (Rp) Bahan', 15, 'currency', 'HSP Bahan'),
+    ('HSP (Rp) Alat', 15, 'currency', 'HSP Alat'),
+    ('HSP (Rp) Sub Total Langsung', 20, 'currency', 'HSP Sub Total Langsung'),
+    ('HSP (Rp) Overhead & Profit', 20, 'currency', 'HSP OHP'),
+    ('HSP (Rp) Tanpa PPN', 20, 'currency_bold', 'HSP Tanpa PPN'),
+    ('Total Biaya (Rp) Tenaga', 20, 'currency', 'Total Tenaga'),
+    ('Total Biaya (Rp) Bahan', 20, 'currency', 'Total Bahan'),
+    ('Total Biaya (Rp) Alat', 20, 'currency', 'Total Alat'),
+    ('Total Biaya (Rp) Sub Total Langsung', 25, 'currency', 'Total Sub Total Langsung'),
+    ('Total Biaya (Rp) Overhead & Profit', 25, 'currency', 'Total OHP'),
+    ('Total Biaya (Rp) Tanpa PPN', 25, 'currency_bold', 'Total Tanpa PPN'),
+]
+UKURAN_POTONGAN_EXPORT = 10_000 # baris per potongan saat menulis data
+
+
+def _buat_format(workbook):
+    """Mendefinisikan semua format sel laporan RAB."""
+    return {
+        'header': workbook.add_format({'bold': True, 'text_wrap': True, 'valign': 'vcenter', 'align': 'center', 'border': 1, 'bg_color': '#DDEBF7'}),
+        'currency': workbook.add_format({'num_format': '#,##0.00', 'align': 'right', 'border': 1}),
+        'currency_bold': workbook.add_format({'num_format': '#,##0.00', 'align': 'right', 'bold': True, 'border': 1, 'bg_color': '#FFF2CC'}),
+        'text': workbook.add_format({'align': 'left', 'valign': 'vcenter', 'border': 1}),
+        'center': workbook.add_format({'align': 'center', 'valign': 'vcenter', 'border': 1}),
+        'title': workbook.add_format({'bold': True, 'font_size': 16, 'align': 'center'}),
+        'subtitle': workbook.add_format({'bold': True, 'font_size': 12, 'align': 'center'}),
+        'source': workbook.add_format({'align': 'center', 'italic': True}),
+        'separator': workbook.add_format({'top': 1, 'bottom': 1}),
+        'total_label': workbook.add_format({'bold': True, 'align': 'left', 'bg_color': '#DDEBF7', 'border': 1}),
+        'total_value': workbook.add_format({'num_format': '#,##0.00', 'bold': True, 'align': 'right', 'bg_color': '#DDEBF7', 'border': 1}),
+    }
+
+
+def _tulis_laporan_rab(workbook, df_rab, nama_proyek):
+    """
+    Menulis sheet 'RAB Project' baris demi baris dari atas ke bawah.
+
+    Urutan tulis selalu menaik per baris agar aman untuk mode constant_memory.
+    Data diambil langsung dari array kolom, bukan dari iterrows().
+
+    Args:
+        workbook (xlsxwriter.Workbook): Workbook tujuan.
+        df_rab (pd.DataFrame | dict): Tabel RAB, atau dict {nama kolom: array} dengan kolom yang sama.
+        nama_proyek (str): Nama proyek untuk judul laporan.
+    """
+    worksheet = workbook.add_worksheet('RAB Project')
+    fmt = _buat_format(workbook)
+
+    # Write title
+    worksheet.merge_range('A1:P1', 'LAPORAN RENCANA ANGGARAN BIAYA', fmt['title'])
+    worksheet.merge_range('A2:P2', f'PROYEK: {nama_proyek.upper()}', fmt['subtitle'])
+    worksheet.merge_range('A3:P3', f'Sumber Data: SNI 2025 by The Gems Grandmaster', fmt['source'])
+    for col_num in range(len(KOLOM_EXPORT) + 1):
+        worksheet.write_blank(3, col_num, None, fmt['separator']) # Line separator
+
+    start_row = 5 # Start writing headers from row 5
+
+    # Write headers
+    worksheet.write(start_row, 0, 'No.', fmt['header'])
+    worksheet.set_column(0, 0, 5)
+    for col_num, (header, width, _, _) in enumerate(KOLOM_EXPORT, start=1):
+        worksheet.write(start_row, col_num, header, fmt['header'])
+        worksheet.set_column(col_num, col_num, width)
+
+    # Write data rows langsung dari array kolom, dikonversi ke tipe Python per potongan
+    kolom_data = [np.asarray(df_rab[kolom]) for _, _, _, kolom in KOLOM_EXPORT]
+    format_kolom = [fmt[nama_format] for _, _, nama_format, _ in KOLOM_EXPORT]
+    total_rows = len(kolom_data[0])
+    for awal in range(0, total_rows, UKURAN_POTONGAN_EXPORT):
+        potongan = [kolom[awal:awal + UKURAN_POTONGAN_EXPORT].tolist() for kolom in kolom_data]
+        for row_num, nilai_baris in enumerate(zip(*potongan), start=start_row + 1 + awal):
+            worksheet.write_number(row_num, 0, row_num - start_row, fmt['center']) # No
+            for col_num, (nilai, cell_format) in enumerate(zip(nilai_baris, format_kolom), start=1):
+                worksheet.write(row_num, col_num, nilai, cell_format)
+
+    # Add summary totals
+    current_row = start_row + 1 + total_rows
+
+    # Calculate totals: jumlah nilai per baris yang tampil (dibulatkan ke sen), bukan PPN dihitung
+    # ulang dari grand total, sehingga rekap selalu sama dengan penjumlahan kolom di sheet
+    persen_ppn_baris = np.unique(np.asarray(df_rab['PPN (%)'], dtype=np.float64)) if total_rows else np.zeros(1)
+    grand_total_sub_langsung = jumlah_sen(df_rab['Total Sub Total Langsung'])
+    grand_total_ohp = jumlah_sen(df_rab['Total OHP'])
+    grand_total_tanpa_ppn = jumlah_sen(df_rab['Total Tanpa PPN'])
+    grand_total_ppn = jumlah_sen(df_rab['Total PPN'])
+    grand_total_dengan_ppn = jumlah_sen(df_rab['Total Dengan PPN'])
+    label_ppn = f'PPN ({persen_ppn_baris[0]:g}%)' if len(persen_ppn_baris) == 1 else 'PPN'
+
+    ringkasan = [
+        ('TOTAL BIAYA LANGSUNG', grand_total_sub_langsung),
+        ('TOTAL OVERHEAD & PROFIT', grand_total_ohp),
+        ('GRAND TOTAL (TANPA PPN)', grand_total_tanpa_ppn),
+        (label_ppn, grand_total_ppn),
+        ('GRAND TOTAL (DENGAN PPN)', grand_total_dengan_ppn),
+    ]
+    for label, nilai in ringkasan:
+        worksheet.merge_range(current_row, 0, current_row, 12, label, fmt['total_label'])
+        worksheet.write(current_row, 13, nilai, fmt['total_value'])
+        worksheet.merge_range(current_row, 14, current_row, 15, '', fmt['total_value']) # Merge untuk align total
+        current_row += 1
+
+
 def export_to_excel(df_rab: pd.DataFrame, nama_proyek="RAB Proyek"):
     """
     Mengekspor DataFrame RAB ke format Excel dengan formatting profesional.
@@ -113,110 +228,37 @@ def export_to_excel(df_rab: pd.DataFrame, nama_proyek="RAB Proyek"):
     Returns:
         bytes: Isi file Excel dalam format bytes.
     """
+    import xlsxwriter
+
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        workbook = writer.book
-        worksheet = writer.sheets['RAB Project']
-
-        # Define formats
-        fmt_header = workbook.add_format({'bold': True, 'text_wrap': True, 'valign': 'vcenter', 'align': 'center', 'border': 1, 'bg_color': '#DDEBF7'})
-        fmt_currency = workbook.add_format({'num_format': '#,##0.00', 'align': 'right', 'border': 1})
-        fmt_currency_bold = workbook.add_format({'num_format': '#,##0.00', 'align': 'right', 'bold': True, 'border': 1, 'bg_color': '#FFF2CC'})
-        fmt_text = workbook.add_format({'align': 'left', 'valign': 'vcenter', 'border': 1})
-        fmt_center = workbook.add_format({'align': 'center', 'valign': 'vcenter', 'border': 1})
-        fmt_title = workbook.add_format({'bold': True, 'font_size': 16, 'align': 'center'})
-        fmt_subtitle = workbook.add_format({'bold': True, 'font_size': 12, 'align': 'center'})
-        fmt_total_label = workbook.add_format({'bold': True, 'align': 'left', 'bg_color': '#DDEBF7', 'border': 1})
-        fmt_total_value = workbook.add_format({'num_format': '#,##0.00', 'bold': True, 'align': 'right', 'bg_color': '#DDEBF7', 'border': 1})
-
-        # Write title
-        worksheet.merge_range('A1:P1', 'LAPORAN RENCANA ANGGARAN BIAYA', fmt_title)
-        worksheet.merge_range('A2:P2', f'PROYEK: {nama_proyek.upper()}', fmt_subtitle)
-        worksheet.merge_range('A3:P3', f'Sumber Data: SNI 2025 by The Gems Grandmaster', workbook.add_format({'align': 'center', 'italic': True}))
-        worksheet.write_blank('A4:P4', None, workbook.add_format({'top': 1, 'bottom': 1})) # Line separator
-
-        start_row = 5 # Start writing headers from row 5
-
-        # Define columns and their widths
-        columns = [
-            {'header': 'No.', 'width': 5, 'format': fmt_center},
-            {'header': 'Uraian Pekerjaan', 'width': 40, 'format': fmt_text},
-            {'header': 'Satuan', 'width': 10, 'format': fmt_center},
-            {'header': 'Volume', 'width': 12, 'format': fmt_currency},
-            {'header': 'HSP (Rp) Tenaga', 'width': 15, 'format': fmt_currency},
-            {'header': 'HSP (Rp) Bahan', 'width': 15, 'format': fmt_currency},
-            {'header': 'HSP (Rp) Alat', 'width': 15, 'format': fmt_currency},
-            {'header': 'HSP (Rp) Sub Total Langsung', 'width': 20, 'format': fmt_currency}, # New detail
-            {'header': 'HSP (Rp) Overhead & Profit', 'width': 20, 'format': fmt_currency}, # New detail
-            {'header': 'HSP (Rp) Tanpa PPN', 'width': 20, 'format': fmt_currency_bold}, # New detail
-            {'header': 'Total Biaya (Rp) Tenaga', 'width': 20, 'format': fmt_currency},
-            {'header': 'Total Biaya (Rp) Bahan', 'width': 20, 'format': fmt_currency},
-            {'header': 'Total Biaya (Rp) Alat', 'width': 20, 'format': fmt_currency},
-            {'header': 'Total Biaya (Rp) Sub Total Langsung', 'width': 25, 'format': fmt_currency}, # New detail
-            {'header': 'Total Biaya (Rp) Overhead & Profit', 'width': 25, 'format': fmt_currency}, # New detail
-            {'header': 'Total Biaya (Rp) Tanpa PPN', 'width': 25, 'format': fmt_currency_bold},
-        ]
-
-        # Write headers
-        for col_num, col_data in enumerate(columns):
-            worksheet.write(start_row, col_num, col_data['header'], fmt_header)
-            worksheet.set_column(col_num, col_num, col_data['width'])
-
-        # Write data rows
-        for row_num, (index, row_data) in enumerate(df_rab.iterrows(), start=start_row + 1):
-            worksheet.write(row_num, 0, row_num - start_row, fmt_center) # No
-            worksheet.write(row_num, 1, row_data['Uraian Pekerjaan'], fmt_text)
-            worksheet.write(row_num, 2, row_data['Satuan'], fmt_center)
-            worksheet.write(row_num, 3, row_data['Volume'], fmt_currency)
-            worksheet.write(row_num, 4, row_data['HSP Tenaga'], fmt_currency)
-            worksheet.write(row_num, 5, row_data['HSP Bahan'], fmt_currency)
-            worksheet.write(row_num, 6, row_data['HSP Alat'], fmt_currency)
-            worksheet.write(row_num, 7, row_data['HSP Sub Total Langsung'], fmt_currency)
-            worksheet.write(row_num, 8, row_data['HSP OHP'], fmt_currency)
-            worksheet.write(row_num, 9, row_data['HSP Tanpa PPN'], fmt_currency_bold)
-            worksheet.write(row_num, 10, row_data['Total Tenaga'], fmt_currency)
-            worksheet.write(row_num, 11, row_data['Total Bahan'], fmt_currency)
-            worksheet.write(row_num, 12, row_data['Total Alat'], fmt_currency)
-            worksheet.write(row_num, 13, row_data['Total Sub Total Langsung'], fmt_currency)
-            worksheet.write(row_num, 14, row_data['Total OHP'], fmt_currency)
-            worksheet.write(row_num, 15, row_data['Total Tanpa PPN'], fmt_currency_bold)
-
-
-        # Add summary totals
-        total_rows = len(df_rab)
-        current_row = start_row + 1 + total_rows
-
-        # Calculate totals
-        grand_total_sub_langsung = df_rab['Total Sub Total Langsung'].sum()
-        grand_total_ohp = df_rab['Total OHP'].sum()
-        grand_total_tanpa_ppn = df_rab['Total Tanpa PPN'].sum()
-        grand_total_ppn = grand_total_tanpa_ppn * (df_rab['PPN (%)'].iloc[0] / 100) if not df_rab.empty else 0 # Ambil PPN dari baris pertama
-        grand_total_dengan_ppn = grand_total_tanpa_ppn + grand_total_ppn
-
-        # Write summary labels
-        worksheet.merge_range(current_row, 0, current_row, 12, 'TOTAL BIAYA LANGSUNG', fmt_total_label)
-        worksheet.write(current_row, 13, grand_total_sub_langsung, fmt_total_value)
-        worksheet.merge_range(current_row, 14, current_row, 15, '', fmt_total_value) # Merge untuk align total
+    workbook = xlsxwriter.Workbook(output, {'nan_inf_to_errors': True})
+    _tulis_laporan_rab(workbook, df_rab, nama_proyek)
+    workbook.close()
+    output.seek(0)
+    return output.getvalue()
 
-        current_row += 1
-        worksheet.merge_range(current_row, 0, current_row, 12, 'TOTAL OVERHEAD & PROFIT', fmt_total_label)
-        worksheet.write(current_row, 13, grand_total_ohp, fmt_total_value)
-        worksheet.merge_range(current_row, 14, current_row, 15, '', fmt_total_value)
 
-        current_row += 1
-        worksheet.merge_range(current_row, 0, current_row, 12, 'GRAND TOTAL (TANPA PPN)', fmt_total_label)
-        worksheet.write(current_row, 13, grand_total_tanpa_ppn, fmt_total_value)
-        worksheet.merge_range(current_row, 14, current_row, 15, '', fmt_total_value)
+def export_to_excel_stream(df_rab, nama_proyek="RAB Proyek", path_tujuan=None):
+    """
+    Mengekspor RAB ke file Excel dengan mode constant_memory xlsxwriter.
 
-        current_row += 1
-        worksheet.merge_range(current_row, 0, current_row, 12, f'PPN ({df_rab["PPN (%)"].iloc[0] if not df_rab.empty else 0}%)', fmt_total_label)
-        worksheet.write(current_row, 13, grand_total_ppn, fmt_total_value)
-        worksheet.merge_range(current_row, 14, current_row, 15, '', fmt_total_value)
+    Setiap baris langsung di-flush ke file sementara di disk, sehingga pemakaian
+    memori tetap konstan berapapun jumlah barisnya (cocok untuk RAB ratusan ribu baris).
 
-        current_row += 1
-        worksheet.merge_range(current_row, 0, current_row, 12, 'GRAND TOTAL (DENGAN PPN)', fmt_total_label)
-        worksheet.write(current_row, 13, grand_total_dengan_ppn, fmt_total_value)
-        worksheet.merge_range(current_row, 14, current_row, 15, '', fmt_total_value)
+    Args:
+        df_rab (pd.DataFrame | dict): Tabel RAB, atau dict {nama kolom: array}.
+        nama_proyek (str): Nama proyek untuk judul laporan.
+        path_tujuan (str, optional): Path file .xlsx. Jika None, dibuat file sementara.
 
-    output.seek(0)
-    return output.getvalue()
+    Returns:
+        str: Path file Excel yang ditulis.
+    """
+    import xlsxwriter
+
+    if path_tujuan is None:
+        fd, path_tujuan = tempfile.mkstemp(prefix='rab_', suffix='.xlsx')
+        os.close(fd)
+    workbook = xlsxwriter.Workbook(path_tujuan, {'constant_memory': True, 'nan_inf_to_errors': True})
+    _tulis_laporan_rab(workbook, df_rab, nama_proyek)
+    workbook.close()
+    return path_tujuan
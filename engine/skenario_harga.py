@@ -0,0 +1,238 @@
+"""
+Evaluasi satu BOQ terhadap banyak skenario harga (daftar harga provinsi x overhead/PPN).
+
+Contoh:
+    python -m engine.skenario_harga boq_proyek.xlsx --master data/ahsp_sda_master.csv \
+        --harga harga/*.xlsx --overhead 10 15 --ppn 11 12 --output perbandingan.csv
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from engine.pencocok_harga import AMBIGU, TIDAK_DITEMUKAN, PencocokHarga
+
+# Di bawah jumlah daftar harga ini, pencocokan dikerjakan di proses utama
+# (biaya kirim dict harga ke worker lebih besar dari pekerjaannya)
+MIN_DAFTAR_PARALEL = 8
+
+KOLOM_PERBANDINGAN = [
+    "skenario", "daftar_harga", "persen_overhead", "persen_ppn",
+    "total_tenaga", "total_bahan", "total_alat", "total_sub_langsung",
+    "total_overhead", "total_tanpa_ppn", "total_ppn", "total_dengan_ppn",
+    "selisih_persen", "sumber_daya_tanpa_harga",
+]
+
+
+class Skenario(NamedTuple):
+    nama: str
+    daftar_harga: str          # kunci ke dict daftar harga
+    persen_overhead: float = 15.0
+    persen_ppn: float = 11.0
+
+
+def grid_skenario(nama_daftar_harga, pengaturan):
+    """
+    Semua kombinasi daftar harga x pengaturan (overhead, PPN).
+
+    Args:
+        nama_daftar_harga (list): Kunci daftar harga (misal nama provinsi).
+        pengaturan (list): List (persen_overhead, persen_ppn).
+
+    Returns:
+        list: List Skenario, nama "<daftar> | OH x% | PPN y%".
+    """
+    return [
+        Skenario(f"{nama} | OH {oh:g}% | PPN {ppn:g}%", nama, float(oh), float(ppn))
+        for nama in nama_daftar_harga for oh, ppn in pengaturan
+    ]
+
+
+# ==========================================
+# 1. BOQ -> BOBOT SUMBER DAYA
+# ==========================================
+def bobot_sumber_daya(matriks, kode_ahsp, volume):
+    """
+    Meringkas BOQ menjadi bobot per (kategori, sumber daya): sum volume x koefisien.
+
+    Total biaya langsung kategori c untuk vektor harga p cukup W[c] @ p, sehingga
+    N skenario = satu perkalian matriks (N, n_sumber_daya) @ (n_sumber_daya, 3).
+
+    Returns:
+        tuple: (id sumber daya yang dipakai, array W berukuran (3, n_dipakai))
+    """
+    baris = matriks.posisi(kode_ahsp)
+    volume_item = np.bincount(baris, weights=np.asarray(volume, dtype=np.float64), minlength=matriks.n_item)
+    baris_entri = np.repeat(np.arange(matriks.n_item), np.diff(matriks.indptr))
+    n_sumber_daya = len(matriks.sumber_daya)
+    bobot = np.bincount(
+        matriks.kategori.astype(np.int64) * n_sumber_daya + matriks.indices,
+        weights=matriks.data * volume_item[baris_entri],
+        minlength=3 * n_sumber_daya,
+    ).reshape(3, n_sumber_daya)
+
+    dipakai = np.flatnonzero((bobot != 0).any(axis=0))
+    return dipakai, bobot[:, dipakai]
+
+
+# ==========================================
+# 2. DAFTAR HARGA -> TOTAL PER KATEGORI
+# ==========================================
+def _total_per_daftar(daftar_harga, nama_sumber_daya, bobot):
+    """
+    Mencocokkan harga sumber daya untuk beberapa daftar harga, lalu satu matmul.
+    Dipanggil di proses worker.
+
+    Returns:
+        tuple: (array (k, 3) total tenaga/bahan/alat, list jumlah sumber daya tanpa harga: tidak ditemukan atau ambigu)
+    """
+    harga = np.zeros((len(daftar_harga), len(nama_sumber_daya)))
+    tanpa_harga = []
+    for i, daftar in enumerate(daftar_harga):
+        cocok = PencocokHarga(daftar).cocokkan(nama_sumber_daya)
+        harga[i] = [float(cocok[nama].harga) for nama in nama_sumber_daya]
+        tanpa_harga.append(sum(hasil.aturan in (TIDAK_DITEMUKAN, AMBIGU) for hasil in cocok.values()))
+    return harga @ bobot.T, tanpa_harga
+
+
+def total_per_daftar_harga(daftar_harga, nama_sumber_daya, bobot, max_workers=None):
+    """
+    Total tenaga/bahan/alat BOQ untuk setiap daftar harga.
+
+    Pencocokan harga (bagian termahal) dibagi ke beberapa proses bila daftar harganya banyak;
+    hasil digabung sesuai urutan input.
+
+    Args:
+        daftar_harga (list): List dict {nama item: harga satuan}.
+        nama_sumber_daya (list): Nama sumber daya sesuai kolom bobot.
+        bobot (np.ndarray): Array (3, n_sumber_daya) dari bobot_sumber_daya.
+        max_workers (int, optional): Jumlah proses. Default: jumlah CPU.
+
+    Returns:
+        tuple: (array (N, 3), list jumlah sumber daya tanpa harga per daftar)
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if len(daftar_harga) < MIN_DAFTAR_PARALEL or max_workers == 1:
+        return _total_per_daftar(daftar_harga, nama_sumber_daya, bobot)
+
+    n_potongan = min(max_workers, len(daftar_harga))
+    batas = np.linspace(0, len(daftar_harga), n_potongan + 1).astype(int)
+    with ProcessPoolExecutor(max_workers=n_potongan) as pool:
+        futures = [
+            pool.submit(_total_per_daftar, daftar_harga[awal:akhir], nama_sumber_daya, bobot)
+            for awal, akhir in zip(batas[:-1], batas[1:])
+        ]
+        hasil = [future.result() for future in futures]
+    return np.vstack([total for total, _ in hasil]), [n for _, tanpa in hasil for n in tanpa]
+
+
+# ==========================================
+# 3. TABEL PERBANDINGAN SKENARIO
+# ==========================================
+def hitung_skenario(kode_ahsp, volume, matriks, daftar_harga, skenario, acuan=None, max_workers=None):
+    """
+    Menghitung total RAB satu BOQ untuk banyak skenario sekaligus.
+
+    Rumus overhead/PPN sama dengan hitung_rab_lengkap, diterapkan pada total kategori
+    (secara matematis sama dengan menjumlah per baris; selisih hanya pembulatan float).
+
+    Args:
+        kode_ahsp, volume (list-like): BOQ.
+        matriks (MatriksKoefisien): Matriks master AHSP.
+        daftar_harga (dict): {nama daftar harga: dict harga dasar}.
+        skenario (list): List Skenario (lihat grid_skenario).
+        acuan (str, optional): Nama skenario acuan untuk kolom selisih_persen. Default: skenario pertama.
+        max_workers (int, optional): Jumlah proses untuk pencocokan harga.
+
+    Returns:
+        pd.DataFrame: Satu baris per skenario dengan kolom KOLOM_PERBANDINGAN.
+    """
+    if not skenario:
+        return pd.DataFrame(columns=KOLOM_PERBANDINGAN)
+    kunci_daftar = list(dict.fromkeys(s.daftar_harga for s in skenario))
+    dipakai, bobot = bobot_sumber_daya(matriks, kode_ahsp, volume)
+    nama_sumber_daya = [matriks.sumber_daya[i] for i in dipakai]
+
+    # Satu vektor harga per daftar harga, dipakai bersama oleh semua pengaturan overhead/PPN-nya
+    total_daftar, tanpa_harga = total_per_daftar_harga(
+        [daftar_harga[k] for k in kunci_daftar], nama_sumber_daya, bobot, max_workers
+    )
+    posisi_daftar = {k: i for i, k in enumerate(kunci_daftar)}
+    idx = np.array([posisi_daftar[s.daftar_harga] for s in skenario])
+    kategori = total_daftar[idx]
+
+    persen_overhead = np.array([s.persen_overhead for s in skenario])
+    persen_ppn = np.array([s.persen_ppn for s in skenario])
+    sub_langsung = kategori.sum(axis=1)
+    overhead = sub_langsung * (persen_overhead / 100)
+    tanpa_ppn = sub_langsung + overhead
+    ppn = tanpa_ppn * (persen_ppn / 100)
+    dengan_ppn = tanpa_ppn + ppn
+
+    nama_skenario = [s.nama for s in skenario]
+    posisi_acuan = nama_skenario.index(acuan) if acuan is not None else 0
+    nilai_acuan = dengan_ppn[posisi_acuan]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        selisih = np.where(nilai_acuan != 0, (dengan_ppn - nilai_acuan) / nilai_acuan * 100, np.nan)
+
+    return pd.DataFrame({
+        "skenario": nama_skenario,
+        "daftar_harga": [s.daftar_harga for s in skenario],
+        "persen_overhead": persen_overhead,
+        "persen_ppn": persen_ppn,
+        "total_tenaga": kategori[:, 0],
+        "total_bahan": kategori[:, 1],
+        "total_alat": kategori[:, 2],
+        "total_sub_langsung": sub_langsung,
+        "total_overhead": overhead,
+        "total_tanpa_ppn": tanpa_ppn,
+        "total_ppn": ppn,
+        "total_dengan_ppn": dengan_ppn,
+        "selisih_persen": selisih,
+        "sumber_daya_tanpa_harga": np.array(tanpa_harga)[idx],
+    }, columns=KOLOM_PERBANDINGAN)
+
+
+# ==========================================
+# 4. CLI
+# ==========================================
+def main(argv=None):
+    from engine import ahsp_store
+    from engine.ahsp_bertingkat import analisa_bertingkat
+    from engine.headless import baca_boq, baca_harga
+
+    parser = argparse.ArgumentParser(description="Bandingkan total RAB satu BOQ terhadap banyak daftar harga dan pengaturan OH/PPN.")
+    parser.add_argument("boq", help="File BOQ (CSV/XLSX/Parquet) dengan kolom kode_ahsp & volume")
+    parser.add_argument("--master", required=True, help="Master AHSP (CSV/XLSX)")
+    parser.add_argument("--bidang", help="Bidang master (misal sda); wajib bila kode dipakai di lebih dari satu bidang")
+    parser.add_argument("--harga", required=True, nargs="+", help="File daftar harga (satu per wilayah); nama skenario = nama file")
+    parser.add_argument("--overhead", type=float, nargs="+", default=[15.0], help="Persentase overhead (boleh beberapa)")
+    parser.add_argument("--ppn", type=float, nargs="+", default=[11.0], help="Persentase PPN (boleh beberapa)")
+    parser.add_argument("--workers", type=int, help="Jumlah proses (default: jumlah CPU)")
+    parser.add_argument("--output", help="Tulis tabel perbandingan ke CSV/XLSX (default: cetak ke layar)")
+    args = parser.parse_args(argv)
+
+    store = ahsp_store.muat_master(args.master)
+    df_boq = baca_boq(args.boq)
+    daftar_harga = {os.path.splitext(os.path.basename(p))[0]: baca_harga(p) for p in args.harga}
+    skenario = grid_skenario(list(daftar_harga), [(oh, ppn) for oh in args.overhead for ppn in args.ppn])
+
+    # Sub-analisa diuraikan ke sumber daya dasar agar bobot hanya berisi item yang berharga
+    matriks = analisa_bertingkat(store.matriks_bidang(args.bidang)).matriks_datar()
+    df = hitung_skenario(df_boq["kode_ahsp"], df_boq["volume"], matriks, daftar_harga, skenario, max_workers=args.workers)
+    if args.output and args.output.lower().endswith(".xlsx"):
+        df.to_excel(args.output, index=False)
+    elif args.output:
+        df.to_csv(args.output, index=False)
+    else:
+        kolom = ["skenario", "total_tanpa_ppn", "total_dengan_ppn", "selisih_persen", "sumber_daya_tanpa_harga"]
+        print(df[kolom].to_string(index=False, float_format="{:,.2f}".format))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Mode uang titik-tetap: seluruh perhitungan RAB dalam sen (int64), tanpa akumulasi float.
+
+Aturan pembulatan (setengah menjauhi nol, "0,5 ke atas"), diterapkan berurutan:
+1. Harga dasar dibulatkan ke sen.
+2. Koefisien dibulatkan ke DESIMAL_KOEFISIEN desimal, volume ke DESIMAL_VOLUME desimal,
+   persentase OH/PPN ke DESIMAL_PERSEN desimal.
+3. Biaya tiap komponen (koefisien x harga) dibulatkan ke sen; HSP tenaga/bahan/alat =
+   jumlah eksak komponen, HSP langsung = jumlah eksak ketiganya.
+4. OH = HSP langsung x %OH dibulatkan ke sen; HSP tanpa PPN = langsung + OH.
+5. PPN per satuan = HSP tanpa PPN x %PPN dibulatkan ke sen; HSP dengan PPN = tanpa PPN + PPN.
+6. Total per baris: tenaga/bahan/alat/OH masing-masing HSP x volume dibulatkan ke sen;
+   total langsung dan tanpa PPN dijumlah dari komponennya (bukan dibulatkan ulang),
+   PPN baris = total tanpa PPN x %PPN dibulatkan ke sen, total dengan PPN = tanpa PPN + PPN.
+7. Rekap proyek = jumlah int64 kolom baris, jadi selalu sama dengan penjumlahan per baris.
+
+Setiap perkalian-lalu-bagi dihitung eksak dengan int64 (kali_bagi), bukan decimal.Decimal,
+sehingga tetap ter-vektorisasi. Sub-analisa (AHSP bertingkat) dihitung lewat matriks datar:
+koefisien dikalikan sepanjang rantai lalu dibulatkan sekali.
+
+ke_rupiah (sen / 100 sebagai float64) tepat 2 desimal untuk nilai hingga ~90 triliun rupiah;
+di atas itu simpan/olah kolom sen-nya langsung.
+"""
+import numpy as np
+import pandas as pd
+
+from engine.batch_engine import KOLOM_BIAYA, MatriksKoefisien
+
+SEN_PER_RUPIAH = 100
+DESIMAL_KOEFISIEN = 6
+DESIMAL_VOLUME = 3
+DESIMAL_PERSEN = 2
+SKALA_KOEFISIEN = 10 ** DESIMAL_KOEFISIEN
+SKALA_VOLUME = 10 ** DESIMAL_VOLUME
+SKALA_PERSEN = 10 ** DESIMAL_PERSEN  # 11,00% -> 1100, dibagi 100 x SKALA_PERSEN
+
+
+# ==========================================
+# 1. KONVERSI & PEMBULATAN
+# ==========================================
+def bulat_skala(nilai, skala):
+    """
+    round(nilai x skala) setengah menjauhi nol sebagai int64.
+
+    Hasil kali dibulatkan dulu ke 6 desimal agar galat representasi float
+    (1450.005 x 100 = 145000.49999...) tidak membalik arah pembulatan.
+    """
+    x = np.round(np.asarray(nilai, dtype=np.float64) * skala, 6)
+    return (np.sign(x) * np.floor(np.abs(x) + 0.5)).astype(np.int64)
+
+
+def ke_sen(rupiah):
+    """Rupiah (float) -> sen int64, dibulatkan setengah menjauhi nol."""
+    return bulat_skala(rupiah, SEN_PER_RUPIAH)
+
+
+def ke_rupiah(sen):
+    """Sen int64 -> rupiah float64 untuk tampilan/export (nilai tepat 2 desimal)."""
+    return np.asarray(sen, dtype=np.int64) / SEN_PER_RUPIAH
+
+
+def kali_bagi(a, b, pembagi):
+    """
+    round(a x b / pembagi) eksak dalam int64, setengah menjauhi nol.
+
+    b dipecah menjadi q x pembagi + r sehingga a x b / pembagi = a x q + a x r / pembagi;
+    hanya a x r (< a x pembagi) yang perlu dibulatkan, jadi tidak overflow selama
+    |a| x pembagi dan |a x b / pembagi| muat di int64.
+    """
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    tanda = np.sign(a) * np.sign(b)
+    a, b = np.abs(a), np.abs(b)
+    q, r = np.divmod(b, pembagi)
+    return tanda * (a * q + (a * r + pembagi // 2) // pembagi)
+
+
+def jumlah_sen(rupiah):
+    """
+    Jumlah kolom rupiah, dengan tiap nilai dibulatkan ke sen dulu (sama dengan yang tampil
+    di laporan) lalu dijumlah eksak dalam int64. NaN dilewati seperti pd.Series.sum.
+    """
+    rupiah = np.asarray(rupiah, dtype=np.float64)
+    return int(ke_sen(rupiah[~np.isnan(rupiah)]).sum()) / SEN_PER_RUPIAH
+
+
+# ==========================================
+# 2. HSP & RINCIAN BIAYA (INT64)
+# ==========================================
+def hsp_per_kategori_sen(matriks: MatriksKoefisien, harga_sen):
+    """
+    HSP tenaga/bahan/alat (sen) untuk setiap baris master.
+
+    Args:
+        matriks (MatriksKoefisien): Matriks datar (tanpa referensi sub-analisa).
+        harga_sen (np.ndarray): Harga sen int64 sesuai urutan id sumber daya.
+
+    Returns:
+        np.ndarray: Array int64 (n_item, 3).
+    """
+    n_item = matriks.n_item
+    baris_entri = np.repeat(np.arange(n_item, dtype=np.int64), np.diff(matriks.indptr))
+    biaya_entri = kali_bagi(bulat_skala(matriks.data, SKALA_KOEFISIEN), np.asarray(harga_sen)[matriks.indices], SKALA_KOEFISIEN)
+    hsp = np.zeros(n_item * 3, dtype=np.int64)
+    np.add.at(hsp, baris_entri * 3 + matriks.kategori, biaya_entri)
+    return hsp.reshape(n_item, 3)
+
+
+def rincian_biaya_sen(hsp_sen, volume, persen_overhead, persen_ppn):
+    """
+    Versi int64 dari batch_engine.rincian_biaya dengan aturan pembulatan modul ini.
+
+    Args:
+        hsp_sen (np.ndarray): Array int64 (n, 3) HSP tenaga, bahan, alat dalam sen.
+        volume (array-like): Volume per baris (dibulatkan ke DESIMAL_VOLUME desimal).
+        persen_overhead, persen_ppn (float | array-like): Skalar atau per baris.
+
+    Returns:
+        np.ndarray: Array int64 (n, 16) sen dengan urutan kolom KOLOM_BIAYA.
+    """
+    n = len(hsp_sen)
+    volume = np.broadcast_to(bulat_skala(volume, SKALA_VOLUME), (n,))
+    oh = np.broadcast_to(bulat_skala(persen_overhead, SKALA_PERSEN), (n,))
+    ppn = np.broadcast_to(bulat_skala(persen_ppn, SKALA_PERSEN), (n,))
+
+    hsp_tenaga, hsp_bahan, hsp_alat = hsp_sen[:, 0], hsp_sen[:, 1], hsp_sen[:, 2]
+    hsp_langsung = hsp_tenaga + hsp_bahan + hsp_alat
+    hsp_overhead = kali_bagi(hsp_langsung, oh, 100 * SKALA_PERSEN)
+    hsp_tanpa_ppn = hsp_langsung + hsp_overhead
+    hsp_ppn = kali_bagi(hsp_tanpa_ppn, ppn, 100 * SKALA_PERSEN)
+    hsp_dengan_ppn = hsp_tanpa_ppn + hsp_ppn
+
+    total_tenaga, total_bahan, total_alat, total_overhead = (
+        kali_bagi(h, volume, SKALA_VOLUME) for h in (hsp_tenaga, hsp_bahan, hsp_alat, hsp_overhead)
+    )
+    total_langsung = total_tenaga + total_bahan + total_alat
+    total_tanpa_ppn = total_langsung + total_overhead
+    total_ppn = kali_bagi(total_tanpa_ppn, ppn, 100 * SKALA_PERSEN)
+    total_dengan_ppn = total_tanpa_ppn + total_ppn
+
+    return np.column_stack((
+        hsp_tenaga, hsp_bahan, hsp_alat, hsp_langsung, hsp_overhead, hsp_tanpa_ppn, hsp_ppn, hsp_dengan_ppn,
+        total_tenaga, total_bahan, total_alat, total_langsung, total_overhead, total_tanpa_ppn, total_ppn, total_dengan_ppn,
+    )).astype(np.int64, copy=False)
+
+
+def hitung_rab_batch_sen(
+    kode_ahsp,
+    volume,
+    matriks: MatriksKoefisien,
+    harga: dict,
+    persen_overhead: float = 15.0,
+    persen_ppn: float = 11.0
+):
+    """
+    Seperti batch_engine.hitung_rab_batch, tetapi seluruh kolom biaya int64 sen.
+
+    Args:
+        kode_ahsp, volume (list-like): BOQ.
+        matriks (MatriksKoefisien): Matriks datar (AnalisaBertingkat.matriks_datar untuk master
+                                    dengan sub-analisa).
+        harga (dict): Harga dasar rupiah {nama sumber daya: harga satuan}.
+
+    Returns:
+        pd.DataFrame: Kolom 'kode_ahsp', 'volume' (float, sudah dibulatkan sesuai aturan)
+                      lalu KOLOM_BIAYA bertipe int64 (sen).
+    """
+    baris = matriks.posisi(kode_ahsp)
+    volume = np.asarray(volume, dtype=np.float64)
+    if len(volume) != len(baris):
+        raise ValueError("Panjang kode_ahsp dan volume harus sama.")
+
+    hsp = hsp_per_kategori_sen(matriks, ke_sen(matriks.vektor_harga(harga)))[baris]
+    rincian = rincian_biaya_sen(hsp, volume, persen_overhead, persen_ppn)
+
+    hasil = {"kode_ahsp": list(kode_ahsp), "volume": bulat_skala(volume, SKALA_VOLUME) / SKALA_VOLUME}
+    hasil.update(zip(KOLOM_BIAYA, rincian.T))
+    return pd.DataFrame(hasil)
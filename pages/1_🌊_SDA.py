@@ -1,11 +1,21 @@
 import streamlit as st
 import pandas as pd
 import json
+import os
 from datetime import datetime
 from io import BytesIO
 
 # Import engine
 from engine import sda_engine # Pastikan ini mengarah ke file sda_engine.py yang sudah di-rename
+from engine import master_data
+from engine.pencocok_harga import AMBIGU, TIDAK_DITEMUKAN, PencocokHarga
+from engine.batch_engine import NAMA_KOLOM_RAB
+from engine.item_rab import DaftarItem, ItemPekerjaan, RABBidang
+from engine.proyek_store import ProyekStore, panel_proyek, pengaturan_proyek, proyek_dibuka
+from engine.skenario_harga import grid_skenario, hitung_skenario
+from engine.rekap_sumber_daya import jadwal_pengadaan, rincian_kebutuhan
+from engine.pencarian_ahsp import pilih_ahsp
+from engine.ahsp_bertingkat import analisa_bertingkat
 
 # --- KONFIGURASI APLIKASI ---
 st.set_page_config(
@@ -14,25 +24,15 @@ st.set_page_config(
     layout="wide"
 )
 
+# Di atas jumlah baris ini, export Excel memakai mode streaming (constant_memory)
+BATAS_BARIS_EXPORT_STREAM = 5000
+
 # --- FUNGSI BANTU ---
-@st.cache_data
 def load_ahsp_master_sda(file_path='data/db_ahsp_master.xlsx'):
     try:
-        df_master = pd.read_excel(file_path)
-        if 'bidang' in df_master.columns:
-            # Filter untuk bidang 'sda' dan pastikan semua kolom yang diperlukan ada
-            df_sda = df_master[df_master['bidang'].str.lower() == 'sda'].copy()
-            required_cols = ['kode_ahsp', 'uraian_pekerjaan', 'satuan', 'tenaga', 'bahan', 'alat']
-            if not all(col in df_sda.columns for col in required_cols):
-                st.error(f"Kolom wajib ({', '.join(required_cols)}) tidak lengkap di master AHSP SDA.")
-                return pd.DataFrame()
-
-            # Pastikan koefisien adalah string JSON yang valid
-            for col in ['tenaga', 'bahan', 'alat']:
-                df_sda[col] = df_sda[col].apply(lambda x: json.loads(x) if pd.notna(x) and isinstance(x, str) else {})
-
-            return df_sda
-        return pd.DataFrame()
+        # Master dimuat sekali per proses (store biner + cache mtime di engine.master_data),
+        # dipakai bersama Hello.py; yang dikembalikan irisan bidang SDA tanpa salinan
+        return master_data.muat_master_ahsp(file_path).view_bidang('sda')
     except FileNotFoundError:
         st.error(f"File master AHSP tidak ditemukan di: {file_path}")
         return pd.DataFrame()
@@ -40,6 +40,11 @@ def load_ahsp_master_sda(file_path='data/db_ahsp_master.xlsx'):
         st.error(f"Error saat memuat master AHSP SDA: {e}")
         return pd.DataFrame()
 
+@st.cache_resource
+def proyek_store():
+    """Basis data proyek tersimpan (data/proyek.db), satu objek untuk semua sesi."""
+    return ProyekStore()
+
 @st.cache_data
 def load_default_harga_dasar():
     # Contoh harga dasar default
@@ -57,39 +62,9 @@ def load_default_harga_dasar():
         "Molon (Jam)": 50000,
     }
 
-def match_price(item_name: str, prices: dict):
-    """
-    Fungsi untuk mencocokkan nama item dengan harga yang tersedia.
-    Prioritaskan exact match, lalu fuzzy match (case-insensitive).
-    """
-    item_name_lower = item_name.lower()
-
-    # 1. Exact match
-    if item_name in prices:
-        return prices[item_name]
-
-    # 2. Case-insensitive exact match
-    for k, v in prices.items():
-        if k.lower() == item_name_lower:
-            return v
-
-    # 3. Fuzzy match (item_name contained in price_key)
-    # Ini bisa berbahaya jika ada "Pasir" dan "Pasir Beton".
-    # Untuk sementara, kita pertahankan logika sebelumnya namun dengan peringatan.
-    # Idealnya, menggunakan ID unik atau mapping manual.
-    for k, v in prices.items():
-        if item_name_lower in k.lower(): # Perhatikan potensi ambiguitas di sini!
-            # st.warning(f"Peringatan: '{item_name}' dicocokkan dengan '{k}'. Pastikan ini benar.")
-            return v
-
-    return 0 # Jika tidak ditemukan, kembalikan 0
-
-
 # --- SIDEBAR ---
 st.sidebar.header("Pengaturan Global RAB")
-proyek_name = st.sidebar.text_input("Nama Proyek", "Proyek SDA")
-persen_overhead = st.sidebar.number_input("Persentase Overhead & Profit (%)", min_value=0.0, max_value=100.0, value=15.0, step=0.5)
-persen_ppn = st.sidebar.number_input("Persentase PPN (%)", min_value=0.0, max_value=100.0, value=11.0, step=0.5)
+proyek_name, persen_overhead, persen_ppn = pengaturan_proyek(proyek_store(), "sda", "Proyek SDA")
 
 st.sidebar.markdown("---")
 st.sidebar.header("Manajemen Harga Dasar")
@@ -139,6 +114,9 @@ elif harga_source == "Input Manual":
 with st.sidebar.expander("Daftar Harga Dasar Aktif"):
     st.json(harga_dasar_final)
 
+# Indeks harga dibangun sekali per daftar harga, bukan per sumber daya
+pencocok_harga = PencocokHarga(harga_dasar_final)
+
 # --- MAIN APLIKASI ---
 st.title("🌊 RAB Modul Sumber Daya Air (SDA)")
 st.write(f"Menyusun RAB untuk proyek SDA Anda. Nama Proyek: **{proyek_name}**")
@@ -151,21 +129,48 @@ if df_ahsp_sda.empty:
 else:
     st.subheader("Pilih Pekerjaan dan Masukkan Volume")
 
-    # Inisialisasi keranjang RAB di session state jika belum ada
-    if 'keranjang_rab_sda' not in st.session_state:
-        st.session_state.keranjang_rab_sda = []
+    # RAB halaman (keranjang kolumnar + indeks inkremental) di session state, model sama dengan CK/BM
+    if not isinstance(st.session_state.get('rab_sda'), RABBidang):
+        st.session_state.rab_sda = RABBidang()
+    rab = st.session_state.rab_sda
+
+    # Jika harga dasar berubah (misal lewat Input Manual), hitung ulang hanya baris yang terdampak
+    rab.sinkron_harga(pencocok_harga.harga)
+
+    # Sub-analisa (kode AHSP yang dipakai sebagai komponen AHSP lain) diuraikan ke sumber daya dasar.
+    # Matriks bidang SDA saja: kode hanya unik per bidang, baris ke-i = baris ke-i df_ahsp_sda
+    try:
+        analisa_ahsp = analisa_bertingkat(master_data.muat_master_ahsp().matriks_bidang('sda'))
+    except ValueError as e:  # termasuk SiklusAHSP
+        st.error(f"Master AHSP tidak valid: {e}")
+        st.stop()
+
+    # Proyek tersimpan dibaca per halaman (keyset) dan dihitung ulang sekaligus per halaman
+    id_proyek_buka = proyek_dibuka("sda")
+    if id_proyek_buka is not None:
+        rab = st.session_state.rab_sda = RABBidang()
+        try:
+            jumlah_baris = rab.muat_proyek(
+                proyek_store(), id_proyek_buka, analisa_ahsp.matriks_datar(), pencocok_harga.harga, persen_overhead, persen_ppn
+            )
+            st.success(f"Proyek '{proyek_name}' dibuka ({jumlah_baris} baris), dihitung dengan harga dasar aktif.")
+        except (KeyError, ValueError) as e:
+            rab = st.session_state.rab_sda = RABBidang()
+            st.error(f"Proyek tidak bisa dibuka dengan master AHSP saat ini: {e}")
+    panel_proyek(proyek_store(), rab, "sda", proyek_name, persen_overhead, persen_ppn, harga_dasar_final, harga_source)
 
-    # Dropdown untuk memilih pekerjaan AHSP
-    selected_ahsp_index = st.selectbox(
-        "Pilih Uraian Pekerjaan:",
-        df_ahsp_sda.index,
-        format_func=lambda x: f"{df_ahsp_sda.loc[x, 'kode_ahsp']} - {df_ahsp_sda.loc[x, 'uraian_pekerjaan']}"
-    )
+    # Cari sambil ketik lewat indeks teks (dibangun sekali per versi master), bukan selectbox seluruh master
+    indeks_ahsp_sda = master_data.muat_master_ahsp().indeks_pencarian('sda')
+    selected_ahsp_index = pilih_ahsp(indeks_ahsp_sda, label="Cari Uraian Pekerjaan (kode / uraian):", key="ahsp_sda")
 
     if selected_ahsp_index is not None:
-        selected_pekerjaan = df_ahsp_sda.loc[selected_ahsp_index]
+        selected_pekerjaan = df_ahsp_sda.iloc[selected_ahsp_index]
         st.write(f"**Uraian Pekerjaan:** {selected_pekerjaan['uraian_pekerjaan']}")
         st.write(f"**Satuan:** {selected_pekerjaan['satuan']}")
+        if analisa_ahsp.ada_referensi:
+            koef_tenaga, koef_bahan, koef_alat = analisa_ahsp.koefisien_datar(selected_pekerjaan['kode_ahsp'])
+        else:
+            koef_tenaga, koef_bahan, koef_alat = selected_pekerjaan['tenaga'], selected_pekerjaan['bahan'], selected_pekerjaan['alat']
 
         volume_input = st.number_input(
             f"Masukkan Volume Pekerjaan ({selected_pekerjaan['satuan']}):",
@@ -174,53 +179,34 @@ else:
             step=0.01
         )
 
+        with st.expander("Pencocokan Harga Sumber Daya"):
+            hasil_cocok = pencocok_harga.cocokkan(
+                [*koef_tenaga, *koef_bahan, *koef_alat]
+            )
+            st.dataframe(
+                pd.DataFrame(
+                    [{"Sumber Daya": k, "Kunci Harga": v.kunci, "Aturan": v.aturan, "Kandidat": ", ".join(v.kandidat), "Harga": v.harga}
+                     for k, v in hasil_cocok.items()]
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
+        tanpa_harga = [k for k, v in hasil_cocok.items() if v.aturan in (AMBIGU, TIDAK_DITEMUKAN)]
+        if tanpa_harga:
+            st.warning(f"Harga tidak ditemukan atau ambigu (dihitung 0): {', '.join(tanpa_harga)}")
+
         if st.button("Tambah ke RAB"):
             if volume_input > 0:
-                # Ambil koefisien
-                koef_tenaga = selected_pekerjaan.get('tenaga', {})
-                koef_bahan = selected_pekerjaan.get('bahan', {})
-                koef_alat = selected_pekerjaan.get('alat', {})
-
-                # Lakukan matching harga
-                harga_tenaga_matched = {k: match_price(k, harga_dasar_final) for k in koef_tenaga.keys()}
-                harga_bahan_matched = {k: match_price(k, harga_dasar_final) for k in koef_bahan.keys()}
-                harga_alat_matched = {k: match_price(k, harga_dasar_final) for k in koef_alat.keys()}
-
-                # Hitung RAB menggunakan engine
-                hasil_hitung = sda_engine.hitung_rab_lengkap(
-                    volume=volume_input,
-                    koef_tenaga=koef_tenaga,
-                    koef_bahan=koef_bahan,
-                    koef_alat=koef_alat,
-                    harga_tenaga=harga_tenaga_matched,
-                    harga_bahan=harga_bahan_matched,
-                    harga_alat=harga_alat_matched,
-                    persen_overhead=persen_overhead, # Ambil dari sidebar
-                    persen_ppn=persen_ppn # Ambil dari sidebar
+                # Hitung lewat matriks datar (jalur batch yang sama dengan CK/BM dan proyek tersimpan);
+                # baris yang dihitung = baris yang ditampilkan, bukan hasil cari ulang lewat kode
+                rab.tambah(
+                    analisa_ahsp.matriks_datar(),
+                    DaftarItem.dari_item([ItemPekerjaan(
+                        selected_pekerjaan['kode_ahsp'], selected_pekerjaan['uraian_pekerjaan'],
+                        selected_pekerjaan['satuan'], volume_input
+                    )]),
+                    pencocok_harga.harga, persen_overhead, persen_ppn, baris_master=[selected_ahsp_index]
                 )
-
-                # Tambahkan ke keranjang
-                st.session_state.keranjang_rab_sda.append({
-                    "kode_ahsp": selected_pekerjaan['kode_ahsp'],
-                    "Uraian Pekerjaan": selected_pekerjaan['uraian_pekerjaan'],
-                    "Satuan": selected_pekerjaan['satuan'],
-                    "Volume": volume_input,
-                    "HSP Tenaga": hasil_hitung['biaya']['hsp_tenaga'],
-                    "HSP Bahan": hasil_hitung['biaya']['hsp_bahan'],
-                    "HSP Alat": hasil_hitung['biaya']['hsp_alat'],
-                    "HSP Sub Total Langsung": hasil_hitung['biaya']['hsp_sub_langsung'],
-                    "HSP OHP": hasil_hitung['biaya']['hsp_overhead'],
-                    "HSP Tanpa PPN": hasil_hitung['biaya']['hsp_tanpa_ppn'],
-                    "Total Tenaga": hasil_hitung['biaya']['total_tenaga_item'],
-                    "Total Bahan": hasil_hitung['biaya']['total_bahan_item'],
-                    "Total Alat": hasil_hitung['biaya']['total_alat_item'],
-                    "Total Sub Total Langsung": hasil_hitung['biaya']['total_sub_langsung_item'],
-                    "Total OHP": hasil_hitung['biaya']['total_overhead_item'],
-                    "Total Tanpa PPN": hasil_hitung['biaya']['total_tanpa_ppn_item'],
-                    "PPN (%)": persen_ppn, # Simpan persen PPN untuk summary
-                    "Total PPN": hasil_hitung['biaya']['total_ppn_item'],
-                    "Total Dengan PPN": hasil_hitung['biaya']['total_dengan_ppn_item'],
-                })
                 st.success(f"'{selected_pekerjaan['uraian_pekerjaan']}' dengan volume {volume_input} ditambahkan ke RAB!")
             else:
                 st.warning("Volume pekerjaan harus lebih dari 0.")
@@ -228,37 +214,39 @@ else:
     st.markdown("---")
     st.subheader("Ringkasan RAB Proyek")
 
-    if st.session_state.keranjang_rab_sda:
-        df_rab = pd.DataFrame(st.session_state.keranjang_rab_sda)
-
-        # Tampilkan DataFrame dengan formatting
+    if len(rab):
+        # Tampilan tanpa salinan atas kolom keranjang; format angka lewat column_config
+        # (dirender di browser), bukan Styler yang memformat setiap sel di Python
+        df_rab = rab.ke_dataframe()
         st.dataframe(
-            df_rab.style.format({
-                "Volume": "{:,.2f}",
-                "HSP Tenaga": "Rp {:,.2f}",
-                "HSP Bahan": "Rp {:,.2f}",
-                "HSP Alat": "Rp {:,.2f}",
-                "HSP Sub Total Langsung": "Rp {:,.2f}",
-                "HSP OHP": "Rp {:,.2f}",
-                "HSP Tanpa PPN": "Rp {:,.2f}",
-                "Total Tenaga": "Rp {:,.2f}",
-                "Total Bahan": "Rp {:,.2f}",
-                "Total Alat": "Rp {:,.2f}",
-                "Total Sub Total Langsung": "Rp {:,.2f}",
-                "Total OHP": "Rp {:,.2f}",
-                "Total Tanpa PPN": "Rp {:,.2f}",
-                "PPN (%)": "{:,.2f}%",
-                "Total PPN": "Rp {:,.2f}",
-                "Total Dengan PPN": "Rp {:,.2f}",
-            }),
+            df_rab,
+            column_config={
+                "Volume": st.column_config.NumberColumn(format="localized"),
+                "PPN (%)": st.column_config.NumberColumn(format="%.2f%%"),
+                **{
+                    kolom: st.column_config.NumberColumn(f"{kolom} (Rp)", format="localized")
+                    for kolom in NAMA_KOLOM_RAB.values()
+                },
+            },
             hide_index=True,
             use_container_width=True
         )
 
-        # Hitung Total Akhir
-        grand_total_tanpa_ppn = df_rab['Total Tanpa PPN'].sum()
-        grand_total_ppn = df_rab['Total PPN'].sum()
-        grand_total_dengan_ppn = df_rab['Total Dengan PPN'].sum()
+        with st.expander("Hapus Baris RAB"):
+            label_baris = {
+                id_baris: f"{nomor}. {uraian}"
+                for nomor, (id_baris, uraian) in enumerate(zip(rab.id_baris().tolist(), df_rab["Uraian Pekerjaan"]), start=1)
+            }
+            id_hapus = st.selectbox("Pilih baris:", list(label_baris), format_func=label_baris.__getitem__)
+            if st.button("Hapus Baris"):
+                rab.hapus(id_hapus)
+                st.rerun()
+
+        # Hitung Total Akhir (dipelihara indeks secara delta, tanpa menjumlah ulang semua baris)
+        rekap_rab = rab.rekap()
+        grand_total_tanpa_ppn = rekap_rab['total_tanpa_ppn_item']
+        grand_total_ppn = rekap_rab['total_ppn_item']
+        grand_total_dengan_ppn = rekap_rab['total_dengan_ppn_item']
 
         st.markdown(
             f"""
@@ -282,18 +270,103 @@ else:
         col_clear, col_export = st.columns([1, 1])
         with col_clear:
             if st.button("Bersihkan RAB"):
-                st.session_state.keranjang_rab_sda = []
+                st.session_state.rab_sda = RABBidang()
                 st.success("Keranjang RAB telah dibersihkan!")
                 st.rerun()
         with col_export:
             # Menggunakan fungsi export_to_excel dari sda_engine
-            excel_bytes = sda_engine.export_to_excel(df_rab, nama_proyek=proyek_name)
-            st.download_button(
+            tombol_download = dict(
                 label="Download RAB Excel",
-                data=excel_bytes,
                 file_name=f"RAB_{proyek_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
+            # Workbook hanya dibuat atas permintaan, lalu disimpan per versi keranjang: rerun lain
+            # (ketik volume, ganti pilihan) tidak menulis ulang Excel selama RAB tidak berubah
+            kunci_excel = (rab.versi, proyek_name)
+            excel = st.session_state.get("excel_sda")
+            if (excel is None or excel[0] != kunci_excel) and st.button("Siapkan Excel"):
+                if len(df_rab) > BATAS_BARIS_EXPORT_STREAM:
+                    # RAB besar: workbook ditulis bertahap ke disk (constant_memory), yang disimpan
+                    # hanya file xlsx jadinya; file sementara langsung dihapus
+                    path_excel = sda_engine.export_to_excel_stream(df_rab, nama_proyek=proyek_name)
+                    try:
+                        with open(path_excel, "rb") as file_excel:
+                            isi_excel = file_excel.read()
+                    finally:
+                        os.remove(path_excel)
+                else:
+                    isi_excel = sda_engine.export_to_excel(df_rab, nama_proyek=proyek_name)
+                excel = st.session_state.excel_sda = (kunci_excel, isi_excel)
+            if excel is not None and excel[0] == kunci_excel:
+                st.download_button(data=excel[1], **tombol_download)
+
+        with st.expander("Bandingkan Skenario Harga (Multi Wilayah)"):
+            # Satu BOQ x N daftar harga x pengaturan OH/PPN, dihitung sekaligus sebagai perkalian matriks
+            file_harga_skenario = st.file_uploader(
+                "Upload daftar harga per wilayah (kolom 'nama_item' & 'harga_satuan')",
+                type=["xlsx", "csv"], accept_multiple_files=True, key="harga_skenario_sda"
+            )
+            teks_overhead = st.text_input("Overhead (%) dipisah koma", f"{persen_overhead:g}", key="oh_skenario_sda")
+            teks_ppn = st.text_input("PPN (%) dipisah koma", f"{persen_ppn:g}", key="ppn_skenario_sda")
+
+            if st.button("Hitung Skenario"):
+                daftar_harga = {"Harga Aktif": harga_dasar_final}
+                for f in file_harga_skenario or []:
+                    df_h = pd.read_csv(f) if f.name.lower().endswith(".csv") else pd.read_excel(f)
+                    if {'nama_item', 'harga_satuan'} <= set(df_h.columns):
+                        daftar_harga[f.name.rsplit(".", 1)[0]] = dict(zip(df_h['nama_item'], df_h['harga_satuan']))
+                    else:
+                        st.warning(f"{f.name} dilewati: kolom 'nama_item'/'harga_satuan' tidak ada.")
+                try:
+                    pengaturan = [
+                        (float(oh), float(ppn))
+                        for oh in teks_overhead.split(",") if oh.strip()
+                        for ppn in teks_ppn.split(",") if ppn.strip()
+                    ]
+                    skenario = grid_skenario(list(daftar_harga), pengaturan)
+                    df_skenario = hitung_skenario(
+                        df_rab["kode_ahsp"], df_rab["Volume"], analisa_ahsp.matriks_datar(),
+                        daftar_harga, skenario
+                    )
+                except (ValueError, KeyError) as e:
+                    st.error(f"Input skenario tidak valid: {e}")
+                else:
+                    st.dataframe(
+                        df_skenario,
+                        column_config={
+                            kolom: st.column_config.NumberColumn(format="localized")
+                            for kolom in df_skenario.columns if kolom.startswith("total_")
+                        },
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
+        with st.expander("Rekap Kebutuhan Sumber Daya (Pengadaan)"):
+            # Volume x koefisien (sub-analisa diuraikan) dijumlah per sumber daya untuk seluruh keranjang
+            matriks_datar = analisa_ahsp.matriks_datar()
+            harga_rekap = {nama: pencocok_harga.harga(nama) for nama in matriks_datar.sumber_daya}
+            df_jadwal = jadwal_pengadaan(df_rab["kode_ahsp"], df_rab["Volume"], matriks_datar, harga_rekap)
+            kolom_angka_rekap = {
+                "kuantitas": st.column_config.NumberColumn(format="%.3f"),
+                "harga_satuan": st.column_config.NumberColumn("harga_satuan (Rp)", format="localized"),
+                "total_biaya": st.column_config.NumberColumn("total_biaya (Rp)", format="localized"),
+            }
+            st.dataframe(
+                df_jadwal.drop(columns="periode"), column_config=kolom_angka_rekap,
+                hide_index=True, use_container_width=True
+            )
+            st.download_button(
+                label="Download Jadwal Pengadaan (CSV)",
+                data=df_jadwal.to_csv(index=False).encode("utf-8"),
+                file_name=f"Pengadaan_{proyek_name}.csv",
+                mime="text/csv"
+            )
+            if st.checkbox("Tampilkan rincian per baris RAB", key="rincian_sumber_daya_sda"):
+                st.dataframe(
+                    rincian_kebutuhan(df_rab["kode_ahsp"], df_rab["Volume"], matriks_datar, harga_rekap),
+                    column_config={**kolom_angka_rekap, "koefisien": st.column_config.NumberColumn(format="%.4f")},
+                    hide_index=True, use_container_width=True
+                )
 
     else:
         st.info("Keranjang RAB masih kosong. Silakan tambahkan pekerjaan.")
@@ -3,7 +3,12 @@ import pandas as pd
 
 # Import Engine (Pastikan file sda_engine.py ada di folder engine)
 try:
-    from engine import sda_engine
+    from engine import ahsp_store, sda_engine
+    from engine.batch_engine import NAMA_KOLOM_RAB, susun_matriks_koefisien
+    from engine.item_rab import DaftarItem, ItemPekerjaan, RABBidang
+    from engine.pencocok_harga import AMBIGU, TIDAK_DITEMUKAN, PencocokHarga
+    from engine.pencarian_ahsp import indeks_dataframe, pilih_ahsp
+    from engine.proyek_store import ProyekStore, panel_proyek, pengaturan_proyek, proyek_dibuka
 except ImportError:
     st.error("🚨 File engine/sda_engine.py tidak ditemukan!")
     st.stop()
@@ -15,9 +20,14 @@ st.set_page_config(page_title="Modul Cipta Karya", page_icon="🏗️", layout="
 st.title("🏗️ Modul Cipta Karya (Gedung)")
 st.caption("Spesialisasi: Struktur, Arsitektur, & MEP (Mode Lite)")
 
-# Init Session State
-if "boq_ck" not in st.session_state:
-    st.session_state.boq_ck = []
+# Init Session State (RAB kolumnar, model sama dengan halaman SDA)
+if not isinstance(st.session_state.get("boq_ck"), RABBidang):
+    st.session_state.boq_ck = RABBidang()
+
+@st.cache_resource
+def proyek_store():
+    """Basis data proyek tersimpan (data/proyek.db), satu objek untuk semua sesi."""
+    return ProyekStore()
 
 # ==========================================
 # 1. DATABASE MANDIRI (DEFAULT DATA)
@@ -53,21 +63,32 @@ def get_default_ck():
     return pd.DataFrame(data)
 
 # --- SIDEBAR ---
+st.sidebar.header("⚙️ Pengaturan RAB")
+proyek_name, persen_overhead, persen_ppn = pengaturan_proyek(proyek_store(), "ck", "Proyek Gedung")
+
+st.sidebar.divider()
 st.sidebar.header("📂 Sumber Data")
 sumber = st.sidebar.radio("Pilih Database:", ["Data Contoh (Gedung)", "Upload Excel Proyek"], key="src_ck")
 
 if sumber == "Data Contoh (Gedung)":
     df_ahsp = get_default_ck()
+    matriks = susun_matriks_koefisien(df_ahsp, kolom_kode="kode")
     st.sidebar.success("✅ 3 Item Contoh Terload")
 else:
     f = st.sidebar.file_uploader("Upload Excel Analisa", type=["xlsx"])
+    df_ahsp, matriks = pd.DataFrame(), None
     if f:
         try:
-            df_ahsp = pd.read_excel(f)
+            # Format db_ahsp_master: kode/kode_ahsp, uraian, satuan, tenaga/bahan/alat berisi JSON
+            df_ahsp = ahsp_store.baca_master_mentah(f)
+            matriks = ahsp_store.susun_matriks_master(df_ahsp, f.name)
+            # Kode ganda membuat proyek tersimpan (dicari lewat kode) ambigu: tolak sejak upload
+            if matriks.kode_ganda():
+                raise ValueError(f"kode AHSP ganda: {', '.join(matriks.kode_ganda()[:10])}")
             st.sidebar.success(f"✅ {len(df_ahsp)} Item Terload")
-        except: st.sidebar.error("Gagal baca file")
-    else:
-        df_ahsp = pd.DataFrame()
+        except Exception as e:
+            df_ahsp, matriks = pd.DataFrame(), None
+            st.sidebar.error(f"Gagal baca file: {e}")
 
 # ==========================================
 # 2. HARGA SATUAN (SHS)
@@ -89,6 +110,25 @@ with st.sidebar.expander("📝 Update Harga Cepat"):
     default_harga["Semen PC"] = h_semen
     default_harga["Bata Merah"] = h_bata
 
+# Harga dasar berubah (update harga di sidebar) -> hitung ulang hanya baris yang terdampak
+pencocok_harga = PencocokHarga(default_harga)
+rab = st.session_state.boq_ck
+rab.sinkron_harga(pencocok_harga.harga)
+
+id_proyek_buka = proyek_dibuka("ck")
+if id_proyek_buka is not None:
+    rab = st.session_state.boq_ck = RABBidang()
+    if matriks is None:
+        st.error("Database AHSP belum dimuat, proyek tidak bisa dibuka.")
+    else:
+        try:
+            jumlah_baris = rab.muat_proyek(proyek_store(), id_proyek_buka, matriks, pencocok_harga.harga, persen_overhead, persen_ppn)
+            st.success(f"Proyek '{proyek_name}' dibuka ({jumlah_baris} baris), dihitung dengan harga aktif.")
+        except (KeyError, ValueError) as e:
+            rab = st.session_state.boq_ck = RABBidang()
+            st.error(f"Proyek tidak bisa dibuka dengan database AHSP saat ini: {e}")
+panel_proyek(proyek_store(), rab, "ck", proyek_name, persen_overhead, persen_ppn, default_harga, sumber)
+
 # ==========================================
 # 3. CORE APPS
 # ==========================================
@@ -96,45 +136,71 @@ if not df_ahsp.empty:
     st.info("💡 Silakan pilih item pekerjaan gedung di bawah ini:")
     
     # Pilih Item
-    pilihan = st.selectbox("Pilih Pekerjaan:", df_ahsp['uraian'].unique())
-    row = df_ahsp[df_ahsp['uraian'] == pilihan].iloc[0]
+    # Cari sambil ketik lewat indeks teks (dibangun ulang hanya jika isi master berubah)
+    pilihan = pilih_ahsp(indeks_dataframe(df_ahsp), label="Cari Pekerjaan (kode / uraian):", key="ahsp_ck")
+
+if not df_ahsp.empty and pilihan is not None:
+    row = df_ahsp.iloc[pilihan]
     
     c1, c2 = st.columns(2)
     vol = c1.number_input("Volume Pekerjaan", value=10.0, step=1.0)
     c2.text_input("Satuan", value=row['satuan'], disabled=True)
+
+    # Harga yang tidak cocok persis (tebakan fallback, ambigu, atau tidak ada) ditampilkan sebelum masuk RAB
+    nama_sumber_daya = [matriks.sumber_daya[i] for i in matriks.indices[matriks.indptr[pilihan]:matriks.indptr[pilihan + 1]]]
+    tidak_persis = {k: v for k, v in pencocok_harga.cocokkan(nama_sumber_daya).items() if v.aturan != "exact"}
+    if tidak_persis:
+        with st.expander(f"🔎 {len(tidak_persis)} sumber daya tidak cocok persis dengan daftar harga"):
+            st.dataframe(
+                pd.DataFrame(
+                    [{"Sumber Daya": k, "Kunci Harga": v.kunci, "Aturan": v.aturan, "Kandidat": ", ".join(v.kandidat), "Harga": v.harga}
+                     for k, v in tidak_persis.items()]
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
+        tanpa_harga = [k for k, v in tidak_persis.items() if v.aturan in (AMBIGU, TIDAK_DITEMUKAN)]
+        if tanpa_harga:
+            st.warning(f"Harga tidak ditemukan atau ambigu (dihitung 0): {', '.join(tanpa_harga)}")
     
     # Hitung
     if st.button("➕ Tambah ke RAB Gedung"):
         # Match harga otomatis
-        def match(x): 
-            for k,v in default_harga.items():
-                if k.lower() in str(x).lower(): return v
-            return 0
-            
-        hasil = sda_engine.hitung_rab_lengkap(
-            kode_ahsp=row['kode'], uraian=row['uraian'], volume=vol, satuan=row['satuan'],
-            koef_tenaga=row['tenaga'], harga_tenaga={k:match(k) for k in row['tenaga']},
-            koef_bahan=row['bahan'], harga_bahan={k:match(k) for k in row['bahan']},
-            koef_alat=row['alat'], harga_alat={k:match(k) for k in row['alat']}
+        rab.tambah(
+            matriks, DaftarItem.dari_item([ItemPekerjaan(row['kode'], row['uraian'], row['satuan'], vol)]),
+            pencocok_harga.harga, persen_overhead, persen_ppn, baris_master=[pilihan]
         )
-        st.session_state.boq_ck.append(hasil)
         st.success("Masuk!")
 
 # ==========================================
 # 4. TABEL OUTPUT
 # ==========================================
 st.divider()
-if st.session_state.boq_ck:
-    df_view = pd.DataFrame([{
-        "Uraian": i['meta']['uraian'], "Vol": i['meta']['volume'], 
-        "HSP": i['biaya']['hsp'], "Total": i['biaya']['total_final']
-    } for i in st.session_state.boq_ck])
-    
-    st.dataframe(df_view, use_container_width=True)
-    st.markdown(f"### Total Gedung: Rp {df_view['Total'].sum():,.0f}")
-    
-    # Download
-    xlsx = sda_engine.export_to_excel(df_view)
-    st.download_button("📥 Download Excel", xlsx, "RAB_Gedung.xlsx")
+if len(rab):
+    df_rab = rab.ke_dataframe()
+    st.dataframe(
+        df_rab,
+        column_config={
+            "Volume": st.column_config.NumberColumn(format="localized"),
+            "PPN (%)": st.column_config.NumberColumn(format="%.2f%%"),
+            **{kolom: st.column_config.NumberColumn(f"{kolom} (Rp)", format="localized") for kolom in NAMA_KOLOM_RAB.values()},
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    st.markdown(f"### Total Gedung: Rp {rab.rekap()['total_dengan_ppn_item']:,.0f}")
+
+    # Download (kolom sama dengan keranjang SDA, jadi laporan export_to_excel lengkap)
+    c1, c2 = st.columns(2)
+    if c1.button("🗑️ Bersihkan RAB", key="bersihkan_ck"):
+        st.session_state.boq_ck = RABBidang()
+        st.rerun()
+    # Excel dibuat atas permintaan dan disimpan per versi RAB, bukan setiap rerun
+    kunci_excel = (rab.versi, proyek_name)
+    excel = st.session_state.get("excel_ck")
+    if (excel is None or excel[0] != kunci_excel) and c2.button("📄 Siapkan Excel", key="siapkan_excel_ck"):
+        excel = st.session_state.excel_ck = (kunci_excel, sda_engine.export_to_excel(df_rab, nama_proyek=proyek_name))
+    if excel is not None and excel[0] == kunci_excel:
+        c2.download_button("📥 Download Excel", excel[1], "RAB_Gedung.xlsx")
 else:
     st.warning("Keranjang RAB masih kosong.")
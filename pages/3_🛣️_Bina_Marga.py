@@ -2,7 +2,12 @@ import streamlit as st
 import pandas as pd
 
 try:
-    from engine import sda_engine
+    from engine import ahsp_store, sda_engine
+    from engine.batch_engine import NAMA_KOLOM_RAB, susun_matriks_koefisien
+    from engine.item_rab import DaftarItem, ItemPekerjaan, RABBidang
+    from engine.pencocok_harga import AMBIGU, TIDAK_DITEMUKAN, PencocokHarga
+    from engine.pencarian_ahsp import indeks_dataframe, pilih_ahsp
+    from engine.proyek_store import ProyekStore, panel_proyek, pengaturan_proyek, proyek_dibuka
 except ImportError:
     st.error("🚨 Engine tidak ditemukan!")
     st.stop()
@@ -11,8 +16,14 @@ st.set_page_config(page_title="Modul Bina Marga", page_icon="🛣️", layout="w
 st.title("🛣️ Modul Bina Marga (Jalan & Jembatan)")
 st.caption("Spesialisasi: Aspal, Perkerasan, & Alat Berat (Mode Lite)")
 
-if "boq_bm" not in st.session_state:
-    st.session_state.boq_bm = []
+# Init Session State (RAB kolumnar, model sama dengan halaman SDA)
+if not isinstance(st.session_state.get("boq_bm"), RABBidang):
+    st.session_state.boq_bm = RABBidang()
+
+@st.cache_resource
+def proyek_store():
+    """Basis data proyek tersimpan (data/proyek.db), satu objek untuk semua sesi."""
+    return ProyekStore()
 
 # ==========================================
 # 1. DATABASE MANDIRI (DEFAULT DATA BM)
@@ -47,13 +58,29 @@ def get_default_bm():
     return pd.DataFrame(data)
 
 # --- SIDEBAR ---
+st.sidebar.header("⚙️ Pengaturan RAB")
+proyek_name, persen_overhead, persen_ppn = pengaturan_proyek(proyek_store(), "bm", "Proyek Jalan")
+
+st.sidebar.divider()
 sumber = st.sidebar.radio("Pilih Database:", ["Data Contoh (Jalan)", "Upload Excel Proyek"], key="src_bm")
 if sumber == "Data Contoh (Jalan)":
     df_ahsp = get_default_bm()
+    matriks = susun_matriks_koefisien(df_ahsp, kolom_kode="kode")
 else:
-    # Logic upload sama seperti CK/SDA
+    # Logic upload sama seperti CK: format db_ahsp_master (koefisien JSON)
     f = st.sidebar.file_uploader("Upload Excel", type=["xlsx"])
-    df_ahsp = pd.read_excel(f) if f else pd.DataFrame()
+    df_ahsp, matriks = pd.DataFrame(), None
+    if f:
+        try:
+            df_ahsp = ahsp_store.baca_master_mentah(f)
+            matriks = ahsp_store.susun_matriks_master(df_ahsp, f.name)
+            # Kode ganda membuat proyek tersimpan (dicari lewat kode) ambigu: tolak sejak upload
+            if matriks.kode_ganda():
+                raise ValueError(f"kode AHSP ganda: {', '.join(matriks.kode_ganda()[:10])}")
+            st.sidebar.success(f"✅ {len(df_ahsp)} Item Terload")
+        except Exception as e:
+            df_ahsp, matriks = pd.DataFrame(), None
+            st.sidebar.error(f"Gagal baca file: {e}")
 
 # ==========================================
 # 2. HARGA SATUAN (Alat Berat Dominan)
@@ -74,47 +101,92 @@ with st.sidebar.expander("🚜 Update Sewa Alat (Per Jam)"):
     default_harga["Excavator"] = h_excavator
     default_harga["Dump Truck"] = h_truck
 
+# Harga dasar berubah (update harga di sidebar) -> hitung ulang hanya baris yang terdampak
+pencocok_harga = PencocokHarga(default_harga)
+rab = st.session_state.boq_bm
+rab.sinkron_harga(pencocok_harga.harga)
+
+id_proyek_buka = proyek_dibuka("bm")
+if id_proyek_buka is not None:
+    rab = st.session_state.boq_bm = RABBidang()
+    if matriks is None:
+        st.error("Database AHSP belum dimuat, proyek tidak bisa dibuka.")
+    else:
+        try:
+            jumlah_baris = rab.muat_proyek(proyek_store(), id_proyek_buka, matriks, pencocok_harga.harga, persen_overhead, persen_ppn)
+            st.success(f"Proyek '{proyek_name}' dibuka ({jumlah_baris} baris), dihitung dengan harga aktif.")
+        except (KeyError, ValueError) as e:
+            rab = st.session_state.boq_bm = RABBidang()
+            st.error(f"Proyek tidak bisa dibuka dengan database AHSP saat ini: {e}")
+panel_proyek(proyek_store(), rab, "bm", proyek_name, persen_overhead, persen_ppn, default_harga, sumber)
+
 # ==========================================
 # 3. CORE APPS
 # ==========================================
 if not df_ahsp.empty:
-    pilihan = st.selectbox("Pilih Pekerjaan Jalan:", df_ahsp['uraian'].unique())
-    row = df_ahsp[df_ahsp['uraian'] == pilihan].iloc[0]
+    # Cari sambil ketik lewat indeks teks (dibangun ulang hanya jika isi master berubah)
+    pilihan = pilih_ahsp(indeks_dataframe(df_ahsp), label="Cari Pekerjaan Jalan (kode / uraian):", key="ahsp_bm")
+
+if not df_ahsp.empty and pilihan is not None:
+    row = df_ahsp.iloc[pilihan]
     
     vol = st.number_input("Volume", value=100.0, step=10.0)
     st.caption(f"Satuan: {row['satuan']}")
+
+    # Harga yang tidak cocok persis (tebakan fallback, ambigu, atau tidak ada) ditampilkan sebelum masuk RAB
+    nama_sumber_daya = [matriks.sumber_daya[i] for i in matriks.indices[matriks.indptr[pilihan]:matriks.indptr[pilihan + 1]]]
+    tidak_persis = {k: v for k, v in pencocok_harga.cocokkan(nama_sumber_daya).items() if v.aturan != "exact"}
+    if tidak_persis:
+        with st.expander(f"🔎 {len(tidak_persis)} sumber daya tidak cocok persis dengan daftar harga"):
+            st.dataframe(
+                pd.DataFrame(
+                    [{"Sumber Daya": k, "Kunci Harga": v.kunci, "Aturan": v.aturan, "Kandidat": ", ".join(v.kandidat), "Harga": v.harga}
+                     for k, v in tidak_persis.items()]
+                ),
+                hide_index=True,
+                use_container_width=True
+            )
+        tanpa_harga = [k for k, v in tidak_persis.items() if v.aturan in (AMBIGU, TIDAK_DITEMUKAN)]
+        if tanpa_harga:
+            st.warning(f"Harga tidak ditemukan atau ambigu (dihitung 0): {', '.join(tanpa_harga)}")
     
     if st.button("➕ Tambah ke RAB Jalan"):
         # Matcher harga sederhana
-        def match(x): 
-            for k,v in default_harga.items():
-                if k.lower() in str(x).lower(): return v
-            return 0
-
-        hasil = sda_engine.hitung_rab_lengkap(
-            kode_ahsp=row['kode'], uraian=row['uraian'], volume=vol, satuan=row['satuan'],
-            koef_tenaga=row['tenaga'], harga_tenaga={k:match(k) for k in row['tenaga']},
-            koef_bahan=row['bahan'], harga_bahan={k:match(k) for k in row['bahan']},
-            koef_alat=row['alat'], harga_alat={k:match(k) for k in row['alat']}
+        rab.tambah(
+            matriks, DaftarItem.dari_item([ItemPekerjaan(row['kode'], row['uraian'], row['satuan'], vol)]),
+            pencocok_harga.harga, persen_overhead, persen_ppn, baris_master=[pilihan]
         )
-        st.session_state.boq_bm.append(hasil)
         st.success("Masuk!")
 
 # ==========================================
 # 4. TABEL OUTPUT
 # ==========================================
 st.divider()
-if st.session_state.boq_bm:
-    df_view = pd.DataFrame([{
-        "Uraian": i['meta']['uraian'], "Vol": i['meta']['volume'], 
-        "HSP": i['biaya']['hsp'], "Total": i['biaya']['total_final']
-    } for i in st.session_state.boq_bm])
-    
-    st.dataframe(df_view, use_container_width=True)
-    st.markdown(f"### Total Jalan: Rp {df_view['Total'].sum():,.0f}")
-    
-    # Download
-    xlsx = sda_engine.export_to_excel(df_view)
-    st.download_button("📥 Download Excel", xlsx, "RAB_Jalan.xlsx")
+if len(rab):
+    df_rab = rab.ke_dataframe()
+    st.dataframe(
+        df_rab,
+        column_config={
+            "Volume": st.column_config.NumberColumn(format="localized"),
+            "PPN (%)": st.column_config.NumberColumn(format="%.2f%%"),
+            **{kolom: st.column_config.NumberColumn(f"{kolom} (Rp)", format="localized") for kolom in NAMA_KOLOM_RAB.values()},
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+    st.markdown(f"### Total Jalan: Rp {rab.rekap()['total_dengan_ppn_item']:,.0f}")
+
+    # Download (kolom sama dengan keranjang SDA, jadi laporan export_to_excel lengkap)
+    c1, c2 = st.columns(2)
+    if c1.button("🗑️ Bersihkan RAB", key="bersihkan_bm"):
+        st.session_state.boq_bm = RABBidang()
+        st.rerun()
+    # Excel dibuat atas permintaan dan disimpan per versi RAB, bukan setiap rerun
+    kunci_excel = (rab.versi, proyek_name)
+    excel = st.session_state.get("excel_bm")
+    if (excel is None or excel[0] != kunci_excel) and c2.button("📄 Siapkan Excel", key="siapkan_excel_bm"):
+        excel = st.session_state.excel_bm = (kunci_excel, sda_engine.export_to_excel(df_rab, nama_proyek=proyek_name))
+    if excel is not None and excel[0] == kunci_excel:
+        c2.download_button("📥 Download Excel", excel[1], "RAB_Jalan.xlsx")
 else:
     st.warning("Silakan input item pekerjaan jalan.")
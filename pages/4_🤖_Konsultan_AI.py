@@ -2,7 +2,7 @@ import streamlit as st
 
 # Coba import engine dengan aman
 try:
-    from engine import ai_engine
+    from engine import ai_engine, penjadwal_ai
 except ImportError:
     st.error("🚨 Gagal memuat 'engine/ai_engine.py'. Pastikan file tersebut ada dan tidak ada error syntax.")
     st.stop()
@@ -27,18 +27,19 @@ with st.sidebar:
     
     st.subheader("🧠 Pilih Otak AI")
     # Mapping Nama Keren -> Kode Teknis
-    pilihan_model = {
-        "⚡ Gemini 2.0 Flash (Cepat)": "gemini-2.0-flash",
-        "🚀 Gemini 1.5 Flash (Stabil)": "gemini-1.5-flash",
-        "🧠 Gemini 1.5 Pro (Pintar)": "gemini-1.5-pro",
-        "🛡️ Gemini Pro (Legacy)": "gemini-pro"
-    }
+    pilihan_model = ai_engine.PILIHAN_MODEL
     
     label_model = st.selectbox("Model:", list(pilihan_model.keys()), index=0)
     kode_model = pilihan_model[label_model]
     
     st.caption(f"Active Model: `{kode_model}`")
 
+    statistik_cache = ai_engine.CACHE_JAWABAN.statistik()
+    st.caption(
+        f"🗄️ Cache jawaban: {statistik_cache['jumlah']} tersimpan, "
+        f"{statistik_cache['hit']} hit / {statistik_cache['miss']} miss"
+    )
+
 # ==========================================
 # 2. AREA CHAT
 # ==========================================
@@ -58,12 +59,69 @@ with col_chat:
         elif not user_query:
             st.warning("⚠️ Pertanyaan kosong.")
         else:
-            with st.spinner("Sedang menganalisis..."):
-                jawaban = ai_engine.tanya_ahli(
-                    api_key=api_key,
-                    tipe_ahli=tipe_ahli,
-                    pertanyaan=user_query,
-                    model_name=kode_model
-                )
-                st.markdown("---")
-                st.markdown(jawaban)
+            st.markdown("---")
+            # Jawaban ditampilkan per potongan begitu tiba. Penjadwal bersama per API key:
+            # rate limit per model, retry 429, fallback model.
+            st.write_stream(penjadwal_ai.penjadwal_untuk(api_key).tanya_stream(tipe_ahli, user_query, kode_model))
+
+    with st.expander("📋 Tanya Banyak Sekaligus"):
+        daftar_query = st.text_area("Satu pertanyaan per baris:", height=150, key="batch_query")
+        if st.button("🚀 Kirim Semua"):
+            daftar_pertanyaan = [baris.strip() for baris in daftar_query.splitlines() if baris.strip()]
+            if not api_key:
+                st.warning("⚠️ Masukkan API Key di Sidebar.")
+            elif not daftar_pertanyaan:
+                st.warning("⚠️ Pertanyaan kosong.")
+            else:
+                with st.spinner(f"Menjawab {len(daftar_pertanyaan)} pertanyaan..."):
+                    semua_hasil = penjadwal_ai.jalankan(
+                        penjadwal_ai.penjadwal_untuk(api_key).tanya_banyak(tipe_ahli, daftar_pertanyaan, kode_model)
+                    )
+                for hasil in semua_hasil:
+                    with st.container(border=True):
+                        st.markdown(f"**❓ {hasil.pertanyaan}**")
+                        st.caption(f"Model: `{hasil.model_name}`" + (" · dari cache" if hasil.dari_cache else ""))
+                        st.markdown(hasil.jawaban)
+
+# ==========================================
+# 3. PEMETAAN BOQ -> AHSP
+# ==========================================
+st.divider()
+with st.expander("🗂️ Petakan Uraian BOQ ke Kode AHSP"):
+    st.caption(
+        "Kandidat dicari lokal dari master AHSP; AI hanya memilih di antara kandidat teratas. "
+        "Tanpa API Key, kandidat teratas langsung dipakai."
+    )
+    file_boq = st.file_uploader("Upload BOQ (.xlsx/.csv) dengan kolom uraian", type=["xlsx", "csv"])
+    if file_boq is not None:
+        # pandas + master AHSP baru dimuat saat dipakai, agar halaman chat tetap ringan
+        import pandas as pd
+        from engine import master_data, pemetaan_boq
+
+        try:
+            master = master_data.muat_master_ahsp()
+        except FileNotFoundError:
+            st.error("File master AHSP tidak ditemukan.")
+            st.stop()
+
+        df_boq = pd.read_csv(file_boq) if file_boq.name.lower().endswith(".csv") else pd.read_excel(file_boq)
+        col_a, col_b, col_c = st.columns(3)
+        bidang = col_a.selectbox("Bidang master:", master.bidang())
+        kolom_uraian = col_b.selectbox("Kolom uraian:", list(df_boq.columns))
+        kolom_satuan = col_c.selectbox("Kolom satuan:", ["(tidak ada)"] + list(df_boq.columns))
+
+        if st.button("🔎 Petakan BOQ"):
+            with st.spinner(f"Memetakan {len(df_boq)} baris..."):
+                df_peta = penjadwal_ai.jalankan(pemetaan_boq.petakan_boq(
+                    df_boq[kolom_uraian],
+                    master.view_bidang(bidang),
+                    satuan_boq=None if kolom_satuan == "(tidak ada)" else df_boq[kolom_satuan],
+                    penjadwal=penjadwal_ai.penjadwal_untuk(api_key) if api_key else None,
+                    model_name=kode_model,
+                    indeks=master.indeks_pencarian(bidang),
+                ))
+            st.dataframe(df_peta, use_container_width=True)
+            st.download_button(
+                "📥 Download Hasil Pemetaan (CSV)", df_peta.to_csv(index=False).encode("utf-8"),
+                "pemetaan_boq_ahsp.csv", "text/csv",
+            )
@@ -1,5 +1,4 @@
 import streamlit as st
-import google.generativeai as genai
 import importlib.metadata
 
 st.set_page_config(page_title="API Debugger", page_icon="🛠️")
@@ -33,6 +32,8 @@ if st.button("🔍 Scan Model Tersedia"):
         st.error("Masukkan API Key dulu bos!")
     else:
         try:
+            import google.generativeai as genai # berat, hanya saat scan
+
             genai.configure(api_key=api_key)
             
             st.write("Sedang menghubungi server Google...")
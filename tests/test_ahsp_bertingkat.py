@@ -0,0 +1,46 @@
+"""Uji sub-analisa (AHSP di dalam AHSP) terhadap batch datar dan jalur per item."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.ahsp_bertingkat import analisa_bertingkat
+from engine.batch_engine import KOLOM_BIAYA, hitung_rab_batch, susun_matriks_koefisien
+from tests.test_batch_engine import buat_boq, buat_master, hitung_per_item
+
+
+def test_bertingkat_tanpa_referensi_sama_dengan_batch():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master)
+    matriks = susun_matriks_koefisien(master)
+    analisa = analisa_bertingkat(matriks)
+
+    assert not analisa.ada_referensi
+    pd.testing.assert_frame_equal(
+        analisa.hitung_rab_batch(kode, volume, harga), hitung_rab_batch(kode, volume, matriks, harga)
+    )
+
+
+def test_bertingkat_sama_dengan_per_item_atas_koefisien_datar():
+    master, harga = buat_master()
+    # A.0 memakai A.1 sebagai bahan, A.1 memakai A.2 sebagai tenaga (dua tingkat)
+    master.at[0, "bahan"] = {**(master.at[0, "bahan"] if isinstance(master.at[0, "bahan"], dict) else {}), "A.1": 0.5}
+    master.at[1, "tenaga"] = {**(master.at[1, "tenaga"] if isinstance(master.at[1, "tenaga"], dict) else {}), "A.2": 2.0}
+    kode, volume = ["A.0", "A.1", "A.2", "A.0"], [1.0, 3.5, 2.0, 0.25]
+    analisa = analisa_bertingkat(susun_matriks_koefisien(master))
+
+    df = analisa.hitung_rab_batch(kode, volume, harga)
+
+    assert analisa.ada_referensi
+    np.testing.assert_allclose(
+        df[list(KOLOM_BIAYA)].to_numpy(),
+        hitung_per_item(master, kode, volume, harga, 15.0, 11.0, koefisien=analisa.koefisien_datar),
+        rtol=1e-12,
+    )
+
+
+def test_bertingkat_menolak_kode_ganda():
+    master, _ = buat_master()
+    master.at[1, "kode_ahsp"] = "A.0"  # misal master multi-bidang yang belum dipilah
+
+    with pytest.raises(ValueError, match="A.0"):
+        analisa_bertingkat(susun_matriks_koefisien(master))
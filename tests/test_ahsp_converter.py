@@ -0,0 +1,37 @@
+"""Uji regresi converter: parse_content atas korpus data/regresi_converter harus sama dengan output beku."""
+import glob
+import json
+import os
+import shutil
+
+import pytest
+
+from engine.ahsp_converter import FOLDER_REGRESI, cek_regresi
+
+KORPUS = sorted(
+    os.path.basename(p) for p in glob.glob(os.path.join(FOLDER_REGRESI, "*"))
+    if p.endswith((".csv", ".xlsx"))
+)
+
+
+def test_korpus_lengkap_berpasangan():
+    assert KORPUS
+    for nama_file in KORPUS:
+        assert os.path.exists(os.path.join(FOLDER_REGRESI, os.path.splitext(nama_file)[0] + ".expected.json"))
+
+
+@pytest.mark.parametrize("nama_file", KORPUS)
+def test_output_sama_dengan_yang_dibekukan(nama_file):
+    assert cek_regresi()[nama_file]
+
+
+def test_output_berubah_terdeteksi(tmp_path):
+    nama_file = KORPUS[0]
+    dasar = os.path.splitext(nama_file)[0]
+    shutil.copy(os.path.join(FOLDER_REGRESI, nama_file), tmp_path / nama_file)
+    with open(os.path.join(FOLDER_REGRESI, dasar + ".expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    expected.append({"kode": "X.999"})
+    (tmp_path / f"{dasar}.expected.json").write_text(json.dumps(expected), encoding="utf-8")
+
+    assert cek_regresi(str(tmp_path)) == {nama_file: False}
@@ -0,0 +1,120 @@
+"""Uji store biner master AHSP: round-trip kompilasi, kompilasi ulang saat basi, dan tukar store."""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import ahsp_store
+from engine.batch_engine import KATEGORI, susun_matriks_koefisien
+
+FOLDER_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def urai_sel(sel):
+    """Pengurai per sel yang sengaja sederhana (jalur lama), pembanding jalur vektor store."""
+    if not sel or sel == "-":
+        return {}
+    hasil = {}
+    for entri in sel.split(";"):
+        nama, _, koef = entri.strip().rpartition(" ")
+        hasil[nama.strip()] = float(koef)
+    return hasil
+
+
+def salin_master(tmp_path, nama="ahsp_sda_master.csv"):
+    path = tmp_path / nama
+    shutil.copy(os.path.join(FOLDER_DATA, nama), path)
+    return str(path)
+
+
+def test_kompilasi_lalu_muat_sama_dengan_susun_matriks_koefisien(tmp_path):
+    path = salin_master(tmp_path)
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    for kategori in KATEGORI:
+        df[kategori] = df[kategori].map(urai_sel)
+    harapan = susun_matriks_koefisien(df, kolom_kode="kode")
+
+    store = ahsp_store.muat_master(path)
+
+    assert os.path.dirname(ahsp_store.path_store_default(path)) == str(tmp_path / "compiled")
+    assert isinstance(store.matriks.data, np.memmap)
+    assert store.matriks.kode.tolist() == harapan.kode
+    assert store.matriks.sumber_daya == harapan.sumber_daya
+    for nama in ("indptr", "indices", "data", "kategori"):
+        np.testing.assert_array_equal(getattr(store.matriks, nama), getattr(harapan, nama))
+    assert store.uraian.tolist() == df["uraian"].tolist()
+    assert store.satuan.tolist() == df["satuan"].tolist()
+    assert store.koefisien(0) == (df.at[0, "tenaga"], df.at[0, "bahan"], df.at[0, "alat"])
+
+
+def test_sumber_berubah_dikompilasi_ulang_hanya_jika_isi_berbeda(tmp_path):
+    path = salin_master(tmp_path)
+    path_store = ahsp_store.path_store_default(path)
+    meta_awal = ahsp_store.muat_master(path).meta
+
+    # mtime berubah, isi sama (misal checkout ulang): store lama tetap dipakai
+    os.utime(path, ns=(meta_awal["mtime_ns"] + 10**9, meta_awal["mtime_ns"] + 10**9))
+    assert ahsp_store.store_masih_valid(path, path_store)
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("Z.99,Item Baru,m2,Pekerja 1.5,-,-\n")
+    assert not ahsp_store.store_masih_valid(path, path_store)
+    store = ahsp_store.muat_master(path)
+
+    assert store.meta["sha256"] != meta_awal["sha256"]
+    assert len(store) == meta_awal["n_item"] + 1
+    assert store.kode[len(store) - 1] == "Z.99"
+
+
+def test_store_lama_tetap_terbaca_setelah_kompilasi_ulang(tmp_path):
+    path = salin_master(tmp_path)
+    lama = ahsp_store.muat_master(path)
+    data_lama = np.array(lama.matriks.data)
+    kode_lama = lama.kode.tolist()
+
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df["tenaga"] = "Pekerja 9.0"
+    df.to_csv(path, index=False)
+    baru = ahsp_store.muat_master(path)
+
+    # Store lama (memmap) masih dipegang sesi lain: isinya tidak boleh ikut berubah atau rusak
+    np.testing.assert_array_equal(lama.matriks.data, data_lama)
+    assert lama.kode.tolist() == kode_lama
+    assert baru.koefisien(0)[0] == {"Pekerja": 9.0}
+    assert sorted(os.listdir(tmp_path / "compiled")) == ["ahsp_sda_master_csv"]
+
+
+def test_kolom_wajib_hilang_ditolak(tmp_path):
+    path = tmp_path / "rusak.csv"
+    pd.DataFrame({"kode": ["A.1"], "satuan": ["m2"], "tenaga": ["Pekerja 1.0"]}).to_csv(path, index=False)
+
+    with pytest.raises(ValueError, match="uraian/uraian_pekerjaan, bahan, alat"):
+        ahsp_store.muat_master(str(path))
+    assert not os.path.exists(tmp_path / "compiled" / "rusak_csv")
+
+
+def test_path_store_default_membedakan_ekstensi(tmp_path):
+    assert ahsp_store.path_store_default(str(tmp_path / "m.csv")) != ahsp_store.path_store_default(str(tmp_path / "m.xlsx"))
+
+
+def test_master_duplikat_dideduplikasi_per_bidang_dan_kode(tmp_path):
+    path = tmp_path / "ganda.csv"
+    pd.DataFrame({
+        "bidang": ["sda", "sda", "cipta_karya"],
+        "kode": ["1.1", "1.1", "1.1"],
+        "uraian": ["Galian", "Galian", "Galian CK"],
+        "satuan": ["m3"] * 3,
+        "tenaga": ["Pekerja 0.75", "Pekerja 0.75", "Pekerja 0.5"],
+        "bahan": ["-"] * 3,
+        "alat": ["-"] * 3,
+    }).to_csv(path, index=False)
+
+    store = ahsp_store.muat_master(str(path))
+
+    assert len(store) == 2
+    assert store.meta["kode_duplikat_persis"] == 1
+    assert store.matriks_bidang("sda").kode == ["1.1"]
+    assert store.koefisien(int(store.baris_bidang("cipta_karya")[0]))[0] == {"Pekerja": 0.5}
+    assert os.path.exists(os.path.join(ahsp_store.path_store_default(str(path)), ahsp_store.NAMA_LAPORAN_KONFLIK))
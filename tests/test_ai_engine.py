@@ -0,0 +1,134 @@
+"""Uji cache jawaban AI (tanpa jaringan)."""
+import pytest
+
+from engine import ai_engine
+from engine.ai_engine import BackendLokal, CacheJawaban, tanya_ahli, tanya_ahli_stream
+
+PERSONA = "💰 Ahli Estimator (QS)"
+
+
+class JamPalsu:
+    """Pengganti modul time di ai_engine agar umur entri cache bisa dimajukan."""
+
+    def __init__(self, sekarang=1_000_000.0):
+        self.sekarang = sekarang
+
+    def time(self):
+        return self.sekarang
+
+    def sleep(self, detik):
+        self.sekarang += detik
+
+
+@pytest.fixture
+def jam(monkeypatch):
+    jam = JamPalsu()
+    monkeypatch.setattr(ai_engine, "time", jam)
+    return jam
+
+
+def test_kunci_pertanyaan_dinormalisasi():
+    assert CacheJawaban.kunci(PERSONA, "m", "Berapa  PPN?") == CacheJawaban.kunci(PERSONA, "m", "berapa ppn?")
+
+
+def test_lru_membuang_entri_paling_lama_tak_dipakai():
+    cache = CacheJawaban(maks_item=2)
+    cache.simpan("a", "A")
+    cache.simpan("b", "B")
+    assert cache.ambil("a") == "A"  # "a" baru dipakai, "b" jadi yang paling lama
+    cache.simpan("c", "C")
+
+    assert cache.ambil("b") is None
+    assert cache.ambil("a") == "A"
+    assert cache.ambil("c") == "C"
+    assert cache.statistik()["dibuang"] == 1
+
+
+def test_ttl_entri_kedaluwarsa(jam):
+    cache = CacheJawaban(ttl_detik=60)
+    cache.simpan("a", "A")
+    jam.sekarang += 60
+    assert cache.ambil("a") == "A"
+    jam.sekarang += 1
+    assert cache.ambil("a") is None
+    assert len(cache) == 0
+    assert cache.statistik()["kedaluwarsa"] == 1
+
+
+def test_persistensi_json_dimuat_ulang(tmp_path, jam):
+    path = tmp_path / "cache" / "jawaban.json"
+    cache = CacheJawaban(maks_item=2, ttl_detik=60, path=str(path))
+    cache.simpan(CacheJawaban.kunci(PERSONA, "m", "lama"), "Lama")
+    jam.sekarang += 30
+    cache.simpan(CacheJawaban.kunci(PERSONA, "m", "baru"), "Baru")
+    assert path.exists()
+    assert list(path.parent.glob("*.tmp")) == []
+
+    dimuat = CacheJawaban(maks_item=2, ttl_detik=60, path=str(path))
+    assert dimuat.ambil(CacheJawaban.kunci(PERSONA, "m", "lama")) == "Lama"
+    assert dimuat.ambil(CacheJawaban.kunci(PERSONA, "m", "baru")) == "Baru"
+
+    # Entri yang sudah kedaluwarsa saat dimuat tidak ikut masuk
+    jam.sekarang += 31
+    dimuat = CacheJawaban(maks_item=2, ttl_detik=60, path=str(path))
+    assert len(dimuat) == 1
+    assert dimuat.ambil(CacheJawaban.kunci(PERSONA, "m", "baru")) == "Baru"
+
+
+def test_file_rusak_mulai_kosong(tmp_path):
+    path = tmp_path / "jawaban.json"
+    path.write_text("{bukan json", encoding="utf-8")
+    assert len(CacheJawaban(path=str(path))) == 0
+
+
+def test_tanya_ahli_hanya_menyimpan_jawaban_sukses():
+    cache = CacheJawaban()
+    backend = BackendLokal(jawaban="Jawaban", error={"m": ["500 internal"]})
+
+    assert tanya_ahli("", PERSONA, "Galian?", "m", backend=backend, cache=cache).startswith("🚨")
+    assert len(cache) == 0
+    assert tanya_ahli("", PERSONA, "Galian?", "m", backend=backend, cache=cache) == "Jawaban"
+    assert tanya_ahli("", PERSONA, "galian?", "m", backend=backend, cache=cache) == "Jawaban"
+    assert backend.jumlah_panggilan == 2
+
+
+class BackendPutus(BackendLokal):
+    """BackendLokal yang stream-nya putus dengan error setelah `sisa` potongan."""
+
+    def __init__(self, sisa, error="500 stream terputus", **kwargs):
+        super().__init__(**kwargs)
+        self.sisa = sisa
+        self.error_stream = error
+
+    def stream(self, model_name, prompt):
+        for i, potongan in enumerate(super().stream(model_name, prompt)):
+            if i == self.sisa:
+                raise RuntimeError(self.error_stream)
+            yield potongan
+
+
+def test_stream_error_di_tengah_ditambahkan_setelah_potongan_terkirim():
+    cache = CacheJawaban()
+    backend = BackendPutus(2, jawaban="Galian tanah biasa per m3")
+
+    potongan = list(tanya_ahli_stream("", PERSONA, "Galian?", "m", backend=backend, cache=cache))
+
+    assert potongan[:2] == ["Galian", " tanah"]
+    assert potongan[2].startswith("\n\n🚨") and "500 stream terputus" in potongan[2]
+    assert len(potongan) == 3
+    assert len(cache) == 0  # jawaban terpotong tidak disimpan
+
+
+def test_stream_error_sebelum_potongan_pertama_sama_dengan_tanya_ahli():
+    backend = BackendLokal(error={"m": ["429 quota"]})
+    potongan = list(tanya_ahli_stream("", PERSONA, "Galian?", "m", backend=backend, cache=None))
+    assert potongan == [ai_engine.pesan_error(RuntimeError("429 quota"), "m")]
+
+
+def test_stream_selesai_disimpan_utuh_ke_cache():
+    cache = CacheJawaban()
+    backend = BackendLokal(jawaban="Galian tanah biasa")
+
+    assert "".join(tanya_ahli_stream("", PERSONA, "Galian?", "m", backend=backend, cache=cache)) == "Galian tanah biasa"
+    assert list(tanya_ahli_stream("", PERSONA, "Galian?", "m", backend=backend, cache=cache)) == ["Galian tanah biasa"]
+    assert backend.jumlah_panggilan == 1
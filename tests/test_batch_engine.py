@@ -0,0 +1,74 @@
+"""Uji paritas hitung_rab_batch terhadap jalur per item sda_engine.hitung_rab_lengkap."""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.batch_engine import KATEGORI, KOLOM_BIAYA, hitung_rab_batch, susun_matriks_koefisien
+from engine.sda_engine import hitung_rab_lengkap
+
+
+def buat_master(seed=7, n_item=60, n_sumber_daya=25):
+    """Master acak: kategori kosong, sel non-dict (NaN), dan nama yang sama di beberapa kategori."""
+    rng = random.Random(seed)
+    nama = [f"SD {i}" for i in range(n_sumber_daya)]
+    rows = []
+    for i in range(n_item):
+        row = {"kode_ahsp": f"A.{i}"}
+        for k in KATEGORI:
+            if rng.random() < 0.1:
+                row[k] = np.nan
+            else:
+                row[k] = {rng.choice(nama): round(rng.uniform(0.001, 50), 4) for _ in range(rng.randint(0, 5))}
+        rows.append(row)
+    # Sebagian sumber daya sengaja tidak punya harga (dihitung 0 di kedua jalur)
+    harga = {n: float(rng.randint(500, 2_000_000)) for n in nama if rng.random() < 0.85}
+    return pd.DataFrame(rows), harga
+
+
+def buat_boq(master, seed=11, n_baris=200):
+    rng = random.Random(seed)
+    kode = [rng.choice(list(master["kode_ahsp"])) for _ in range(n_baris)]  # kode berulang
+    volume = [round(rng.uniform(0, 50), 3) for _ in range(n_baris)]
+    return kode, volume
+
+
+def hitung_per_item(master, kode, volume, harga, persen_overhead, persen_ppn, koefisien=None):
+    """Jalur lama: hitung_rab_lengkap per baris, array (n, 16) urutan KOLOM_BIAYA."""
+    per_kode = master.set_index("kode_ahsp")
+    hasil = []
+    for k, v in zip(kode, volume):
+        if koefisien is None:
+            koef = [per_kode.at[k, kat] if isinstance(per_kode.at[k, kat], dict) else {} for kat in KATEGORI]
+        else:
+            koef = koefisien(k)
+        biaya = hitung_rab_lengkap(v, *koef, harga, harga, harga, persen_overhead, persen_ppn)["biaya"]
+        hasil.append([biaya[kolom] for kolom in KOLOM_BIAYA])
+    return np.array(hasil, dtype=np.float64).reshape(-1, len(KOLOM_BIAYA))
+
+
+@pytest.mark.parametrize("persen_overhead, persen_ppn", [(15.0, 11.0), (10.0, 12.0), (0.0, 0.0)])
+def test_batch_sama_persis_dengan_per_item(persen_overhead, persen_ppn):
+    master, harga = buat_master()
+    kode, volume = buat_boq(master)
+    matriks = susun_matriks_koefisien(master)
+
+    df = hitung_rab_batch(kode, volume, matriks, harga, persen_overhead, persen_ppn)
+
+    assert list(df.columns) == ["kode_ahsp", "volume", *KOLOM_BIAYA]
+    assert list(df["kode_ahsp"]) == kode
+    np.testing.assert_array_equal(
+        df[list(KOLOM_BIAYA)].to_numpy(), hitung_per_item(master, kode, volume, harga, persen_overhead, persen_ppn)
+    )
+
+
+def test_batch_boq_kosong_dan_kode_tidak_ada():
+    master, harga = buat_master()
+    matriks = susun_matriks_koefisien(master)
+
+    assert hitung_rab_batch([], [], matriks, harga).shape == (0, 2 + len(KOLOM_BIAYA))
+    with pytest.raises(KeyError, match="X.404"):
+        hitung_rab_batch(["A.0", "X.404"], [1.0, 1.0], matriks, harga)
+    with pytest.raises(ValueError):
+        hitung_rab_batch(["A.0"], [1.0, 2.0], matriks, harga)
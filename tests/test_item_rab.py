@@ -0,0 +1,124 @@
+"""Uji RABBidang: tambah lewat matriks vs batch, baris_master untuk kode ganda, versi, dan muat_proyek."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.batch_engine import KOLOM_BIAYA, hitung_rab_batch, susun_matriks_koefisien
+from engine.item_rab import DaftarItem, ItemPekerjaan, RABBidang
+from engine.keranjang_rab import KOLOM_ANGKA, KOLOM_TEKS
+from engine.proyek_store import ProyekStore
+from tests.test_batch_engine import buat_boq, buat_master
+
+
+def daftar_dari_boq(kode, volume):
+    return DaftarItem(kode, [f"Pekerjaan {k}" for k in kode], ["m3"] * len(kode), volume)
+
+
+def rab_terisi(master, harga, kode, volume, persen_ppn=11.0):
+    matriks = susun_matriks_koefisien(master)
+    rab = RABBidang()
+    rab.tambah(matriks, daftar_dari_boq(kode, volume), lambda n: harga.get(n, 0), 15.0, persen_ppn)
+    return rab, matriks
+
+
+def test_tambah_sama_dengan_batch():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master)
+    matriks = susun_matriks_koefisien(master)
+    rab = RABBidang()
+
+    hasil = rab.tambah(matriks, daftar_dari_boq(kode[:50], volume[:50]), lambda n: harga.get(n, 0))
+    rab.tambah(matriks, daftar_dari_boq(kode[50:], volume[50:]), lambda n: harga.get(n, 0))
+
+    batch = hitung_rab_batch(kode, volume, matriks, harga)
+    assert len(hasil) == 50 and len(rab) == len(kode)
+    np.testing.assert_allclose(hasil.biaya, batch[list(KOLOM_BIAYA)].to_numpy()[:50], rtol=1e-12)
+    df = rab.ke_dataframe()
+    assert list(df.columns) == [*KOLOM_TEKS, *KOLOM_ANGKA]
+    assert df["kode_ahsp"].tolist() == kode
+    np.testing.assert_allclose(df["Total Dengan PPN"], batch["total_dengan_ppn_item"], rtol=1e-12)
+    np.testing.assert_allclose(rab.rekap()["total_dengan_ppn_item"], batch["total_dengan_ppn_item"].sum(), rtol=1e-9)
+
+
+def test_kode_ganda_butuh_baris_master():
+    master = pd.DataFrame({
+        "kode_ahsp": ["A.1", "A.1", "B.1"],
+        "tenaga": [{"Pekerja": 1.0}, {"Pekerja": 2.0}, {}],
+        "bahan": [{}, {}, {"Semen": 3.0}],
+        "alat": [{}, {}, {}],
+    })
+    matriks = susun_matriks_koefisien(master)
+    harga = {"Pekerja": 100.0, "Semen": 10.0}.get
+    daftar = DaftarItem.dari_item([ItemPekerjaan("A.1", "Galian", "m3", 1.0)])
+    rab = RABBidang()
+    versi = rab.versi
+
+    with pytest.raises(ValueError, match="ganda"):
+        rab.tambah(matriks, daftar, harga)
+    assert (len(rab), rab.versi) == (0, versi)
+
+    hasil = rab.tambah(matriks, daftar, harga, persen_overhead=0.0, persen_ppn=0.0, baris_master=[1])
+
+    assert hasil.kolom("total_tenaga_item")[0] == 200.0  # koefisien baris kedua, bukan yang pertama/terakhir
+    assert rab.versi != versi
+
+
+def test_baris_master_tidak_cocok_ditolak():
+    master, harga = buat_master()
+    matriks = susun_matriks_koefisien(master)
+    rab = RABBidang()
+    daftar = daftar_dari_boq(["A.3", "A.5"], [1.0, 2.0])
+
+    with pytest.raises(ValueError, match="baris_master"):
+        rab.tambah(matriks, daftar, harga.get, baris_master=[3, 4])
+    with pytest.raises(ValueError, match="baris_master"):
+        rab.tambah(matriks, daftar, harga.get, baris_master=[3])
+    with pytest.raises(KeyError, match="X.404"):
+        rab.tambah(matriks, daftar_dari_boq(["A.3", "X.404"], [1.0, 2.0]), harga.get)
+    assert len(rab) == 0 and rab.rekap()["total_dengan_ppn_item"] == 0
+
+    rab.tambah(matriks, daftar, harga.get, baris_master=[3, 5])
+    assert len(rab) == 2
+
+
+def test_versi_berganti_hanya_saat_isi_berubah():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master, n_baris=20)
+    rab, _ = rab_terisi(master, harga, kode, volume)
+    versi = rab.versi
+
+    assert len(rab.sinkron_harga(lambda n: harga.get(n, 0))) == 0
+    assert rab.versi == versi
+
+    nama = next(n for n in rab.indeks.sumber_daya() if n in harga)
+    assert len(rab.sinkron_harga(lambda n: harga.get(n, 0) * (2 if n == nama else 1))) > 0
+    assert rab.versi != versi
+    versi = rab.versi
+
+    rab.hapus(rab.id_baris()[0])
+    assert rab.versi != versi and len(rab) == 19
+    assert RABBidang().versi not in (versi, rab.versi)  # objek baru tidak mewarisi versi lama
+
+
+def test_muat_proyek_hitung_ulang_dan_ppn_per_baris(tmp_path):
+    master, harga = buat_master()
+    kode, volume = buat_boq(master, n_baris=30)
+    asal, matriks = rab_terisi(master, harga, kode, volume, persen_ppn=np.where(np.arange(30) % 2, 12.0, 11.0))
+    df_simpan = asal.ke_dataframe()
+    df_simpan.loc[0, "PPN (%)"] = np.nan
+    store = ProyekStore(str(tmp_path / "proyek.db"))
+    id_proyek = store.simpan_proyek("Proyek", df_simpan, bidang="sda")
+    harga_baru = {n: h * 1.1 for n, h in harga.items()}
+
+    rab = RABBidang()
+    jumlah = rab.muat_proyek(store, id_proyek, matriks, lambda n: harga_baru.get(n, 0), persen_ppn=10.0)
+
+    assert jumlah == len(rab) == 30
+    df = rab.ke_dataframe()
+    ppn = df_simpan["PPN (%)"].fillna(10.0).to_numpy()
+    np.testing.assert_array_equal(df["PPN (%)"], ppn)
+    pd.testing.assert_frame_equal(df[list(KOLOM_TEKS)], df_simpan[list(KOLOM_TEKS)])
+    for p in np.unique(ppn):
+        pilih = ppn == p
+        batch = hitung_rab_batch(np.asarray(kode)[pilih], np.asarray(volume)[pilih], matriks, harga_baru, 15.0, p)
+        np.testing.assert_allclose(df.loc[pilih, "Total Dengan PPN"], batch["total_dengan_ppn_item"], rtol=1e-12)
@@ -0,0 +1,98 @@
+"""Uji keranjang RAB kolumnar terhadap list of dict yang dulu di-append halaman SDA."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.batch_engine import KOLOM_BIAYA, NAMA_KOLOM_RAB
+from engine.keranjang_rab import KOLOM_ANGKA, KOLOM_TEKS, KeranjangRAB
+
+
+def baris_acak(rng, i):
+    biaya = rng.uniform(0, 1e7, len(KOLOM_BIAYA))
+    return {
+        "kode_ahsp": f"K.{i % 7}", "uraian": f"Pekerjaan {i % 5}", "satuan": "m3",
+        "volume": float(rng.uniform(0, 100)), "biaya": biaya, "persen_ppn": float(rng.choice([11.0, 12.0])),
+    }
+
+
+def sebagai_dict(baris):
+    """Bentuk baris list of dict lama (kolom sama dengan keranjang)."""
+    biaya = dict(zip(KOLOM_BIAYA, baris["biaya"]))
+    hasil = {"kode_ahsp": baris["kode_ahsp"], "Uraian Pekerjaan": baris["uraian"], "Satuan": baris["satuan"],
+             "Volume": baris["volume"], "PPN (%)": baris["persen_ppn"]}
+    hasil.update({nama: biaya[kunci] for kunci, nama in NAMA_KOLOM_RAB.items()})
+    return hasil
+
+
+def cocok(keranjang, daftar_baris):
+    df = keranjang.ke_dataframe()
+    harapan = pd.DataFrame([sebagai_dict(b) for b in daftar_baris], columns=[*KOLOM_TEKS, *KOLOM_ANGKA])
+    assert list(df.columns) == [*KOLOM_TEKS, *KOLOM_ANGKA]
+    assert len(keranjang) == len(daftar_baris)
+    for kolom in KOLOM_TEKS:
+        assert df[kolom].astype(str).tolist() == harapan[kolom].tolist()
+    np.testing.assert_array_equal(df[list(KOLOM_ANGKA)].to_numpy(), harapan[list(KOLOM_ANGKA)].to_numpy(dtype=np.float64))
+
+
+def test_tambah_satu_dan_banyak_tumbuh_kapasitas():
+    rng = np.random.default_rng(0)
+    keranjang = KeranjangRAB(kapasitas_awal=2)
+    daftar = [baris_acak(rng, i) for i in range(25)]
+
+    ids = [keranjang.tambah(b["kode_ahsp"], b["uraian"], b["satuan"], b["volume"], b["biaya"], b["persen_ppn"]) for b in daftar[:5]]
+    ids += keranjang.tambah_banyak(
+        [b["kode_ahsp"] for b in daftar[5:]], [b["uraian"] for b in daftar[5:]], [b["satuan"] for b in daftar[5:]],
+        [b["volume"] for b in daftar[5:]], np.array([b["biaya"] for b in daftar[5:]]), [b["persen_ppn"] for b in daftar[5:]],
+    ).tolist()
+
+    assert ids == list(range(25))
+    cocok(keranjang, daftar)
+    # Teks di-intern: 7 kode + 5 uraian + 1 satuan
+    assert len(keranjang._tabel) == 13
+
+
+def test_tambah_dari_dict_biaya():
+    keranjang = KeranjangRAB()
+    biaya = dict(zip(KOLOM_BIAYA, np.arange(len(KOLOM_BIAYA), dtype=float)))
+
+    keranjang.tambah("A.1", "Galian", "m3", 2.0, biaya, 11.0)
+
+    assert keranjang.ke_dataframe().at[0, "Total Dengan PPN"] == biaya["total_dengan_ppn_item"]
+
+
+def test_hapus_lalu_pemadatan_id_tetap_stabil():
+    rng = np.random.default_rng(1)
+    keranjang = KeranjangRAB(kapasitas_awal=4)
+    daftar = [baris_acak(rng, i) for i in range(10)]
+    for b in daftar:
+        keranjang.tambah(b["kode_ahsp"], b["uraian"], b["satuan"], b["volume"], b["biaya"], b["persen_ppn"])
+
+    for id_baris in (0, 4, 9):
+        keranjang.hapus(id_baris)
+    with pytest.raises(KeyError):
+        keranjang.hapus(4)
+
+    sisa = [i for i in range(10) if i not in (0, 4, 9)]
+    assert keranjang.id_baris().tolist() == sisa
+    cocok(keranjang, [daftar[i] for i in sisa])
+
+    # Setelah dipadatkan, id lama tetap menunjuk baris yang sama dan id baru tetap naik
+    biaya_baru = np.full((2, len(KOLOM_BIAYA)), 7.0)
+    keranjang.perbarui_biaya([5, 4], biaya_baru)  # id 4 sudah dihapus: diabaikan
+    daftar[5]["biaya"] = biaya_baru[0]
+    b = baris_acak(rng, 99)
+    assert keranjang.tambah(b["kode_ahsp"], b["uraian"], b["satuan"], b["volume"], b["biaya"], b["persen_ppn"]) == 10
+    cocok(keranjang, [daftar[i] for i in sisa] + [b])
+
+
+def test_kosongkan():
+    rng = np.random.default_rng(2)
+    keranjang = KeranjangRAB()
+    b = baris_acak(rng, 0)
+    keranjang.tambah(b["kode_ahsp"], b["uraian"], b["satuan"], b["volume"], b["biaya"], b["persen_ppn"])
+
+    keranjang.kosongkan()
+
+    assert len(keranjang) == 0
+    assert keranjang.ke_dataframe().empty
+    assert list(keranjang.ke_dataframe().columns) == [*KOLOM_TEKS, *KOLOM_ANGKA]
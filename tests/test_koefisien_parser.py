@@ -0,0 +1,71 @@
+"""Uji paritas parser koefisien ter-vektorisasi terhadap jalur dict per sel (susun_matriks_koefisien)."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.batch_engine import KATEGORI, susun_matriks_koefisien
+from engine.koefisien_parser import (
+    kodekan_master_koefisien, susun_matriks_dari_triplet, urai_master_json, urai_master_koefisien,
+)
+
+FOLDER_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+MASTER_CSV = ["ahsp_sda_master.csv", "ahsp_ciptakarya_master.csv"]
+
+
+def urai_sel(sel):
+    """Pengurai lama per sel: entri "<nama> <koef>", entri tanpa koefisien angka dibuang."""
+    hasil = {}
+    if not isinstance(sel, str) or sel.strip() in ("", "-"):
+        return hasil
+    for entri in sel.split(";"):
+        nama, _, koef = entri.rstrip().rpartition(" ")
+        try:
+            hasil[nama.strip()] = float(koef)
+        except ValueError:
+            continue
+    return hasil
+
+
+def sama_persis(matriks, harapan):
+    assert list(matriks.kode) == list(harapan.kode)
+    assert matriks.sumber_daya == harapan.sumber_daya
+    for nama in ("indptr", "indices", "data", "kategori"):
+        np.testing.assert_array_equal(getattr(matriks, nama), getattr(harapan, nama))
+
+
+@pytest.mark.parametrize("nama_file", MASTER_CSV)
+def test_csv_repo_sama_dengan_jalur_dict(nama_file):
+    df = pd.read_csv(os.path.join(FOLDER_DATA, nama_file), dtype=str, keep_default_na=False)
+    df_dict = df.assign(**{k: df[k].map(urai_sel) for k in KATEGORI})
+
+    sama_persis(
+        susun_matriks_dari_triplet(df["kode"], urai_master_koefisien(df)),
+        susun_matriks_koefisien(df_dict, kolom_kode="kode"),
+    )
+
+
+@pytest.mark.parametrize("nama_file", MASTER_CSV)
+def test_round_trip_urai_kodekan_stabil(nama_file):
+    df = pd.read_csv(os.path.join(FOLDER_DATA, nama_file), dtype=str, keep_default_na=False)
+
+    sekali = kodekan_master_koefisien(urai_master_koefisien(df))
+    dua_kali = kodekan_master_koefisien(urai_master_koefisien(pd.DataFrame(sekali)))
+
+    assert sekali == dua_kali
+    for kategori in KATEGORI:
+        assert [urai_sel(s) for s in sekali[kategori]] == [urai_sel(s) for s in df[kategori]]
+
+
+def test_json_sama_dengan_jalur_dict():
+    df_dict = pd.DataFrame({
+        "kode": ["A", "B", "C"],
+        "tenaga": [{"Pekerja": 0.5, "Mandor": 0.05}, {}, {"Pekerja": 1}],
+        "bahan": [{"Semen": 276.0}, {"Pasir": 0.5}, np.nan],
+        "alat": [{}, {"Molen": 0.25, "Pekerja": 0.1}, {"Molen": 2}],
+    })
+    df_json = df_dict.assign(**{k: df_dict[k].map(lambda d: json.dumps(d) if isinstance(d, dict) else "") for k in KATEGORI})
+
+    sama_persis(susun_matriks_dari_triplet(df_json["kode"], urai_master_json(df_json)), susun_matriks_koefisien(df_dict, "kode"))
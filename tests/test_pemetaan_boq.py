@@ -0,0 +1,88 @@
+"""Uji pemetaan BOQ ke AHSP: kandidat leksikal, dedup uraian, dan pilihan AI lewat BackendLokal."""
+import json
+import re
+
+import pandas as pd
+
+from engine.ai_engine import BackendLokal
+from engine.pemetaan_boq import (
+    KOLOM_PEMETAAN, KOSONG, SUMBER_AI, SUMBER_LEKSIKAL, SUMBER_TANPA_KANDIDAT, petakan_boq, urai_jawaban_batch,
+)
+from engine.penjadwal_ai import PenjadwalAI, jalankan
+
+KATALOG = pd.DataFrame({
+    "kode_ahsp": ["G.1", "G.2", "G.3", "B.1", "C.1", "G.4"],
+    "uraian_pekerjaan": [
+        "Galian tanah biasa", "Galian tanah keras", "Galian batu", "Bekisting kayu", "Pengecatan dinding",
+        "Galian tanah biasa manual",
+    ],
+    "satuan": ["m3", "m3", "m3", "m2", "m2", "m2"],
+})
+URAIAN = ["Galian tanah biasa", "galian  TANAH biasa", "Bekisting", "zzz qqq", "Galian batu"]
+SATUAN = ["m3", "m³", "m2", "m3", "m3"]
+
+
+def jawab_kandidat_terakhir(model_name, prompt):
+    """Jawaban AI palsu: pilih kandidat terakhir setiap baris di prompt."""
+    pilihan, no = {}, None
+    for baris in prompt.splitlines():
+        if m := re.match(r"(\d+)\. ", baris):
+            no = int(m.group(1))
+        elif baris.startswith("   - "):
+            pilihan[no] = baris[5:].split(" | ")[0]
+    return "Berikut hasilnya:\n" + json.dumps([{"no": no, "kode": kode} for no, kode in pilihan.items()])
+
+
+def penjadwal(jawaban, **kwargs):
+    backend = BackendLokal(jawaban=jawaban, **kwargs)
+    return PenjadwalAI(backend, urutan_model=["lokal"], batas_rpm={"lokal": 6000}, cache=None), backend
+
+
+def test_tanpa_ai_pakai_kandidat_leksikal_teratas():
+    df = jalankan(petakan_boq(URAIAN + [None], KATALOG, SATUAN + [None]))
+
+    assert list(df.columns) == KOLOM_PEMETAAN
+    assert df["kode_ahsp"].tolist() == ["G.1", "G.1", "B.1", "", "G.3", ""]
+    assert df["sumber"].tolist() == [SUMBER_LEKSIKAL] * 3 + [SUMBER_TANPA_KANDIDAT, SUMBER_LEKSIKAL, SUMBER_TANPA_KANDIDAT]
+    assert df["kandidat"].iloc[0] == "G.1;G.2;G.3;G.4"
+    assert df["skor_leksikal"].iloc[3:4].isna().all()
+
+
+def test_satuan_boq_mendahulukan_kandidat_sesatuan():
+    df = jalankan(petakan_boq(["Galian tanah biasa"], KATALOG, ["M2"]))
+
+    assert df["kandidat"].iloc[0] == "G.4;G.1;G.2;G.3"
+    assert df["kode_ahsp"].iloc[0] == "G.4"
+
+
+def test_ai_memilih_dari_kandidat_sekali_per_uraian_unik():
+    p, backend = penjadwal(jawab_kandidat_terakhir)
+
+    df = jalankan(petakan_boq(URAIAN, KATALOG, SATUAN, penjadwal=p, ukuran_batch=1))
+
+    # Dua uraian unik berkandidat > 1 (baris 0-1 sama setelah normalisasi); "Bekisting" hanya 1 kandidat
+    assert backend.jumlah_panggilan == 2
+    assert df["kode_ahsp"].tolist() == ["G.4", "G.4", "B.1", "", "G.4"]
+    assert df["sumber"].tolist() == [SUMBER_AI, SUMBER_AI, SUMBER_LEKSIKAL, SUMBER_TANPA_KANDIDAT, SUMBER_AI]
+
+
+def test_jawaban_ai_di_luar_kandidat_atau_gagal_kembali_ke_leksikal():
+    p, _ = penjadwal('[{"no": 1, "kode": "C.1"}, {"no": 2, "kode": "' + KOSONG + '"}]')
+
+    df = jalankan(petakan_boq(["Galian tanah biasa", "Galian batu"], KATALOG, ["m3", "m3"], penjadwal=p))
+
+    assert df["kode_ahsp"].tolist() == ["G.1", ""]
+    assert df["sumber"].tolist() == [SUMBER_LEKSIKAL, SUMBER_AI]
+
+    p_gagal, _ = penjadwal("OK", error={"lokal": None})
+    df = jalankan(petakan_boq(["Galian batu"], KATALOG, ["m3"], penjadwal=p_gagal))
+
+    assert (df["kode_ahsp"].iloc[0], df["sumber"].iloc[0]) == ("G.3", SUMBER_LEKSIKAL)
+
+
+def test_urai_jawaban_batch_toleran():
+    assert urai_jawaban_batch('```json\n[{"no": 2, "kode": " G.1 "}, {"no": 9, "kode": "X"}, {"kode": "Y"}]\n```', 3) == [
+        None, "G.1", None
+    ]
+    assert urai_jawaban_batch("bukan json [", 2) == [None, None]
+    assert urai_jawaban_batch(None, 1) == [None]
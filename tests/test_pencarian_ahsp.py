@@ -0,0 +1,73 @@
+"""Uji indeks pencarian AHSP: peringkat, awalan kode, toleransi salah ketik, dan cache per isi."""
+import os
+
+import pandas as pd
+import pytest
+
+from engine.pencarian_ahsp import IndeksAHSP, akar_kata, indeks_dataframe, tokenisasi
+
+FOLDER_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+@pytest.fixture(scope="module")
+def master():
+    return pd.read_csv(os.path.join(FOLDER_DATA, "ahsp_sda_master.csv"), dtype=str, keep_default_na=False)
+
+
+@pytest.fixture(scope="module")
+def indeks(master):
+    return IndeksAHSP.dari_dataframe(master)
+
+
+def kode_hasil(indeks, kueri, batas=20):
+    return [indeks.kode[i] for i in indeks.cari(kueri, batas)]
+
+
+def test_akar_kata_dan_tokenisasi():
+    assert [akar_kata(k) for k in ("pemasangan", "galian", "pengecatan", "penimbunan", "beton")] == [
+        "pasang", "gali", "cat", "timbun", "beton"
+    ]
+    assert tokenisasi("Galian tanah untuk T.01.a, batu 2/3") == ["gali", "tanah", "t.01.a", "batu", "2/3"]
+
+
+def test_semua_token_terpenuhi_di_peringkat_atas(indeks):
+    hasil = kode_hasil(indeks, "galian tanah")
+
+    # Item yang memuat "galian" dan "tanah" mendahului yang hanya memuat "tanah"
+    assert hasil[:4] == ["T.01.a", "T.01.b", "T.02.a", "T.03.a"]
+    assert "T.05.a" in hasil[4:]
+
+
+def test_awalan_kode_didahulukan_urut_asli(indeks):
+    assert kode_hasil(indeks, "T.01") == ["T.01.a", "T.01.b"]
+    assert kode_hasil(indeks, "t.0", 3) == ["T.01.a", "T.01.b", "T.02.a"]
+
+
+def test_awalan_kata_untuk_ketik_sambil_cari(indeks):
+    assert kode_hasil(indeks, "bekist") == ["F.01.a"]
+    assert kode_hasil(indeks, "timbun")[:2] == ["T.05.a", "T.05.b"]
+
+
+@pytest.mark.parametrize("kueri, harapan", [
+    ("galain tanah", "T.01.a"),       # transposisi
+    ("pasngan batu kali", "P.01.a"),  # kurang satu huruf
+    ("bekissting", "F.01.a"),         # kelebihan satu huruf
+    ("plasteran", "P.02.a"),          # substitusi
+])
+def test_toleran_salah_ketik_satu_huruf(indeks, kueri, harapan):
+    assert kode_hasil(indeks, kueri)[0] == harapan
+
+
+def test_tanpa_hasil_dan_batas(indeks):
+    assert indeks.cari("xyzqq") == []
+    assert indeks.cari("   ") == []
+    assert len(indeks.cari("tanah", batas=2)) == 2
+
+
+def test_indeks_dataframe_dicache_per_isi_dan_urutan(master):
+    pertama = indeks_dataframe(master)
+
+    assert indeks_dataframe(master.copy()) is pertama
+    dibalik = indeks_dataframe(master.iloc[::-1])
+    assert dibalik is not pertama
+    assert dibalik.kode[0] == master["kode"].iloc[-1]
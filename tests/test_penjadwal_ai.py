@@ -0,0 +1,160 @@
+"""Uji penjadwal AI: retry 429, fallback model, dan error tanpa fallback (tanpa jaringan)."""
+import re
+
+from engine.ai_engine import BackendLokal, CacheJawaban, pesan_error
+from engine.penjadwal_ai import PenjadwalAI, TokenBucket, jalankan
+from tests.test_ai_engine import BackendPutus
+
+PERSONA = "💰 Ahli Estimator (QS)"
+URUTAN = ["a", "b"]
+
+
+class TidurPalsu:
+    """Pengganti asyncio.sleep yang hanya mencatat lama tidur."""
+
+    def __init__(self):
+        self.jeda = []
+
+    async def __call__(self, detik):
+        self.jeda.append(detik)
+
+
+def penjadwal(backend, **kwargs):
+    tidur = TidurPalsu()
+    kwargs.setdefault("cache", None)
+    kwargs.setdefault("jeda_awal", 1.0)
+    kwargs.setdefault("batas_rpm", {m: 6000 for m in URUTAN})  # burst cukup: tidur hanya dari backoff
+    return PenjadwalAI(backend, urutan_model=URUTAN, tidur=tidur, **kwargs), tidur
+
+
+def test_retry_429_lalu_sukses_di_model_yang_sama():
+    backend = BackendLokal(jawaban="OK", error={"a": ["429 quota"] * 2})
+    p, tidur = penjadwal(backend, maks_retry=3)
+
+    hasil = jalankan(p.tanya(PERSONA, "Galian?"))
+
+    assert (hasil.jawaban, hasil.model_name, hasil.sukses, hasil.percobaan) == ("OK", "a", True, 3)
+    assert backend.panggilan_per_model == {"a": 3}
+    assert len(tidur.jeda) == 2
+    assert 0.5 <= tidur.jeda[0] <= 1.0 and 1.0 <= tidur.jeda[1] <= 2.0  # backoff berlipat + jitter
+
+
+def test_429_terus_menerus_pindah_ke_model_berikutnya():
+    backend = BackendLokal(jawaban="OK", error={"a": ["429 quota"] * 10})
+    p, _ = penjadwal(backend, maks_retry=2)
+
+    hasil = jalankan(p.tanya(PERSONA, "Galian?"))
+
+    assert (hasil.model_name, hasil.sukses, hasil.percobaan) == ("b", True, 4)
+    assert backend.panggilan_per_model == {"a": 3, "b": 1}
+
+
+def test_404_langsung_pindah_model_tanpa_retry():
+    backend = BackendLokal(jawaban="OK", error={"a": None})
+    p, tidur = penjadwal(backend)
+
+    hasil = jalankan(p.tanya(PERSONA, "Galian?"))
+
+    assert (hasil.model_name, hasil.sukses, hasil.percobaan) == ("b", True, 2)
+    assert tidur.jeda == []
+
+
+def test_error_lain_dikembalikan_tanpa_fallback():
+    backend = BackendLokal(jawaban="OK", error={"a": ["500 internal error"]})
+    p, tidur = penjadwal(backend)
+
+    hasil = jalankan(p.tanya(PERSONA, "Galian?"))
+
+    assert (hasil.model_name, hasil.sukses, hasil.percobaan) == ("a", False, 1)
+    assert "500 internal error" in hasil.jawaban
+    assert backend.panggilan_per_model == {"a": 1}
+    assert tidur.jeda == []
+
+
+def test_semua_model_gagal_melaporkan_error_terakhir():
+    backend = BackendLokal(error={"a": None, "b": ["429 quota"] * 10})
+    p, _ = penjadwal(backend, maks_retry=1)
+
+    hasil = jalankan(p.tanya(PERSONA, "Galian?"))
+
+    assert (hasil.model_name, hasil.sukses, hasil.percobaan) == ("b", False, 3)
+    assert "KUOTA HABIS" in hasil.jawaban
+
+
+def test_jawaban_sukses_dari_cache_pada_pertanyaan_kedua():
+    backend = BackendLokal(jawaban="OK")
+    p, _ = penjadwal(backend, cache=CacheJawaban())
+
+    pertama = jalankan(p.tanya(PERSONA, "Galian?"))
+    kedua = jalankan(p.tanya(PERSONA, "galian?"))
+
+    assert not pertama.dari_cache
+    assert kedua == (kedua.pertanyaan, "OK", "a", True, 0, True)
+    assert backend.jumlah_panggilan == 1
+
+
+def test_jawaban_fallback_disimpan_di_kunci_model_yang_menjawab():
+    cache = CacheJawaban()
+    backend = BackendLokal(jawaban=lambda model_name, prompt: f"dari {model_name}", error={"a": ["429 quota"] * 2})
+    p, _ = penjadwal(backend, cache=cache, maks_retry=1)
+
+    pertama = jalankan(p.tanya(PERSONA, "Galian?"))
+    kedua = jalankan(p.tanya(PERSONA, "Galian?"))
+
+    assert (pertama.jawaban, pertama.model_name) == ("dari b", "b")
+    assert (kedua.jawaban, kedua.model_name, kedua.dari_cache) == ("dari a", "a", False)
+    assert cache.ambil(CacheJawaban.kunci(PERSONA, "b", "Galian?")) == "dari b"
+    assert jalankan(p.tanya(PERSONA, "Galian?", model_name="b")).dari_cache
+
+
+def test_tanya_banyak_urutan_sesuai_input():
+    backend = BackendLokal(jawaban=lambda model_name, prompt: re.search(r"Item-\d+", prompt).group())
+    p, _ = penjadwal(backend)
+
+    hasil = jalankan(p.tanya_banyak(PERSONA, [f"Item-{i}" for i in range(8)]))
+
+    assert [h.jawaban for h in hasil] == [f"Item-{i}" for i in range(8)]
+
+
+def test_token_bucket_menunggu_setelah_burst_habis():
+    sekarang = [0.0]
+    bucket = TokenBucket(laju_per_detik=2.0, kapasitas=2.0, waktu=lambda: sekarang[0])
+
+    assert [bucket.pesan(), bucket.pesan()] == [0.0, 0.0]
+    assert bucket.pesan() == 0.5
+    sekarang[0] += 1.5
+    assert bucket.pesan() == 0.0
+
+
+def test_stream_429_fallback_sebelum_potongan_pertama():
+    cache = CacheJawaban()
+    backend = BackendLokal(jawaban="Galian tanah", error={"a": ["429 quota"] * 10})
+    p, _ = penjadwal(backend, cache=cache, maks_retry=1, jeda_awal=0.0)
+
+    potongan = list(p.tanya_stream(PERSONA, "Galian?"))
+
+    assert potongan[0].startswith("_ℹ️ `a` sedang limit, dijawab oleh `b`")
+    assert potongan[1:] == ["Galian", " tanah"]
+    assert backend.panggilan_per_model == {"a": 2, "b": 1}
+    assert cache.ambil(CacheJawaban.kunci(PERSONA, "a", "Galian?")) is None
+    assert cache.ambil(CacheJawaban.kunci(PERSONA, "b", "Galian?")) == "Galian tanah"
+
+
+def test_stream_error_di_tengah_ditambahkan_tanpa_retry_atau_fallback():
+    cache = CacheJawaban()
+    backend = BackendPutus(2, error="429 quota", jawaban="Galian tanah biasa per m3")
+    p, _ = penjadwal(backend, cache=cache, jeda_awal=0.0)
+
+    potongan = list(p.tanya_stream(PERSONA, "Galian?"))
+
+    assert potongan == ["Galian", " tanah", "\n\n" + pesan_error(RuntimeError("429 quota"), "a")]
+    assert backend.panggilan_per_model == {"a": 1}
+    assert len(cache) == 0
+
+
+def test_stream_error_lain_tanpa_fallback():
+    backend = BackendLokal(error={"a": ["500 internal error"]})
+    p, _ = penjadwal(backend, jeda_awal=0.0)
+
+    assert list(p.tanya_stream(PERSONA, "Galian?")) == [pesan_error(RuntimeError("500 internal error"), "a")]
+    assert backend.panggilan_per_model == {"a": 1}
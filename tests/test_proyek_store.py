@@ -0,0 +1,105 @@
+"""Uji ProyekStore (SQLite): simpan/timpa, halaman keyset, cascade hapus, dan snapshot harga."""
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.keranjang_rab import KOLOM_ANGKA, KOLOM_TEKS
+from engine.proyek_store import ProyekStore
+
+
+def buat_rab(n, awal=0):
+    rng = np.random.default_rng(n + awal)
+    df = pd.DataFrame({
+        "kode_ahsp": [f"K.{(awal + i) % 4}" for i in range(n)],
+        "Uraian Pekerjaan": [f"Pekerjaan {awal + i}" for i in range(n)],
+        "Satuan": ["m3"] * n,
+    })
+    for kolom in KOLOM_ANGKA:
+        df[kolom] = rng.uniform(0, 1e6, n)
+    return df
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProyekStore(str(tmp_path / "proyek.db"))
+
+
+def test_simpan_lalu_baca_sama(store):
+    df = buat_rab(12)
+
+    id_proyek = store.simpan_proyek("Bendung A", df, bidang="sda", persen_overhead=10, persen_ppn=12)
+
+    hasil = store.baca_boq(id_proyek)
+    assert hasil["no"].tolist() == list(range(12))
+    pd.testing.assert_frame_equal(hasil[[*KOLOM_TEKS, *KOLOM_ANGKA]], df)
+    meta = store.proyek(id_proyek)
+    assert (meta["nama"], meta["bidang"], meta["persen_overhead"], meta["persen_ppn"]) == ("Bendung A", "sda", 10.0, 12.0)
+    with pytest.raises(KeyError):
+        store.proyek(id_proyek + 100)
+
+
+def test_simpan_ulang_menimpa_per_bidang_dan_nama(store):
+    id_lama = store.simpan_proyek("Proyek", buat_rab(10), bidang="ck")
+    id_bm = store.simpan_proyek("Proyek", buat_rab(3), bidang="bm")
+    df_baru = buat_rab(4, awal=50)
+
+    id_baru = store.simpan_proyek("Proyek", df_baru, bidang="ck", persen_ppn=12)
+
+    assert id_baru == id_lama != id_bm
+    pd.testing.assert_frame_equal(store.baca_boq(id_baru)[[*KOLOM_TEKS, *KOLOM_ANGKA]], df_baru)
+    assert store.proyek(id_baru)["persen_ppn"] == 12.0
+    assert len(store.baca_boq(id_bm)) == 3
+    daftar = store.daftar_proyek("ck")
+    assert daftar["jumlah_baris"].tolist() == [4]
+    np.testing.assert_allclose(daftar["total_dengan_ppn"].iloc[0], df_baru["Total Dengan PPN"].sum())
+
+
+@pytest.mark.parametrize("n_baris", [0, 1, 20, 23])
+def test_halaman_keyset_melewati_batas_halaman(store, n_baris):
+    df = buat_rab(n_baris)
+    id_proyek = store.simpan_proyek("Besar", df)
+
+    halaman = list(store.iter_halaman(id_proyek, ukuran_halaman=5))
+
+    assert [len(h) for h in halaman] == [5] * (n_baris // 5) + ([n_baris % 5] if n_baris % 5 else [])
+    gabungan = pd.concat(halaman, ignore_index=True) if halaman else store.baca_boq(id_proyek)
+    assert gabungan["Uraian Pekerjaan"].tolist() == df["Uraian Pekerjaan"].tolist()
+    assert store.baca_halaman(id_proyek, setelah_no=n_baris - 3, batas=100)["no"].tolist() == list(range(max(n_baris - 2, 0), n_baris))
+
+
+def test_tambah_baris_melanjutkan_nomor(store):
+    id_proyek = store.simpan_proyek("P", buat_rab(3))
+
+    store.tambah_baris(id_proyek, buat_rab(2, awal=3))
+
+    hasil = store.baca_boq(id_proyek)
+    assert hasil["no"].tolist() == [0, 1, 2, 3, 4]
+    assert hasil["Uraian Pekerjaan"].tolist() == [f"Pekerjaan {i}" for i in range(5)]
+
+
+def test_hapus_proyek_cascade(store):
+    id_proyek = store.simpan_proyek("Hapus", buat_rab(6), harga={"Semen": 1450})
+    id_lain = store.simpan_proyek("Tetap", buat_rab(2))
+
+    store.hapus_proyek(id_proyek)
+
+    with sqlite3.connect(store.path) as kon:
+        for tabel in ("baris_boq", "snapshot_harga"):
+            assert kon.execute(f"SELECT COUNT(*) FROM {tabel} WHERE id_proyek = ?", (id_proyek,)).fetchone()[0] == 0
+        assert kon.execute("SELECT COUNT(*) FROM harga_snapshot").fetchone()[0] == 0
+    assert store.cari_kode("K.0")["id_proyek"].tolist() == [id_lain]
+    assert store.daftar_proyek()["nama"].tolist() == ["Tetap"]
+
+
+def test_snapshot_harga_lewati_nilai_kosong(store):
+    harga = {"Semen": 1450, "Pasir": np.nan, "Kerikil": None, "Air": "tidak tahu", "Pekerja": "120000"}
+
+    id_proyek = store.simpan_proyek("Snapshot", buat_rab(1), harga=harga, keterangan_harga="awal")
+    id_kedua = store.simpan_snapshot_harga(id_proyek, {"Semen": 1500.0})
+
+    assert store.snapshot_harga(id_proyek) == {"Semen": 1500.0}
+    id_pertama = id_kedua - 1
+    assert store.snapshot_harga(id_proyek, id_pertama) == {"Semen": 1450.0, "Pekerja": 120000.0}
+    assert store.snapshot_harga(store.simpan_proyek("Tanpa", buat_rab(1))) == {}
@@ -0,0 +1,94 @@
+"""Uji hitung ulang inkremental: delta harga/hapus harus sama dengan hitung ulang penuh dan batch."""
+import copy
+
+import numpy as np
+
+from engine.batch_engine import KATEGORI, KOLOM_BIAYA, hitung_rab_batch, susun_matriks_koefisien
+from engine.rab_inkremental import IndeksRABInkremental
+from tests.test_batch_engine import buat_boq, buat_master
+
+
+def buat_indeks(master, harga, kode, volume):
+    """Separuh baris lewat tambah_banyak (jalur proyek), separuh lewat tambah_baris (jalur per item)."""
+    matriks = susun_matriks_koefisien(master)
+    indeks = IndeksRABInkremental(kapasitas_awal=4)
+    separuh = len(kode) // 2
+    indeks.tambah_banyak(matriks, matriks.posisi(kode[:separuh]), volume[:separuh], lambda n: harga.get(n, 0))
+    per_kode = master.set_index("kode_ahsp")
+    for k, v in zip(kode[separuh:], volume[separuh:]):
+        koef = [per_kode.at[k, kat] if isinstance(per_kode.at[k, kat], dict) else {} for kat in KATEGORI]
+        indeks.tambah_baris(v, *koef, lambda n: harga.get(n, 0))
+    return indeks, matriks
+
+
+def cocok_dengan_penuh(indeks):
+    penuh = copy.deepcopy(indeks)
+    penuh.hitung_ulang_penuh()
+    semua = np.arange(indeks.n_baris)
+    np.testing.assert_allclose(indeks.biaya_array(semua), penuh.biaya_array(semua), rtol=1e-9, atol=1e-6)
+    for kolom, nilai in penuh.rekap().items():
+        np.testing.assert_allclose(indeks.rekap()[kolom], nilai, rtol=1e-9)
+
+
+def test_tambah_sama_dengan_batch():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master)
+    indeks, matriks = buat_indeks(master, harga, kode, volume)
+
+    df = hitung_rab_batch(kode, volume, matriks, harga)
+
+    np.testing.assert_allclose(indeks.biaya_array(np.arange(len(kode))), df[list(KOLOM_BIAYA)].to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(indeks.rekap()["total_dengan_ppn_item"], df["total_dengan_ppn_item"].sum(), rtol=1e-12)
+
+
+def test_ubah_harga_hanya_baris_terdampak_dan_sama_dengan_penuh():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master)
+    indeks, matriks = buat_indeks(master, harga, kode, volume)
+    nama = next(n for n in indeks.sumber_daya() if n in harga)
+    sebelum = indeks.biaya_array(np.arange(len(kode))).copy()
+
+    baris = indeks.ubah_harga({nama: harga[nama] * 3 + 17})
+
+    per_kode = master.set_index("kode_ahsp")
+    pemakai = {i for i, k in enumerate(kode)
+               if any(isinstance(per_kode.at[k, kat], dict) and nama in per_kode.at[k, kat] for kat in KATEGORI)}
+    assert set(baris.tolist()) == pemakai
+    tetap = np.setdiff1d(np.arange(len(kode)), baris)
+    np.testing.assert_array_equal(indeks.biaya_array(tetap), sebelum[tetap])
+    cocok_dengan_penuh(indeks)
+    assert len(indeks.ubah_harga({nama: harga[nama] * 3 + 17})) == 0  # harga sama: tidak ada yang dihitung
+
+
+def test_sinkron_harga_berulang_sama_dengan_batch_harga_akhir():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master)
+    indeks, matriks = buat_indeks(master, harga, kode, volume)
+    rng = np.random.default_rng(3)
+
+    harga_akhir = dict(harga)
+    for _ in range(20):
+        nama = rng.choice(sorted(harga_akhir))
+        harga_akhir[nama] = float(rng.integers(500, 2_000_000))
+        indeks.sinkron_harga(lambda n: harga_akhir.get(n, 0))
+
+    cocok_dengan_penuh(indeks)
+    df = hitung_rab_batch(kode, volume, matriks, harga_akhir)
+    np.testing.assert_allclose(indeks.biaya_array(np.arange(len(kode))), df[list(KOLOM_BIAYA)].to_numpy(), rtol=1e-9)
+
+
+def test_hapus_baris_keluar_dari_grand_total():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master, n_baris=20)
+    indeks, matriks = buat_indeks(master, harga, kode, volume)
+
+    for i in (0, 7, 19):
+        indeks.hapus_baris(i)
+    nama = next(iter(indeks.sumber_daya()))
+    indeks.ubah_harga({nama: 123_456.0})
+
+    cocok_dengan_penuh(indeks)
+    sisa = [i for i in range(len(kode)) if i not in (0, 7, 19)]
+    df = hitung_rab_batch([kode[i] for i in sisa], [volume[i] for i in sisa], matriks, {**harga, nama: 123_456.0})
+    np.testing.assert_allclose(indeks.rekap()["total_dengan_ppn_item"], df["total_dengan_ppn_item"].sum(), rtol=1e-12)
+    assert indeks.biaya_baris(7)["total_dengan_ppn_item"] == 0.0
@@ -0,0 +1,125 @@
+"""Uji rekap sumber daya: total jadwal/rincian terhadap loop per baris BOQ, biaya, dan urutan periode alami."""
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.batch_engine import KATEGORI, hitung_rab_batch, susun_matriks_koefisien
+from engine.rekap_sumber_daya import KOLOM_JADWAL, KOLOM_RINCIAN, jadwal_pengadaan, rincian_kebutuhan
+from tests.test_batch_engine import buat_boq, buat_master
+
+
+def kebutuhan_per_baris(master, kode, volume, periode=None):
+    """Jalur loop: {(periode, kategori, sumber daya): [kuantitas, jumlah baris BOQ]}."""
+    per_kode = master.set_index("kode_ahsp")
+    hasil = defaultdict(lambda: [0.0, 0])
+    for i, (k, v) in enumerate(zip(kode, volume)):
+        for kat in KATEGORI:
+            koef = per_kode.at[k, kat]
+            for nama, nilai in (koef.items() if isinstance(koef, dict) else ()):
+                kunci = ("Seluruh Proyek" if periode is None else periode[i], kat, nama)
+                hasil[kunci][0] += v * nilai
+                hasil[kunci][1] += 1
+    return hasil
+
+
+def sebagai_dict(df):
+    return {(p, k, s): [q, n] for p, k, s, q, n in df[["periode", "kategori", "sumber_daya", "kuantitas", "jumlah_baris_boq"]].itertuples(index=False)}
+
+
+def cek_sama(df, harapan):
+    hasil = sebagai_dict(df)
+    assert hasil.keys() == harapan.keys()
+    for kunci, (kuantitas, jumlah) in harapan.items():
+        assert hasil[kunci][1] == jumlah
+        np.testing.assert_allclose(hasil[kunci][0], kuantitas, rtol=1e-12)
+
+
+def test_jadwal_sama_dengan_loop_dan_biaya_sama_dengan_batch():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master)
+    matriks = susun_matriks_koefisien(master)
+
+    df = jadwal_pengadaan(kode, volume, matriks, harga)
+
+    assert list(df.columns) == KOLOM_JADWAL
+    cek_sama(df, kebutuhan_per_baris(master, kode, volume))
+    batch = hitung_rab_batch(kode, volume, matriks, harga)
+    for kat in KATEGORI:
+        np.testing.assert_allclose(
+            np.nansum(df.loc[df["kategori"] == kat, "total_biaya"]), batch[f"total_{kat}_item"].sum(), rtol=1e-9
+        )
+    # Urut kategori lalu kuantitas terbesar
+    for _, grup in df.groupby("kategori", sort=False):
+        assert grup["kuantitas"].is_monotonic_decreasing
+    assert df["kategori"].drop_duplicates().tolist() == [k for k in KATEGORI if k in set(df["kategori"])]
+
+
+def test_rincian_dijumlah_sama_dengan_jadwal():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master, n_baris=80)
+    matriks = susun_matriks_koefisien(master)
+
+    rincian = rincian_kebutuhan(kode, volume, matriks, harga)
+    jadwal = jadwal_pengadaan(kode, volume, matriks, harga)
+
+    assert list(rincian.columns) == KOLOM_RINCIAN
+    np.testing.assert_allclose(rincian["kuantitas"], rincian["koefisien"] * rincian["volume"])
+    assert (rincian["kode_ahsp"].astype(str).to_numpy() == np.asarray(kode)[rincian["baris_boq"]]).all()
+    total = rincian.groupby(["kategori", "sumber_daya"], observed=True)["kuantitas"].sum()
+    harapan = jadwal.set_index(["kategori", "sumber_daya"])["kuantitas"]
+    np.testing.assert_allclose(total.loc[harapan.index].to_numpy(), harapan.to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(np.nansum(rincian["total_biaya"]), np.nansum(jadwal["total_biaya"]), rtol=1e-12)
+
+
+def test_periode_urut_alami_dan_kosong_terakhir():
+    master, _ = buat_master()
+    kode, volume = buat_boq(master, n_baris=120)
+    matriks = susun_matriks_koefisien(master)
+    label = ["Minggu 10", "Minggu 2", None, "Minggu 1", "Minggu 11"]
+    periode = [label[i % len(label)] for i in range(len(kode))]
+
+    df = jadwal_pengadaan(kode, volume, matriks, periode=periode)
+
+    urutan = df["periode"].drop_duplicates().tolist()
+    assert urutan[:4] == ["Minggu 1", "Minggu 2", "Minggu 10", "Minggu 11"]
+    assert len(urutan) == 5 and pd.isna(urutan[4])
+    cek_sama(df.fillna({"periode": "kosong"}), kebutuhan_per_baris(master, kode, volume, [p or "kosong" for p in periode]))
+    assert df["harga_satuan"].isna().all()
+
+
+def test_periode_angka_urut_numerik():
+    master = pd.DataFrame({"kode_ahsp": ["B.1"], "tenaga": [{}], "bahan": [{"Semen": 1.0}], "alat": [{}]})
+    matriks = susun_matriks_koefisien(master)
+
+    df = jadwal_pengadaan(["B.1"] * 3, [1.0] * 3, matriks, periode=[12, 3, 7])
+
+    assert df["periode"].drop_duplicates().tolist() == [3, 7, 12]
+
+
+def test_satuan_dari_nama_dan_kategori():
+    master = pd.DataFrame({
+        "kode_ahsp": ["B.1"],
+        "tenaga": [{"Pekerja": 0.5}],
+        "bahan": [{"Semen PC (Kg)": 276.0}],
+        "alat": [{"Molen": 0.25}],
+    })
+    matriks = susun_matriks_koefisien(master)
+
+    df = jadwal_pengadaan(["B.1"], [2.0], matriks)
+
+    assert dict(zip(df["sumber_daya"], df["satuan"])) == {"Pekerja": "OH", "Semen PC (Kg)": "Kg", "Molen": "Jam"}
+    assert dict(zip(df["sumber_daya"], df["kuantitas"])) == {"Pekerja": 1.0, "Semen PC (Kg)": 552.0, "Molen": 0.5}
+
+
+def test_kode_tidak_ada_dan_panjang_beda():
+    master, _ = buat_master()
+    matriks = susun_matriks_koefisien(master)
+
+    with pytest.raises(KeyError, match="X.404"):
+        jadwal_pengadaan(["A.0", "X.404"], [1.0, 1.0], matriks)
+    with pytest.raises(ValueError):
+        rincian_kebutuhan(["A.0"], [1.0, 2.0], matriks)
+    with pytest.raises(ValueError):
+        jadwal_pengadaan(["A.0"], [1.0], matriks, periode=["Minggu 1", "Minggu 2"])
@@ -0,0 +1,81 @@
+"""Uji skenario harga: total per skenario sama dengan hitung_rab_batch per daftar harga (serial & paralel)."""
+import numpy as np
+import pandas as pd
+
+from engine.batch_engine import hitung_rab_batch, susun_matriks_koefisien
+from engine.skenario_harga import MIN_DAFTAR_PARALEL, grid_skenario, hitung_skenario
+from tests.test_batch_engine import buat_boq, buat_master
+
+KOLOM_TOTAL = {
+    "total_tenaga": "total_tenaga_item", "total_bahan": "total_bahan_item", "total_alat": "total_alat_item",
+    "total_sub_langsung": "total_sub_langsung_item", "total_overhead": "total_overhead_item",
+    "total_tanpa_ppn": "total_tanpa_ppn_item", "total_ppn": "total_ppn_item", "total_dengan_ppn": "total_dengan_ppn_item",
+}
+
+
+def buat_daftar_harga(matriks, n_daftar, seed=5):
+    """Daftar harga lengkap (semua nama cocok persis) dengan harga acak per wilayah."""
+    rng = np.random.default_rng(seed)
+    return {
+        f"Wilayah {i}": {nama: float(rng.integers(500, 2_000_000)) for nama in matriks.sumber_daya}
+        for i in range(n_daftar)
+    }
+
+
+def cek_sama_dengan_batch(df, kode, volume, matriks, daftar_harga, skenario):
+    assert df["skenario"].tolist() == [s.nama for s in skenario]
+    for s, (_, baris) in zip(skenario, df.iterrows()):
+        batch = hitung_rab_batch(kode, volume, matriks, daftar_harga[s.daftar_harga], s.persen_overhead, s.persen_ppn)
+        for kolom, kolom_batch in KOLOM_TOTAL.items():
+            np.testing.assert_allclose(baris[kolom], batch[kolom_batch].sum(), rtol=1e-9)
+
+
+def test_serial_sama_dengan_batch_per_skenario():
+    master, _ = buat_master()
+    kode, volume = buat_boq(master)
+    matriks = susun_matriks_koefisien(master)
+    daftar_harga = buat_daftar_harga(matriks, 3)
+    skenario = grid_skenario(list(daftar_harga), [(15, 11), (10, 12)])
+
+    df = hitung_skenario(kode, volume, matriks, daftar_harga, skenario, max_workers=1)
+
+    assert len(df) == 6
+    cek_sama_dengan_batch(df, kode, volume, matriks, daftar_harga, skenario)
+    assert df["selisih_persen"].iloc[0] == 0.0
+    assert (df["sumber_daya_tanpa_harga"] == 0).all()
+
+
+def test_paralel_sama_dengan_serial():
+    master, _ = buat_master()
+    kode, volume = buat_boq(master)
+    matriks = susun_matriks_koefisien(master)
+    daftar_harga = buat_daftar_harga(matriks, MIN_DAFTAR_PARALEL + 3)
+    skenario = grid_skenario(list(daftar_harga), [(15, 11)])
+
+    paralel = hitung_skenario(kode, volume, matriks, daftar_harga, skenario, acuan=skenario[2].nama, max_workers=2)
+    serial = hitung_skenario(kode, volume, matriks, daftar_harga, skenario, acuan=skenario[2].nama, max_workers=1)
+
+    pd.testing.assert_frame_equal(paralel, serial)
+    cek_sama_dengan_batch(paralel, kode, volume, matriks, daftar_harga, skenario)
+    assert paralel["selisih_persen"].iloc[2] == 0.0
+
+
+def test_sumber_daya_tanpa_harga_dihitung_per_daftar():
+    master, _ = buat_master()
+    kode, volume = buat_boq(master)
+    matriks = susun_matriks_koefisien(master)
+    daftar_harga = buat_daftar_harga(matriks, 2)
+    dipakai = sorted({matriks.sumber_daya[i] for i in matriks.indices})
+    for nama in dipakai[:3]:
+        del daftar_harga["Wilayah 1"][nama]
+
+    df = hitung_skenario(kode, volume, matriks, daftar_harga, grid_skenario(list(daftar_harga), [(15, 11)]), max_workers=1)
+
+    assert df["sumber_daya_tanpa_harga"].tolist() == [0, 3]
+
+
+def test_tanpa_skenario():
+    master, _ = buat_master()
+    matriks = susun_matriks_koefisien(master)
+
+    assert hitung_skenario(["A.0"], [1.0], matriks, {}, []).empty
@@ -0,0 +1,39 @@
+"""Uji mode uang tetap (int64 sen): pembulatan dan kedekatan dengan jalur float."""
+import numpy as np
+
+from engine.batch_engine import KOLOM_BIAYA, hitung_rab_batch, susun_matriks_koefisien
+from engine.uang_tetap import bulat_skala, hitung_rab_batch_sen, jumlah_sen, kali_bagi, ke_rupiah, ke_sen
+from tests.test_batch_engine import buat_boq, buat_master
+
+
+def test_pembulatan_setengah_menjauhi_nol():
+    # 1450.005 x 100 = 145000.49999... di float; tetap dibulatkan ke atas
+    np.testing.assert_array_equal(ke_sen([1450.005, -1450.005, 0.004, 2.5]), [145001, -145001, 0, 250])
+    np.testing.assert_array_equal(bulat_skala([0.0005, 1.2345], 1000), [1, 1235])
+
+
+def test_kali_bagi_eksak():
+    a = np.array([7, -7, 123_456_789, 10**12], dtype=np.int64)
+    b = np.array([5, 5, 987_654, 3], dtype=np.int64)
+    harapan = [(abs(x) * abs(y) * 2 + 10) // 20 * (1 if x * y >= 0 else -1) for x, y in zip(a.tolist(), b.tolist())]
+    np.testing.assert_array_equal(kali_bagi(a, b, 10), harapan)
+
+
+def test_jumlah_sen_melewati_nan():
+    assert jumlah_sen([0.105, 0.105, np.nan]) == 0.22
+
+
+def test_mode_sen_dekat_dengan_float():
+    master, harga = buat_master()
+    kode, volume = buat_boq(master)
+    matriks = susun_matriks_koefisien(master)
+
+    df_sen = hitung_rab_batch_sen(kode, volume, matriks, harga)
+    df = hitung_rab_batch(kode, volume, matriks, harga)
+
+    for kolom in KOLOM_BIAYA:
+        assert df_sen[kolom].dtype == np.int64
+    # Selisih hanya dari pembulatan per sen (koefisien 4 desimal, volume 3 desimal: tanpa pembulatan input)
+    selisih = np.abs(ke_rupiah(df_sen[list(KOLOM_BIAYA)].to_numpy()) - df[list(KOLOM_BIAYA)].to_numpy())
+    assert selisih[:, :8].max() <= 0.05
+    assert (selisih[:, 8:] <= 0.05 * (np.asarray(volume)[:, None] + 1)).all()